@@ -36,19 +36,26 @@ from pathlib import Path
 # -------- MCP Tools --------
 from mcp_file_ops import (
     list_tasks,
-    move_task,
+    transition_task,
     append_file,
     write_file,
     log_event,
+    render_front_matter,
+    read_front_matter,
+    sharded_dest,
+    strip_front_matter,
 )
+import mcp_state_store as state_store
+import mcp_blob_store as blob_store
 
 # -------- Skills (skill-routing pattern) --------
 from skills.planning_skill import generate_plan, PROMPT_TEMPLATE as PLAN_PROMPT_TEMPLATE
 from skills.summarize_skill import generate_summary, PROMPT_TEMPLATE as SUMMARY_PROMPT_TEMPLATE
 from skills.linkedin_skill import generate_linkedin_post, is_business_task, PROMPT_TEMPLATE as LINKEDIN_PROMPT_TEMPLATE
+from mcp_vault import VAULT_ROOT
 
 # -------- Paths --------
-BASE_DIR = Path(__file__).resolve().parent
+BASE_DIR = VAULT_ROOT
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
 PENDING_APPROVAL = BASE_DIR / "Pending_Approval"
 DONE = BASE_DIR / "Done"
@@ -59,6 +66,8 @@ PROMPT_HISTORY = BASE_DIR / "prompt_history.md"
 
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 MAX_CHARS = int(os.getenv("MAX_TASK_CHARS", "6000"))
+BLOB_PREVIEW_CHARS = int(os.getenv("BLOB_PREVIEW_CHARS", "280"))
+TRIAGE_ORDER = {"high": 0, "normal": 1, "low": 2}
 
 # Optional strict mode — disabled by default, never enabled in workflow
 OPENAI_REQUIRED = os.getenv("OPENAI_REQUIRED", "false").lower() == "true"
@@ -172,6 +181,11 @@ def main() -> None:
     }
 
     file_names = list_tasks(NEEDS_ACTION)
+    # Pre-triage priority (mcp_triage.py front matter): high, then normal, then low
+    triage_meta = {
+        name: read_front_matter(NEEDS_ACTION / name) for name in file_names
+    }
+    file_names.sort(key=lambda n: TRIAGE_ORDER.get(triage_meta[n].get("priority", "normal"), 1))
 
     if not file_names:
         print("No tasks found in Needs_Action/.")
@@ -183,7 +197,9 @@ def main() -> None:
             print(f"\n--- Processing: {name} ---")
 
             try:
-                original = file_path.read_text(encoding="utf-8", errors="ignore").strip()
+                original = strip_front_matter(
+                    file_path.read_text(encoding="utf-8", errors="ignore")
+                ).strip()
             except Exception as exc:
                 print(f"Error reading {name}: {exc}")
                 stats["errors"] += 1
@@ -192,10 +208,28 @@ def main() -> None:
             task_stem = Path(name).stem  # filename without .md
             task_hash = _task_hash(original)
 
+            # With the blob store on, the original text is stored once and the
+            # derived files below carry a reference instead of another copy.
+            blob_sha = blob_store.put_text(original) if blob_store.enabled() else ""
+            if blob_sha:
+                snippet_text = blob_store.blob_ref(blob_sha)
+                original_section = (
+                    f"> {original[:BLOB_PREVIEW_CHARS]}"
+                    f"{'…' if len(original) > BLOB_PREVIEW_CHARS else ''}\n\n"
+                    f"*Full text ({len(original)} chars) stored as blob sha256:{blob_sha[:12]} — "
+                    "`python mcp_blob_store.py render <file>` expands it.*\n\n"
+                    f"{blob_store.blob_ref(blob_sha)}"
+                )
+            else:
+                snippet_text = original[:300]
+                original_section = original
+
             # ---- Skill 1: Planning ----------------------------------------
             plan_content, plan_status = generate_plan(original, task_stem)
             plan_fname = f"{task_stem}_Plan.md"
-            write_file(PLANS / plan_fname, plan_content)
+            plan_path = sharded_dest(PLANS, plan_fname)
+            plan_rel = plan_path.relative_to(BASE_DIR).as_posix()
+            write_file(plan_path, plan_content)
             stats["plans_created"] += 1
 
             if "fallback" in plan_status:
@@ -208,7 +242,7 @@ def main() -> None:
             prompt_snippet = (
                 "fallback (no API key)"
                 if "fallback" in plan_status
-                else PLAN_PROMPT_TEMPLATE.format(task_text=original[:300])
+                else PLAN_PROMPT_TEMPLATE.format(task_text=snippet_text)
             )
             _log_prompt_history(
                 record_type="PLAN FILE",
@@ -228,16 +262,30 @@ def main() -> None:
                 stats["fallback_count"] += 1
 
             # ---- Write Pending_Approval output -----------------------------
+            # Front matter lets approve.py / post_approved.py read metadata
+            # from the first few KB without parsing the body.
+            channel = state_store.channel_for(name)
+            skills = {"plan": plan_status, "summary": sum_status}
             output_md = (
-                f"# Processed Task: {task_stem}\n\n"
+                render_front_matter({
+                    "hash": task_hash,
+                    "source": name,
+                    "channel": channel,
+                    "created": utc_ts(),
+                    "skills": skills,
+                    **({"blob": blob_sha} if blob_sha else {}),
+                    **{k: triage_meta[name][k] for k in ("priority", "tags")
+                       if k in triage_meta[name]},
+                })
+                + f"# Processed Task: {task_stem}\n\n"
                 f"**Processed:** {utc_ts()}\n"
                 f"**Model:** {MODEL}\n"
                 f"**Status:** {sum_status}\n"
                 f"**Task Hash:** {task_hash}\n"
-                f"**Plan:** Plans/{plan_fname}\n\n"
+                f"**Plan:** {plan_rel}\n\n"
                 "---\n\n"
                 "## Original Content\n\n"
-                f"{original}\n\n"
+                f"{original_section}\n\n"
                 "---\n\n"
                 "## AI Summary\n\n"
                 f"{summary}\n\n"
@@ -250,7 +298,7 @@ def main() -> None:
             summary_snippet = (
                 "fallback (no API key)"
                 if sum_status == "fallback"
-                else SUMMARY_PROMPT_TEMPLATE.format(task_text=original[:300])
+                else SUMMARY_PROMPT_TEMPLATE.format(task_text=snippet_text)
             )
             _log_prompt_history(
                 record_type="SUMMARY",
@@ -261,6 +309,13 @@ def main() -> None:
                 prompt_snippet=summary_snippet,
             )
 
+            source_dst = sharded_dest(DONE, f"_source_{name}")
+            artefacts = {
+                "plan": plan_rel,
+                "pending": f"Pending_Approval/{name}",
+                "source": source_dst.relative_to(BASE_DIR).as_posix(),
+            }
+
             # ---- Skill 3: LinkedIn (if business task) ----------------------
             if is_business_task(original):
                 li_text, li_status = generate_linkedin_post(original)
@@ -269,7 +324,14 @@ def main() -> None:
                 li_draft_path = PENDING_APPROVAL / li_draft_fname
 
                 li_draft_md = (
-                    f"# LinkedIn Post Approval\n\n"
+                    render_front_matter({
+                        "hash": task_hash,
+                        "source": name,
+                        "channel": channel,
+                            "created": utc_ts(),
+                        "skills": {**skills, "linkedin": li_status},
+                    })
+                    + f"# LinkedIn Post Approval\n\n"
                     f"**Title:** LinkedIn Post Approval\n"
                     f"**Source Task:** {name}\n"
                     f"**Generated:** {utc_ts()}\n"
@@ -285,6 +347,14 @@ def main() -> None:
                 )
                 write_file(li_draft_path, li_draft_md)
                 stats["linkedin_drafts_created"] += 1
+                artefacts["linkedin_draft"] = f"Pending_Approval/{li_draft_fname}"
+                state_store.record(
+                    li_draft_fname,
+                    "Pending_Approval",
+                    path=li_draft_path,
+                    content_hash=task_hash,
+                    artefacts={"source_task": name},
+                )
 
                 _append_log(
                     f"{utc_ts()} - Agent: linkedin_draft_created | {li_draft_fname} | {li_status}\n"
@@ -298,7 +368,7 @@ def main() -> None:
                 li_snippet = (
                     "fallback (no API key)"
                     if "fallback" in li_status
-                    else LINKEDIN_PROMPT_TEMPLATE.format(task_text=original[:300])
+                    else LINKEDIN_PROMPT_TEMPLATE.format(task_text=snippet_text)
                 )
                 _log_prompt_history(
                     record_type="LINKEDIN DRAFT",
@@ -311,7 +381,26 @@ def main() -> None:
                 print(f"  LinkedIn draft: {li_draft_fname}")
 
             # ---- Move processed task out of Needs_Action ------------------
-            move_task(file_path, DONE / f"_source_{name}")
+            # The task's own state follows its Pending_Approval output; the
+            # source file move and the index update commit together.
+            moved = transition_task(
+                file_path,
+                source_dst,
+                "Pending_Approval",
+                task_id=name,
+                path=PENDING_APPROVAL / name,
+                content_hash=task_hash,
+                artefacts=artefacts,
+            )
+            if moved and blob_sha:
+                # Done/_source_<name> becomes a reference stub, not a third copy.
+                # Only once moved: a failed move leaves the full task in
+                # Needs_Action/ for the next run, never a stub.
+                write_file(
+                    source_dst,
+                    render_front_matter({"hash": task_hash, "blob": blob_sha, "size": len(original)})
+                    + blob_store.blob_ref(blob_sha) + "\n",
+                )
             stats["tasks_processed"] += 1
 
             _append_log(f"{utc_ts()} - Agent: processed | {name} | {sum_status}\n")
@@ -1,7 +1,10 @@
 import os
 from datetime import datetime
 
-VAULT_PATH = r"C:\Users\Zohair\Desktop\AI_Employee_Vault"
+from mcp_vault import VAULT_ROOT
+
+# --vault <dir> / VAULT_ROOT selects the vault (default: this checkout)
+VAULT_PATH = str(VAULT_ROOT)
 NEEDS_ACTION = os.path.join(VAULT_PATH, "Needs_Action")
 PROMPTS = os.path.join(VAULT_PATH, "prompts")
 
@@ -7,21 +7,32 @@ Usage:
   python approve.py                   # list pending files
   python approve.py <filename.md>     # approve a specific file
   python approve.py --all             # approve all pending files
+  python approve.py --channel gmail   # list (or with --all, approve) one channel only
 
-Each approval is logged in run_log.md (UTC) and Logs/events_<date>.jsonl.
+Listings read only the front-matter metadata index, never file bodies.
+
+Each approval is logged in run_log.md (UTC) and Logs/events_<date>.jsonl;
+--all moves the whole batch at once (mcp_file_ops.transition_many) and logs
+one aggregated entry.
 NEVER auto-approves — always requires explicit human invocation.
 """
 
 from __future__ import annotations
 
-import json
 import sys
 from datetime import datetime, timezone
-from pathlib import Path
-
-from mcp_file_ops import list_tasks, move_task, append_file, log_event
 
-BASE_DIR = Path(__file__).resolve().parent
+from mcp_file_ops import (
+    list_tasks_in_state,
+    transition_task,
+    transition_many,
+    append_file,
+    log_event,
+    folder_metadata,
+)
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 PENDING_APPROVAL = BASE_DIR / "Pending_Approval"
 APPROVED = BASE_DIR / "Approved"
 LOGS_DIR = BASE_DIR / "Logs"
@@ -50,7 +61,7 @@ def approve_file(filename: str) -> bool:
     APPROVED.mkdir(parents=True, exist_ok=True)
     dst = APPROVED / filename
 
-    if move_task(src, dst):
+    if transition_task(src, dst, "Approved", task_id=filename):
         _append_log(f"{utc_ts()} - Approved: {filename} -> Approved/\n")
         _log_ev("file_approved", {"file": filename, "dest": "Approved/"})
         print(f"Approved: {filename} -> Approved/")
@@ -62,14 +73,45 @@ def approve_file(filename: str) -> bool:
         return False
 
 
+def approve_all(filenames: list[str]) -> int:
+    """Move every file in one journaled batch and log the result once."""
+    result = transition_many(
+        [(PENDING_APPROVAL / f, APPROVED / f, {"task_id": f}) for f in filenames],
+        "Approved",
+    )
+    approved = [dst.name for _src, dst in result["moved"]]
+    failed = [src.name for src, _error in result["failed"]]
+    for f in approved:
+        print(f"Approved: {f} -> Approved/")
+    for f in failed:
+        print(f"Failed to move: {f}")
+    _append_log(
+        f"{utc_ts()} - Approved: {len(approved)} file(s) -> Approved/"
+        f" | failed={len(failed)} | {', '.join(approved)}\n"
+    )
+    _log_ev("files_approved", {"files": approved, "failed": failed, "dest": "Approved/"})
+    print(f"\nApproved {len(approved)}/{len(filenames)} files -> Approved/")
+    return len(approved)
+
+
 def main() -> None:
     PENDING_APPROVAL.mkdir(parents=True, exist_ok=True)
     APPROVED.mkdir(parents=True, exist_ok=True)
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
-    pending = list_tasks(PENDING_APPROVAL)
+    args = sys.argv[1:]
+    channel = None
+    if "--channel" in args:
+        i = args.index("--channel")
+        channel = args[i + 1] if i + 1 < len(args) else ""
+        del args[i:i + 2]
+
+    pending = list_tasks_in_state(PENDING_APPROVAL)
+    meta = folder_metadata(PENDING_APPROVAL)
+    if channel is not None:
+        pending = [f for f in pending if meta.get(f, {}).get("channel") == channel]
 
-    if len(sys.argv) < 2:
+    if not args:
         # List mode
         if not pending:
             print("No files pending approval.")
@@ -77,27 +119,29 @@ def main() -> None:
             print(f"Files pending approval ({len(pending)}):")
             for f in pending:
                 tag = " [LINKEDIN]" if f.startswith("linkedin_draft_") else ""
-                print(f"  - {f}{tag}")
+                info = meta.get(f, {})
+                detail = (
+                    f"  ({info.get('channel', '?')}, {info.get('created', '?')})"
+                    if "channel" in info or "created" in info else ""
+                )
+                print(f"  - {f}{tag}{detail}")
             print(
                 "\nUsage:\n"
                 "  python approve.py <filename.md>   approve one file\n"
                 "  python approve.py --all           approve all files\n"
+                "  python approve.py --channel <ch>  filter by channel (gmail, whatsapp, ...)\n"
                 "\nApproved files move to Approved/ (NOT Done).\n"
                 "Run post_approved.py to post LinkedIn drafts and finalize Done."
             )
         return
 
-    arg = sys.argv[1]
+    arg = args[0]
 
     if arg == "--all":
         if not pending:
             print("No files to approve.")
             return
-        approved_count = 0
-        for f in pending:
-            if approve_file(f):
-                approved_count += 1
-        print(f"\nApproved {approved_count}/{len(pending)} files -> Approved/")
+        approve_all(pending)
     else:
         approve_file(arg)
 
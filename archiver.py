@@ -0,0 +1,168 @@
+"""Cold Archiver – compacts old Done/, Plans/ and Logs/ files into monthly zips.
+
+Done/ and Plans/ are date-sharded (Done/YYYY/MM/DD/<name>) when
+VAULT_SHARDING=true. This script moves every file older than N days into a
+compressed monthly archive so the hot directories stay small:
+
+  <folder>/_archive/YYYY-MM.zip        compressed files, arcname = original relative path
+  <folder>/_archive/manifest.jsonl     one line per archived file (name, path, archive, size)
+
+A file's age comes from its day shard, or — for flat legacy files and Logs/ —
+from the date embedded in its name (email_20260217_..., events_2026-02-20.jsonl).
+Files with no date (posted_ids.json, state.db, ...) are never archived.
+
+mcp_file_ops.read_located() / file_known() read through the manifest, so
+archived files stay reachable by name.
+
+Usage:
+  python archiver.py                 # archive files older than ARCHIVE_DAYS (default 30)
+  python archiver.py --days 7
+  python archiver.py --dry-run       # report only
+
+Safe to re-run: files already present in an archive are not added twice, and a
+file is only deleted after its zip entry and manifest line are written.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from mcp_file_ops import ARCHIVE_DIRNAME, append_file, log_event, name_date
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+LOGS_DIR = BASE_DIR / "Logs"
+RUN_LOG = BASE_DIR / "run_log.md"
+
+ARCHIVE_FOLDERS = [BASE_DIR / "Done", BASE_DIR / "Plans", LOGS_DIR]
+ARCHIVE_DAYS = int(os.getenv("ARCHIVE_DAYS", "30"))
+
+
+def utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def _shard_date(folder: Path, f: Path) -> datetime | None:
+    """Date of the YYYY/MM/DD shard containing f, or the date in a flat file's name."""
+    parts = f.relative_to(folder).parts
+    if len(parts) == 4 and all(p.isdigit() for p in parts[:3]):
+        try:
+            return datetime(int(parts[0]), int(parts[1]), int(parts[2]), tzinfo=timezone.utc)
+        except ValueError:
+            return None
+    if len(parts) == 1:
+        return name_date(f.name)
+    return None
+
+
+def _candidates(folder: Path, cutoff: datetime) -> list[tuple[Path, datetime]]:
+    """Files in folder (flat + day shards) dated before cutoff."""
+    out = []
+    if not folder.is_dir():
+        return out
+    for f in folder.iterdir():
+        if f.is_file() and f.name != ".gitkeep":
+            when = _shard_date(folder, f)
+            if when and when < cutoff:
+                out.append((f, when))
+    for year in folder.iterdir():
+        if not (year.is_dir() and year.name.isdigit() and len(year.name) == 4):
+            continue
+        for day in sorted(year.glob("[0-9][0-9]/[0-9][0-9]")):
+            files = [f for f in day.iterdir() if f.is_file()]
+            when = _shard_date(folder, files[0]) if files else None
+            if when and when < cutoff:
+                out.extend((f, when) for f in files)
+    return out
+
+
+def _prune_empty_shards(folder: Path) -> None:
+    for year in list(folder.glob("[0-9][0-9][0-9][0-9]")):
+        for d in sorted(year.rglob("*"), key=lambda p: len(p.parts), reverse=True):
+            if d.is_dir() and not any(d.iterdir()):
+                d.rmdir()
+        if not any(year.iterdir()):
+            year.rmdir()
+
+
+def archive_folder(folder: Path, cutoff: datetime, dry_run: bool = False) -> dict:
+    """Archive one folder. Returns {"files": n, "bytes": n, "archives": [...]}."""
+    by_month: dict[str, list[Path]] = {}
+    for f, when in _candidates(folder, cutoff):
+        by_month.setdefault(when.strftime("%Y-%m"), []).append(f)
+
+    stats = {"files": 0, "bytes": 0, "archives": sorted(f"{m}.zip" for m in by_month)}
+    if dry_run or not by_month:
+        stats["files"] = sum(len(v) for v in by_month.values())
+        return stats
+
+    archive_dir = folder / ARCHIVE_DIRNAME
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    manifest = archive_dir / "manifest.jsonl"
+
+    for month, files in sorted(by_month.items()):
+        zip_name = f"{month}.zip"
+        entries = []
+        with zipfile.ZipFile(archive_dir / zip_name, "a", zipfile.ZIP_DEFLATED) as zf:
+            existing = set(zf.namelist())
+            for f in files:
+                arcname = f.relative_to(folder).as_posix()
+                size = f.stat().st_size
+                if arcname not in existing:
+                    zf.write(f, arcname)
+                entries.append((f, {
+                    "name": f.name,
+                    "path": arcname,
+                    "archive": zip_name,
+                    "size": size,
+                    "archived_at": utc_ts(),
+                }))
+        with open(manifest, "a", encoding="utf-8") as mf:
+            for _, entry in entries:
+                mf.write(json.dumps(entry) + "\n")
+            mf.flush()
+            os.fsync(mf.fileno())
+        for f, entry in entries:
+            f.unlink()
+            stats["files"] += 1
+            stats["bytes"] += entry["size"]
+
+    _prune_empty_shards(folder)
+    return stats
+
+
+def main() -> None:
+    days = ARCHIVE_DAYS
+    if "--days" in sys.argv:
+        days = int(sys.argv[sys.argv.index("--days") + 1])
+    dry_run = "--dry-run" in sys.argv
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+
+    print(f"=== Archiver Running (older than {days} days{', dry run' if dry_run else ''}) ===")
+
+    total = 0
+    for folder in ARCHIVE_FOLDERS:
+        stats = archive_folder(folder, cutoff, dry_run=dry_run)
+        total += stats["files"]
+        if stats["files"]:
+            print(f"  {folder.name}/: {stats['files']} file(s) -> {', '.join(stats['archives'])}")
+            if not dry_run:
+                append_file(
+                    RUN_LOG,
+                    f"{utc_ts()} - Archiver: archived | {folder.name}/ | files={stats['files']} "
+                    f"| bytes={stats['bytes']}\n",
+                )
+                log_event(LOGS_DIR, "archive_compacted", {"folder": folder.name, **stats})
+
+    print(f"=== Archiver Done ({total} file(s)) ===")
+
+
+if __name__ == "__main__":
+    main()
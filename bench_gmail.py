@@ -0,0 +1,150 @@
+"""Gmail Benchmark – gmail_watcher.py against the offline fake Gmail server.
+
+For each mailbox size a synthetic mailbox is generated (fake_gmail_server.py),
+served on a free local port, and gmail_watcher.py runs as a subprocess into
+a fresh temporary vault with GMAIL_API_BASE pointing at it:
+
+  1. first run: full sync — list, metadata pass, full pass, attachments
+  2. second run, after --new-percent (default 1%) more messages arrive:
+     normally an incremental sync (a full resync if the first run had
+     failures, e.g. with --fail-rate)
+
+Per run it reports the sync mode, wall time, messages/sec (messages synced
+per second, from the watcher's gmail_sync event), tasks written, round
+trips, API calls per message (batch sub-requests counted individually) and
+bytes transferred (request + response bodies, as counted by the server).
+
+Usage:
+  python bench_gmail.py                          # 1k, 10k and 100k messages
+  python bench_gmail.py --sizes 1000,10000
+  python bench_gmail.py --sizes 5000 --attachment-rate 0 --json bench.json
+
+Accepts every mailbox generator option of fake_gmail_server.py
+(--domains, --thread-depth, --body-bytes, --attachment-kb, --fail-rate, ...).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from fake_gmail_server import build_mailbox, mailbox_args, start_server
+from mcp_vault import INSTALL_DIR, init_vault
+
+WATCHER = [sys.executable, str(INSTALL_DIR / "gmail_watcher.py")]
+
+
+def last_event(vault: Path, event: str) -> dict:
+    """Most recent event of this type in the vault's Logs/events_*.jsonl."""
+    found: dict = {}
+    for path in sorted((vault / "Logs").glob("events_*.jsonl")):
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if f'"{event}"' in line:
+                found = json.loads(line)
+    return found
+
+
+def run_watcher(server, vault: Path, messages: int, run: str) -> dict:
+    """One gmail_watcher.py run against server; returns its measurements."""
+    env = {
+        **os.environ,
+        "VAULT_ROOT": str(vault),
+        "GMAIL_API_BASE": server.base_url,
+        "GMAIL_RESYNC_MAX": str(max(messages, 1)),
+    }
+    server.reset_stats()
+    started = time.perf_counter()
+    proc = subprocess.run(WATCHER, cwd=vault, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    stats = json.loads(json.dumps(server.stats))
+    tasks = sum(1 for _ in (vault / "Inbox").glob("email_*.md"))
+    sync = last_event(vault, "gmail_sync")
+    synced = int(sync.get("messages", 0))
+    transferred = stats["bytes_in"] + stats["bytes_out"]
+    return {
+        "mailbox": messages,
+        "run": run,
+        "sync": sync.get("mode", "?"),
+        "exit_code": proc.returncode,
+        "synced": synced,
+        "tasks": tasks,
+        "seconds": round(elapsed, 3),
+        "msgs_per_sec": round(synced / elapsed, 1) if elapsed else 0.0,
+        "round_trips": stats["round_trips"],
+        "api_calls": stats["api_calls"],
+        "api_calls_per_msg": round(stats["api_calls"] / synced, 3) if synced else 0.0,
+        "bytes_in": stats["bytes_in"],
+        "bytes_out": stats["bytes_out"],
+        "bytes_per_msg": int(transferred / synced) if synced else 0,
+        "by_method": stats["by_method"],
+        "stderr": proc.stderr[-2000:] if proc.returncode else "",
+    }
+
+
+def bench_size(args: argparse.Namespace, size: int) -> list[dict]:
+    started = time.perf_counter()
+    mailbox = build_mailbox(args, size)
+    print(f"--- {size:,} messages (generated in {time.perf_counter() - started:.1f}s) ---")
+    server = start_server(mailbox, fail_rate=args.fail_rate)
+    vault = Path(tempfile.mkdtemp(prefix=f"gmail_bench_{size}_"))
+    results = []
+    try:
+        init_vault(vault)
+        results.append(run_watcher(server, vault, size, "first"))
+        new = max(1, size * args.new_percent // 100)
+        mailbox.deliver(new)
+        for f in (vault / "Inbox").glob("email_*.md"):
+            f.unlink()  # count only the second run's tasks
+        results.append(run_watcher(server, vault, size, "second"))
+    finally:
+        server.shutdown()
+        server.server_close()
+        if not args.keep:
+            shutil.rmtree(vault, ignore_errors=True)
+        else:
+            print(f"  vault kept: {vault}")
+    for r in results:
+        print_result(r)
+    return results
+
+
+def print_result(r: dict) -> None:
+    status = "" if r["exit_code"] == 0 else f"  EXIT {r['exit_code']}"
+    print(
+        f"  {r['run']:<6} sync={r['sync']:<11} {r['synced']:>8,} msgs {r['seconds']:>8.2f}s "
+        f"{r['msgs_per_sec']:>9,.1f} msg/s  tasks={r['tasks']:<6} "
+        f"round_trips={r['round_trips']:<6} calls/msg={r['api_calls_per_msg']:<6} "
+        f"bytes={r['bytes_in'] + r['bytes_out']:>13,} ({r['bytes_per_msg']:,}/msg){status}"
+    )
+    if r["stderr"]:
+        print(r["stderr"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--new-percent", type=int, default=1)
+    parser.add_argument("--json", default="", help="write all results to this file")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary vaults")
+    mailbox_args(parser)
+    args = parser.parse_args()
+
+    print("=== Gmail Benchmark ===")
+    results = []
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        results.extend(bench_size(args, size))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {args.json}")
+    print("=== Gmail Benchmark Done ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""SMTP Benchmark – mcp_email_ops sending against the local fake SMTP server.
+
+Starts fake_smtp_server.py on a free port and sends --messages emails with
+mcp_email_ops in each mode, into a temporary vault (run_log/events are
+written there, not to the real vault):
+
+  per_message  send_email() with SMTP_POOL_SIZE=0 — connect, EHLO, LOGIN
+               per message (the behaviour before the pool)
+  pooled       send_email() in a loop, sessions reused from the pool
+  send_many    one send_many() call — one session for the whole batch
+  threads      send_email() from --concurrency threads, sharing the pool
+  async        send_many_async(concurrency=--concurrency); needs aiosmtplib
+
+Per mode it reports wall time, messages/sec, and the connections and logins
+the server saw. --latency-ms (default 5) delays every server reply, so each
+round trip costs what it would over a network.
+
+Usage:
+  python bench_smtp.py
+  python bench_smtp.py --messages 2000 --latency-ms 20 --concurrency 8
+  python bench_smtp.py --modes pooled,send_many --fail-rate 0.01 --json smtp.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fake_smtp_server import start_server
+
+MODES = ("per_message", "pooled", "send_many", "threads", "async")
+
+
+def run_mode(ops, server, mode: str, messages: list[dict], concurrency: int) -> dict:
+    ops._pool.close_all()
+    ops.POOL_SIZE = 0 if mode == "per_message" else max(concurrency, 1)
+    server.reset_stats()
+    started = time.perf_counter()
+    if mode in ("per_message", "pooled"):
+        results = [ops.send_email(m["to"], m["subject"], m["body"]) for m in messages]
+    elif mode == "send_many":
+        results = ops.send_many(messages)
+    elif mode == "threads":
+        with ThreadPoolExecutor(max_workers=concurrency) as ex:
+            results = list(ex.map(lambda m: ops.send_email(m["to"], m["subject"], m["body"]), messages))
+    else:
+        results = asyncio.run(ops.send_many_async(messages, concurrency=concurrency))
+    elapsed = time.perf_counter() - started
+    ops._pool.close_all()
+    sent = sum(1 for r in results if r.get("ok"))
+    stats = dict(server.stats)
+    return {
+        "mode": mode,
+        "messages": len(messages),
+        "sent": sent,
+        "failed": len(messages) - sent,
+        "seconds": round(elapsed, 3),
+        "msgs_per_sec": round(sent / elapsed, 1) if elapsed else 0.0,
+        "connections": stats["connections"],
+        "logins": stats["logins"],
+        "server_messages": stats["messages"],
+    }
+
+
+def print_result(r: dict) -> None:
+    print(
+        f"  {r['mode']:<12} {r['sent']:>6,}/{r['messages']:<6,} sent {r['seconds']:>8.2f}s "
+        f"{r['msgs_per_sec']:>9,.1f} msg/s  connections={r['connections']:<5} logins={r['logins']}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--body-bytes", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=int, default=5)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--backend", choices=("auto", "aiosmtpd", "builtin"), default="auto")
+    parser.add_argument("--json", default="", help="write all results to this file")
+    args = parser.parse_args()
+
+    server = start_server(user="bench", password="bench", fail_rate=args.fail_rate,
+                          latency_ms=args.latency_ms, backend=args.backend)
+    vault = Path(tempfile.mkdtemp(prefix="smtp_bench_"))
+    os.environ.update(
+        VAULT_ROOT=str(vault), SMTP_HOST=server.host, SMTP_PORT=str(server.port),
+        SMTP_USER="bench", SMTP_PASS="bench", SMTP_STARTTLS="false",
+    )
+    import mcp_email_ops as ops  # after VAULT_ROOT/SMTP_* point at the bench
+
+    body = ("lorem ipsum dolor sit amet " * (args.body_bytes // 27 + 1))[: args.body_bytes]
+    messages = [{"to": f"user{i}@example.com", "subject": f"Bench {i}", "body": body}
+                for i in range(args.messages)]
+
+    print(f"=== SMTP Benchmark === {args.messages:,} messages, {server.backend} server, "
+          f"{args.latency_ms} ms/reply, concurrency {args.concurrency}")
+    results = []
+    try:
+        for mode in (m.strip() for m in args.modes.split(",") if m.strip()):
+            if mode == "async" and ops.aiosmtplib is None:
+                print(f"  {mode:<12} skipped (pip install aiosmtplib)")
+                continue
+            results.append(run_mode(ops, server, mode, messages, args.concurrency))
+            print_result(results[-1])
+    finally:
+        server.shutdown()
+        shutil.rmtree(vault, ignore_errors=True)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {args.json}")
+    print("=== SMTP Benchmark Done ===")
+
+
+if __name__ == "__main__":
+    main()
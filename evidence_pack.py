@@ -12,6 +12,7 @@ Contents of the zip:
   Approved/
   Done/
   Logs/
+  Blobs/   (content-addressed task bodies, when BLOB_STORE_ENABLED=true)
 
 Usage:
   python evidence_pack.py
@@ -27,14 +28,16 @@ import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent
+from mcp_vault import INSTALL_DIR, VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
 
 INCLUDE_FILES = [
     BASE_DIR / "run_log.md",
     BASE_DIR / "prompt_history.md",
-    BASE_DIR / "README.md",
+    INSTALL_DIR / "README.md",
 ]
 
 INCLUDE_DIRS = [
@@ -43,6 +46,7 @@ INCLUDE_DIRS = [
     BASE_DIR / "Approved",
     BASE_DIR / "Done",
     BASE_DIR / "Logs",
+    BASE_DIR / "Blobs",
 ]
 
 
@@ -0,0 +1,528 @@
+"""Fake Gmail Server – offline stand-in for the Gmail REST endpoints gmail_watcher uses.
+
+gmail_watcher.py otherwise needs OAuth credentials and a real mailbox to
+run at all. This server answers the same calls from a synthetic mailbox,
+so the watcher can be exercised end to end and benchmarked (bench_gmail.py):
+
+  GET  /gmail/v1/users/me/profile
+  GET  /gmail/v1/users/me/messages              labelIds, q=is:unread, maxResults, pageToken
+  GET  /gmail/v1/users/me/messages/<id>         format=full | metadata (+ metadataHeaders)
+  GET  /gmail/v1/users/me/messages/<id>/attachments/<attachmentId>
+  GET  /gmail/v1/users/me/history               startHistoryId, labelId, maxResults, pageToken
+  POST /batch/gmail/v1                          multipart/mixed, up to 100 GETs
+
+Test controls (not part of the Gmail API):
+  GET  /_stats                  round trips, API calls, bytes in / out
+  POST /_stats/reset
+  POST /_deliver?count=N        N new messages (replies or new threads)
+  POST /_expire                 drop history, so the next history.list is a 404
+
+Point the watcher at it with GMAIL_API_BASE (gmail_rest.py is used instead
+of googleapiclient; no credentials needed):
+
+  python fake_gmail_server.py --messages 10000 --port 8790
+  GMAIL_API_BASE=http://127.0.0.1:8790 python gmail_watcher.py
+
+Mailbox generator (deterministic for a given --seed):
+  --messages N            mailbox size (default 1000)
+  --domains SPEC          sender domain mix, "github.com=30,news.example=70"
+  --thread-depth N        messages per thread, 1..N (default 4)
+  --body-bytes N          average body size (default 1500); --html-ratio of
+                          bodies are HTML (default 0.3)
+  --attachment-rate F     fraction of messages with an attachment (default 0.1)
+  --attachment-kb MIN,MAX attachment size range in KiB (default 8,256)
+  --fail-rate F           fraction of batch sub-requests answered 429 (default 0)
+
+Bodies and attachment bytes are generated on request from the seed, so a
+100k-message mailbox holds only headers in memory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import bisect
+import json
+import random
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_DOMAINS = "github.com=25,google.com=10,microsoft.com=5,newsletter.example=40,vendor.example=20"
+MAX_BATCH = 100
+FIRST_HISTORY_ID = 100000
+FIRST_ID = 0x18C0000000000000
+START_TIME = datetime(2026, 1, 5, 8, 0, tzinfo=timezone.utc)
+LABELS = ["INBOX", "UNREAD"]
+
+_WORDS = (
+    "invoice meeting quarterly review deploy release contract schedule update "
+    "please confirm budget draft attached notes follow up agenda customer "
+    "pipeline incident report security patch onboarding proposal deadline"
+).split()
+_NAMES = ["Alice", "Bob", "Carol", "Dave", "Erin", "Frank", "Grace", "Heidi", "Ivan", "Judy"]
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def parse_domains(spec: str) -> list[tuple[str, float]]:
+    out = []
+    for item in spec.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name:
+            out.append((name.strip(), float(weight or 1)))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Synthetic mailbox
+# ---------------------------------------------------------------------------
+
+class Mailbox:
+    """Headers of every message in memory; bodies and attachments derived from the seed."""
+
+    def __init__(
+        self,
+        messages: int = 1000,
+        domains: str = DEFAULT_DOMAINS,
+        thread_depth: int = 4,
+        body_bytes: int = 1500,
+        html_ratio: float = 0.3,
+        attachment_rate: float = 0.1,
+        attachment_kb: tuple[int, int] = (8, 256),
+        seed: int = 1,
+    ):
+        self.domains = parse_domains(domains)
+        self.thread_depth = max(1, thread_depth)
+        self.body_bytes = max(16, body_bytes)
+        self.html_ratio = html_ratio
+        self.attachment_rate = attachment_rate
+        self.attachment_kb = attachment_kb
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.messages: list[dict] = []   # oldest first
+        self.by_id: dict[str, dict] = {}
+        self.history: list[tuple[int, dict]] = []  # (history id, message)
+        self.history_floor = FIRST_HISTORY_ID
+        self.history_id = FIRST_HISTORY_ID
+        self._open_thread: dict | None = None
+        self.deliver(messages)
+
+    def _sender(self) -> str:
+        names, weights = zip(*self.domains)
+        domain = self.rng.choices(names, weights)[0]
+        name = self.rng.choice(_NAMES)
+        return f"{name} <{name.lower()}@{domain}>"
+
+    def _new_message(self) -> dict:
+        i = len(self.messages)
+        msg_id = format(FIRST_ID + i, "x")
+        thread = self._open_thread
+        if thread is None or thread["left"] <= 0:
+            subject = " ".join(self.rng.choices(_WORDS, k=4)).capitalize()
+            thread = {"id": msg_id, "subject": subject, "left": self.rng.randint(1, self.thread_depth)}
+            self._open_thread = thread
+            sender, subject = self._sender(), subject
+        else:
+            sender, subject = self._sender(), f"Re: {thread['subject']}"
+        thread["left"] -= 1
+        attachment = None
+        if self.rng.random() < self.attachment_rate:
+            lo, hi = self.attachment_kb
+            attachment = {
+                "id": f"att{i}",
+                "filename": f"document_{i}.pdf",
+                "size": self.rng.randint(lo * 1024, max(lo, hi) * 1024),
+            }
+        return {
+            "index": i,
+            "id": msg_id,
+            "threadId": thread["id"],
+            "from": sender,
+            "subject": subject,
+            "date": START_TIME + timedelta(minutes=i),
+            "html": self.rng.random() < self.html_ratio,
+            "body_len": max(16, int(self.rng.gauss(self.body_bytes, self.body_bytes / 4))),
+            "attachment": attachment,
+            "labelIds": LABELS,
+        }
+
+    def deliver(self, count: int) -> list[str]:
+        """Append count new messages (history recorded). Returns their ids."""
+        ids = []
+        with self.lock:
+            for _ in range(count):
+                msg = self._new_message()
+                self.messages.append(msg)
+                self.by_id[msg["id"]] = msg
+                self.history_id += 1
+                self.history.append((self.history_id, msg))
+                ids.append(msg["id"])
+        return ids
+
+    def expire_history(self) -> None:
+        with self.lock:
+            self.history.clear()
+            self.history_floor = self.history_id + 1  # every issued historyId is now too old
+
+    # -- rendering ------------------------------------------------------------
+
+    def body_text(self, msg: dict) -> str:
+        rng = random.Random(f"{self.seed}:body:{msg['index']}")
+        words: list[str] = []
+        size = 0
+        while size < msg["body_len"]:
+            w = rng.choice(_WORDS)
+            words.append(w)
+            size += len(w) + 1
+        text = " ".join(words)
+        if msg["html"]:
+            return f"<html><body><p>{text}</p></body></html>"
+        return text
+
+    def attachment_bytes(self, msg: dict) -> bytes:
+        att = msg["attachment"]
+        return random.Random(f"{self.seed}:{att['id']}").randbytes(att["size"])
+
+    def headers(self, msg: dict) -> list[dict]:
+        return [
+            {"name": "From", "value": msg["from"]},
+            {"name": "To", "value": "me@example.com"},
+            {"name": "Subject", "value": msg["subject"]},
+            {"name": "Date", "value": format_datetime(msg["date"])},
+            {"name": "Message-ID", "value": f"<{msg['id']}@mail.example>"},
+        ]
+
+    def resource(self, msg: dict, fmt: str, wanted: list[str]) -> dict:
+        headers = self.headers(msg)
+        body = self.body_text(msg)
+        out = {
+            "id": msg["id"],
+            "threadId": msg["threadId"],
+            "labelIds": msg["labelIds"],
+            "snippet": re.sub(r"<[^>]+>", "", body)[:200],
+            "historyId": str(FIRST_HISTORY_ID + msg["index"] + 1),
+            "internalDate": str(int(msg["date"].timestamp() * 1000)),
+            "sizeEstimate": len(body) + (msg["attachment"] or {}).get("size", 0),
+        }
+        if fmt == "metadata":
+            if wanted:
+                lowered = {w.lower() for w in wanted}
+                headers = [h for h in headers if h["name"].lower() in lowered]
+            out["payload"] = {"mimeType": "multipart/mixed" if msg["attachment"] else "text/plain",
+                              "headers": headers}
+            return out
+        if fmt == "minimal":
+            return out
+        raw = body.encode("utf-8")
+        text_part = {
+            "partId": "0" if msg["attachment"] else "",
+            "mimeType": "text/html" if msg["html"] else "text/plain",
+            "filename": "",
+            "headers": [{"name": "Content-Type",
+                         "value": f"{'text/html' if msg['html'] else 'text/plain'}; charset=utf-8"}],
+            "body": {"size": len(raw), "data": b64url(raw)},
+        }
+        att = msg["attachment"]
+        if att is None:
+            text_part["headers"] = headers + text_part["headers"]
+            out["payload"] = text_part
+            return out
+        out["payload"] = {
+            "partId": "",
+            "mimeType": "multipart/mixed",
+            "filename": "",
+            "headers": headers,
+            "body": {"size": 0},
+            "parts": [text_part, {
+                "partId": "1",
+                "mimeType": "application/pdf",
+                "filename": att["filename"],
+                "headers": [{"name": "Content-Type", "value": "application/pdf"}],
+                "body": {"attachmentId": att["id"], "size": att["size"]},
+            }],
+        }
+        return out
+
+    # -- API ------------------------------------------------------------------
+
+    def list_messages(self, params: dict) -> dict:
+        # Every synthetic message is INBOX + UNREAD, so a label / is:unread
+        # filter either matches the whole mailbox or nothing.
+        want = set(params.get("labelIds", []))
+        if "is:unread" in " ".join(params.get("q", [])):
+            want.add("UNREAD")
+        size = max(1, min(500, int((params.get("maxResults") or ["100"])[0])))
+        start = int((params.get("pageToken") or ["0"])[0])
+        with self.lock:
+            total = len(self.messages) if want <= set(LABELS) else 0
+            end = total - start
+            page = self.messages[max(0, end - size):max(0, end)][::-1]
+        out = {"resultSizeEstimate": total}
+        if page:
+            out["messages"] = [{"id": m["id"], "threadId": m["threadId"]} for m in page]
+        if start + size < total:
+            out["nextPageToken"] = str(start + size)
+        return out
+
+    def list_history(self, params: dict) -> tuple[int, dict]:
+        try:
+            start = int((params.get("startHistoryId") or ["0"])[0])
+        except ValueError:
+            return 400, {"error": {"code": 400, "message": "Invalid startHistoryId"}}
+        if start < self.history_floor:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+        label = (params.get("labelId") or [""])[0]
+        size = max(1, min(500, int((params.get("maxResults") or ["100"])[0])))
+        offset = int((params.get("pageToken") or ["0"])[0])
+        with self.lock:
+            first = bisect.bisect_right(self.history, start, key=lambda r: r[0])
+            records = [(hid, m) for hid, m in self.history[first:]
+                       if not label or label in m["labelIds"]]
+            current = self.history_id
+        page = records[offset:offset + size]
+        out: dict = {"historyId": str(current)}
+        if page:
+            out["history"] = [{
+                "id": str(hid),
+                "messages": [{"id": m["id"], "threadId": m["threadId"]}],
+                "messagesAdded": [{"message": {"id": m["id"], "threadId": m["threadId"],
+                                               "labelIds": m["labelIds"]}}],
+            } for hid, m in page]
+        if offset + size < len(records):
+            out["nextPageToken"] = str(offset + size)
+        return 200, out
+
+    def dispatch(self, target: str) -> tuple[int, dict]:
+        """Answer one GET (direct or inside a batch). Returns (status, json)."""
+        parts = urlsplit(target)
+        params = parse_qs(parts.query)
+        path = parts.path.rstrip("/").split("/")
+        # ["", "gmail", "v1", "users", <user>, ...]
+        if path[:4] != ["", "gmail", "v1", "users"] or len(path) < 6:
+            return 404, {"error": {"code": 404, "message": "Not Found"}}
+        rest = path[5:]
+        if rest == ["profile"]:
+            return 200, {"emailAddress": "me@example.com", "messagesTotal": len(self.messages),
+                         "threadsTotal": len({m["threadId"] for m in self.messages}),
+                         "historyId": str(self.history_id)}
+        if rest == ["history"]:
+            return self.list_history(params)
+        if rest == ["messages"]:
+            return 200, self.list_messages(params)
+        msg = self.by_id.get(rest[1]) if len(rest) >= 2 and rest[0] == "messages" else None
+        if msg is None:
+            return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+        if len(rest) == 2:
+            fmt = (params.get("format") or ["full"])[0]
+            return 200, self.resource(msg, fmt, params.get("metadataHeaders", []))
+        if len(rest) == 4 and rest[2] == "attachments" and msg["attachment"] \
+                and rest[3] == msg["attachment"]["id"]:
+            data = self.attachment_bytes(msg)
+            return 200, {"size": len(data), "data": b64url(data)}
+        return 404, {"error": {"code": 404, "message": "Requested entity was not found."}}
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def parse_batch_request(body: bytes, content_type: str) -> list[tuple[str, str]]:
+    """[(content id, request target)] of a multipart/mixed batch body."""
+    m = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not m:
+        return []
+    out = []
+    for part in body.split(b"--" + m.group(1).encode()):
+        part = part.strip(b"\r\n")
+        if not part or part == b"--":
+            continue
+        head, _, http_msg = part.partition(b"\r\n\r\n")
+        cid = ""
+        for line in head.decode("latin-1").split("\r\n"):
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-id":
+                cid = value.strip().strip("<>")
+        request_line = http_msg.split(b"\r\n", 1)[0].decode("latin-1").split()
+        if len(request_line) >= 2:
+            out.append((cid, request_line[1]))
+    return out
+
+
+class FakeGmailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, mailbox: Mailbox, host: str = "127.0.0.1", port: int = 8790,
+                 fail_rate: float = 0.0):
+        super().__init__((host, port), _Handler)
+        self.mailbox = mailbox
+        self.fail_rate = fail_rate
+        self.fail_rng = random.Random(mailbox.seed)
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self) -> None:
+        with self.stats_lock:
+            self.stats = {"round_trips": 0, "api_calls": 0, "batch_requests": 0,
+                          "bytes_in": 0, "bytes_out": 0, "by_method": {}}
+
+    def count(self, method: str, calls: int, bytes_in: int, bytes_out: int) -> None:
+        with self.stats_lock:
+            s = self.stats
+            s["round_trips"] += 1
+            s["api_calls"] += calls
+            s["bytes_in"] += bytes_in
+            s["bytes_out"] += bytes_out
+            if method == "batch":
+                s["batch_requests"] += 1
+            else:
+                s["by_method"][method] = s["by_method"].get(method, 0) + 1
+
+
+def _method_name(target: str) -> str:
+    path = urlsplit(target).path.rstrip("/").split("/")[5:]
+    if "attachments" in path:
+        return "messages.attachments.get"
+    if path[:1] == ["messages"]:
+        return "messages.get" if len(path) > 1 else "messages.list"
+    return {"history": "history.list", "profile": "getProfile"}.get(path[0] if path else "", "other")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeGmailServer
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json; charset=UTF-8") -> int:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _send_json(self, status: int, data: dict) -> int:
+        return self._send(status, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def do_GET(self) -> None:
+        if self.path.startswith("/_stats"):
+            with self.server.stats_lock:
+                self._send_json(200, json.loads(json.dumps(self.server.stats)))
+            return
+        status, data = self.server.mailbox.dispatch(self.path)
+        sent = self._send_json(status, data)
+        self.server.count(_method_name(self.path), 1, len(self.requestline), sent)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+        if parts.path == "/_stats/reset":
+            self.server.reset_stats()
+            self._send_json(200, {"ok": True})
+        elif parts.path == "/_deliver":
+            ids = self.server.mailbox.deliver(int((params.get("count") or ["1"])[0]))
+            self._send_json(200, {"delivered": len(ids), "historyId": str(self.server.mailbox.history_id)})
+        elif parts.path == "/_expire":
+            self.server.mailbox.expire_history()
+            self._send_json(200, {"ok": True})
+        elif parts.path in ("/batch/gmail/v1", "/batch"):
+            self._batch(body)
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not Found"}})
+
+    def _batch(self, body: bytes) -> None:
+        items = parse_batch_request(body, self.headers.get("Content-Type", ""))
+        if not items or len(items) > MAX_BATCH:
+            sent = self._send_json(400, {"error": {"code": 400,
+                                                   "message": f"Batch must hold 1..{MAX_BATCH} requests"}})
+            self.server.count("batch", 0, len(body), sent)
+            return
+        boundary = "batch_fake_gmail"
+        out = []
+        for cid, target in items:
+            if self.server.fail_rate and self.server.fail_rng.random() < self.server.fail_rate:
+                status, data = 429, {"error": {"code": 429, "message": "Rate Limit Exceeded"}}
+            else:
+                status, data = self.server.mailbox.dispatch(target)
+            payload = json.dumps(data, separators=(",", ":"))
+            reason = {200: "OK", 404: "Not Found", 429: "Too Many Requests"}.get(status, "Error")
+            out.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{cid}>\r\n\r\n"
+                f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json; charset=UTF-8\r\n"
+                f"Content-Length: {len(payload.encode('utf-8'))}\r\n\r\n{payload}\r\n"
+            )
+        raw = ("".join(out) + f"--{boundary}--\r\n").encode("utf-8")
+        sent = self._send(200, raw, f"multipart/mixed; boundary={boundary}")
+        self.server.count("batch", len(items), len(body), sent)
+
+
+def start_server(mailbox: Mailbox, port: int = 0, fail_rate: float = 0.0) -> FakeGmailServer:
+    """Serve mailbox on 127.0.0.1:port (0 = any free port) in a background thread."""
+    server = FakeGmailServer(mailbox, port=port, fail_rate=fail_rate)
+    threading.Thread(target=server.serve_forever, name="fake-gmail", daemon=True).start()
+    return server
+
+
+def mailbox_args(parser: argparse.ArgumentParser) -> None:
+    """Generator options shared with bench_gmail.py."""
+    parser.add_argument("--domains", default=DEFAULT_DOMAINS)
+    parser.add_argument("--thread-depth", type=int, default=4)
+    parser.add_argument("--body-bytes", type=int, default=1500)
+    parser.add_argument("--html-ratio", type=float, default=0.3)
+    parser.add_argument("--attachment-rate", type=float, default=0.1)
+    parser.add_argument("--attachment-kb", default="8,256")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+
+
+def build_mailbox(args: argparse.Namespace, messages: int) -> Mailbox:
+    lo, _, hi = args.attachment_kb.partition(",")
+    return Mailbox(
+        messages=messages,
+        domains=args.domains,
+        thread_depth=args.thread_depth,
+        body_bytes=args.body_bytes,
+        html_ratio=args.html_ratio,
+        attachment_rate=args.attachment_rate,
+        attachment_kb=(int(lo), int(hi or lo)),
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8790)
+    mailbox_args(parser)
+    args = parser.parse_args()
+
+    mailbox = build_mailbox(args, args.messages)
+    server = FakeGmailServer(mailbox, port=args.port, fail_rate=args.fail_rate)
+    print(f"=== Fake Gmail Server on {server.base_url} ({len(mailbox.messages)} messages) ===")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print("=== Fake Gmail Server Stopped ===")
+
+
+if __name__ == "__main__":
+    main()
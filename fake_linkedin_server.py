@@ -0,0 +1,220 @@
+"""Fake LinkedIn Server – offline stand-in for the UGC Post endpoint with injectable throttling.
+
+mcp_linkedin_ops.create_post() talks to https://api.linkedin.com/v2/ugcPosts.
+This server answers the same call locally so the live posting path
+(session pool, rate limiter, retries) can be exercised without a real
+account:
+
+  POST /v2/ugcPosts   Bearer token + UGC JSON -> 201, x-restli-id: urn:li:share:<n>
+
+Failure injection (command line, or POST /_config with the same keys as JSON):
+  --quota N           posts per author per --window seconds (default 0 = unlimited);
+                      over quota -> 429 with Retry-After = time to the next window
+  --throttle-rate F   fraction of requests answered 429 (Retry-After: --retry-after)
+  --error-rate F      fraction answered 503
+  --latency-ms N      delay before every answer
+  --token T           only this bearer token is accepted (default: any) -> 401
+  Duplicate post text from the same author -> 422 "Content is a duplicate of
+  <urn>", as LinkedIn does.
+
+Test controls:
+  GET  /_stats        requests, created, throttled, errors, rejected, max concurrency
+  GET  /_posts        every created post
+  POST /_reset        forget posts, counters and quota windows
+
+Usage:
+  python fake_linkedin_server.py --port 8791 --quota 5 --window 60 --throttle-rate 0.1
+  LINKEDIN_API_BASE=http://127.0.0.1:8791 LINKEDIN_SIMULATED=false \\
+  LINKEDIN_ACCESS_TOKEN=test LINKEDIN_PERSON_URN=urn:li:person:test python post_approved.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONFIG_KEYS = {"quota": int, "window": float, "throttle_rate": float, "error_rate": float,
+               "retry_after": int, "latency_ms": int, "token": str}
+
+
+class FakeLinkedInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8791, **config):
+        super().__init__((host, port), _Handler)
+        self.config = {"quota": 0, "window": 86400.0, "throttle_rate": 0.0, "error_rate": 0.0,
+                       "retry_after": 1, "latency_ms": 0, "token": ""}
+        self.configure(config)
+        self.lock = threading.Lock()
+        self.rng = random.Random(1)
+        self.reset()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def configure(self, values: dict) -> None:
+        for key, value in values.items():
+            if key in CONFIG_KEYS and value is not None:
+                self.config[key] = CONFIG_KEYS[key](value)
+
+    def reset(self) -> None:
+        with self.lock:
+            self.posts: list[dict] = []
+            self.windows: dict[str, tuple[float, int]] = {}  # author -> (window start, count)
+            self.in_flight = 0
+            self.stats = {"requests": 0, "created": 0, "throttled": 0, "errors": 0,
+                          "rejected": 0, "max_concurrency": 0}
+
+    def enter(self) -> None:
+        with self.lock:
+            self.stats["requests"] += 1
+            self.in_flight += 1
+            self.stats["max_concurrency"] = max(self.stats["max_concurrency"], self.in_flight)
+
+    def leave(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+
+    def decide(self, author: str, text: str) -> tuple[int, dict, dict]:
+        """(status, headers, body) for one post attempt."""
+        cfg = self.config
+        with self.lock:
+            roll = self.rng.random()
+            if roll < cfg["throttle_rate"]:
+                self.stats["throttled"] += 1
+                return 429, {"Retry-After": str(cfg["retry_after"])}, {"status": 429, "message": "Throttled"}
+            if roll < cfg["throttle_rate"] + cfg["error_rate"]:
+                self.stats["errors"] += 1
+                return 503, {}, {"status": 503, "message": "Service Unavailable"}
+            if cfg["quota"] > 0:
+                now = time.time()
+                start, count = self.windows.get(author, (now, 0))
+                if now - start >= cfg["window"]:
+                    start, count = now, 0
+                if count >= cfg["quota"]:
+                    self.stats["throttled"] += 1
+                    retry = max(1, math.ceil(start + cfg["window"] - now))
+                    return 429, {"Retry-After": str(retry)}, {"status": 429, "message": "Member quota exceeded"}
+                self.windows[author] = (start, count + 1)
+            existing = next((p for p in self.posts if p["author"] == author and p["text"] == text), None)
+            if existing is not None:
+                self.stats["rejected"] += 1
+                return 422, {}, {"status": 422, "message": f"Content is a duplicate of {existing['id']}"}
+            post_id = f"urn:li:share:{7000000000000000000 + len(self.posts)}"
+            self.posts.append({"id": post_id, "author": author, "text": text, "ts": time.time()})
+            self.stats["created"] += 1
+            return 201, {"x-restli-id": post_id}, {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeLinkedInServer
+
+    def log_message(self, *_args) -> None:
+        pass
+
+    def _send(self, status: int, data: dict, headers: dict | None = None) -> None:
+        body = json.dumps(data).encode("utf-8") if data else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client timed out and went away
+
+    def do_GET(self) -> None:
+        with self.server.lock:
+            if self.path == "/_stats":
+                self._send(200, {**self.server.stats, "config": self.server.config})
+            elif self.path == "/_posts":
+                self._send(200, {"posts": list(self.server.posts)})
+            else:
+                self._send(404, {"status": 404, "message": "Not Found"})
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if self.path == "/_reset":
+            self.server.reset()
+            self._send(200, {"ok": True})
+            return
+        if self.path == "/_config":
+            try:
+                self.server.configure(json.loads(raw or b"{}"))
+            except (ValueError, TypeError) as exc:
+                self._send(400, {"status": 400, "message": str(exc)})
+                return
+            self._send(200, self.server.config)
+            return
+        if self.path.split("?")[0] != "/v2/ugcPosts":
+            self._send(404, {"status": 404, "message": "Not Found"})
+            return
+
+        self.server.enter()
+        try:
+            if self.server.config["latency_ms"]:
+                time.sleep(self.server.config["latency_ms"] / 1000)
+            auth = self.headers.get("Authorization", "")
+            token = self.server.config["token"]
+            if not auth.startswith("Bearer ") or (token and auth[7:] != token):
+                self._send(401, {"status": 401, "message": "Invalid access token"})
+                return
+            try:
+                payload = json.loads(raw)
+                author = payload["author"]
+                text = payload["specificContent"]["com.linkedin.ugc.ShareContent"]["shareCommentary"]["text"]
+            except (ValueError, KeyError, TypeError):
+                with self.server.lock:
+                    self.server.stats["rejected"] += 1
+                self._send(422, {"status": 422, "message": "Invalid UGC post body"})
+                return
+            status, headers, body = self.server.decide(author, text)
+            self._send(status, body, headers)
+        finally:
+            self.server.leave()
+
+
+def start_server(port: int = 0, **config) -> FakeLinkedInServer:
+    """Serve on 127.0.0.1:port (0 = any free port) in a background thread."""
+    server = FakeLinkedInServer(port=port, **config)
+    threading.Thread(target=server.serve_forever, name="fake-linkedin", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--port", type=int, default=8791)
+    parser.add_argument("--quota", type=int, default=0)
+    parser.add_argument("--window", type=float, default=86400.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--token", default="")
+    args = parser.parse_args()
+
+    config = {k: getattr(args, k) for k in CONFIG_KEYS}
+    server = FakeLinkedInServer(port=args.port, **config)
+    print(f"=== Fake LinkedIn Server on {server.base_url} ===")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    print("=== Fake LinkedIn Server Stopped ===")
+
+
+if __name__ == "__main__":
+    main()
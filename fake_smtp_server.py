@@ -0,0 +1,294 @@
+"""Fake SMTP Server – local stand-in for the SMTP relay used by mcp_email_ops.
+
+Accepts EHLO, AUTH PLAIN/LOGIN, MAIL/RCPT/DATA, RSET, NOOP and QUIT and
+counts what it sees, so pooled sending (session reuse, reconnects) can be
+exercised and measured without a real mail account. Nothing is delivered.
+
+Backends (--backend):
+  aiosmtpd   aiosmtpd's Controller (pip install aiosmtpd)
+  builtin    a small asyncio implementation, no dependencies
+  auto       aiosmtpd when installed, unless a builtin-only option is set (default)
+
+Options:
+  --user U --password P   credentials to accept (default: any login, none required)
+  --fail-rate F           fraction of messages answered 451 after DATA (transient)
+  --latency-ms N          delay before every reply, to model a remote server (builtin)
+  --max-per-session N     421 and disconnect after N messages on one connection (builtin)
+  Recipients whose local part starts with "reject" get 550 (permanent).
+
+Stats (FakeSMTPServer.stats): connections, logins, auth_failures, messages,
+recipients, bytes, deferred, rejected, max_concurrency.
+
+Usage:
+  python fake_smtp_server.py --port 8025 --latency-ms 5
+  SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_USER=u SMTP_PASS=p SMTP_STARTTLS=false \\
+  python send_test_email.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import random
+import re
+import threading
+import time
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import AuthResult, LoginPassword
+except ImportError:
+    Controller = None  # type: ignore
+
+ADDRESS_RE = re.compile(r"<([^>]*)>")
+STATS_KEYS = ("connections", "logins", "auth_failures", "messages", "recipients",
+              "bytes", "deferred", "rejected", "max_concurrency")
+
+
+class FakeSMTPServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8025, user: str = "", password: str = "",
+                 fail_rate: float = 0.0, latency_ms: int = 0, max_per_session: int = 0,
+                 backend: str = "auto"):
+        if backend == "auto":
+            builtin_only = latency_ms or max_per_session
+            backend = "aiosmtpd" if Controller is not None and not builtin_only else "builtin"
+        if backend == "aiosmtpd" and Controller is None:
+            raise RuntimeError("aiosmtpd not installed (pip install aiosmtpd)")
+        self.host, self.port, self.backend = host, port, backend
+        self.user, self.password = user, password
+        self.fail_rate, self.latency, self.max_per_session = fail_rate, latency_ms / 1000, max_per_session
+        self.lock = threading.Lock()
+        self.rng = random.Random(1)
+        self.in_flight = 0
+        self.reset_stats()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server = None
+        self._controller = None
+
+    # ---- bookkeeping --------------------------------------------------------
+
+    def reset_stats(self) -> None:
+        with self.lock:
+            self.stats = dict.fromkeys(STATS_KEYS, 0)
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.stats[key] += n
+
+    def check_login(self, user: str, password: str) -> bool:
+        ok = not self.user or (user == self.user and password == self.password)
+        self.count("logins" if ok else "auth_failures")
+        return ok
+
+    def accept_message(self, size: int, recipients: int) -> str:
+        """Reply to the end of DATA (injected 451 or 250)."""
+        with self.lock:
+            if self.rng.random() < self.fail_rate:
+                self.stats["deferred"] += 1
+                return "451 4.3.0 Injected temporary failure"
+            self.stats["messages"] += 1
+            self.stats["recipients"] += recipients
+            self.stats["bytes"] += size
+        return "250 2.0.0 OK queued"
+
+    # ---- lifecycle ----------------------------------------------------------
+
+    def start(self) -> "FakeSMTPServer":
+        """Serve in a background thread; sets .port when 0 was asked for."""
+        if self.backend == "aiosmtpd":
+            self._controller = Controller(
+                _AioHandler(self), hostname=self.host, port=self.port,
+                authenticator=self._authenticate, auth_required=bool(self.user), auth_require_tls=False,
+            )
+            self._controller.start()
+            self.port = self._controller.server.sockets[0].getsockname()[1]
+            return self
+        ready = threading.Event()
+        threading.Thread(target=self._run_builtin, args=(ready,), name="fake-smtp", daemon=True).start()
+        ready.wait(10)
+        return self
+
+    def _run_builtin(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(
+            asyncio.start_server(self._session, self.host, self.port)
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        ready.set()
+        self._loop.run_forever()
+
+    def shutdown(self) -> None:
+        if self._controller is not None:
+            self._controller.stop()
+        elif self._loop is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    # ---- aiosmtpd backend ---------------------------------------------------
+
+    def _authenticate(self, _smtp, _session, _envelope, _mechanism, auth_data):
+        ok = isinstance(auth_data, LoginPassword) and self.check_login(
+            auth_data.login.decode("utf-8", "replace"), auth_data.password.decode("utf-8", "replace")
+        )
+        return AuthResult(success=ok)
+
+    # ---- builtin backend ----------------------------------------------------
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        with self.lock:
+            self.stats["connections"] += 1
+            self.in_flight += 1
+            self.stats["max_concurrency"] = max(self.stats["max_concurrency"], self.in_flight)
+
+        async def reply(*lines: str) -> None:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            text = "".join(f"{line[:3]}{'-' if i < len(lines) - 1 else ' '}{line[4:]}\r\n"
+                           for i, line in enumerate(lines))
+            writer.write(text.encode("utf-8"))
+            await writer.drain()
+
+        async def read_line() -> str:
+            return (await reader.readline()).decode("utf-8", "replace").rstrip("\r\n")
+
+        authed, sender, rcpts, sent = not self.user, None, [], 0
+        try:
+            await reply("220 fake-smtp ESMTP ready")
+            while True:
+                line = await read_line()
+                if not line and reader.at_eof():
+                    break
+                verb, _, arg = line.partition(" ")
+                verb = verb.upper()
+                if verb == "EHLO":
+                    await reply("250 fake-smtp", "250 AUTH PLAIN LOGIN", "250 8BITMIME", "250 SIZE 26214400")
+                elif verb == "HELO":
+                    await reply("250 fake-smtp")
+                elif verb == "AUTH":
+                    mech, _, initial = arg.partition(" ")
+                    try:
+                        if mech.upper() == "PLAIN":
+                            if not initial:
+                                await reply("334 ")
+                                initial = await read_line()
+                            _zid, user, password = base64.b64decode(initial).decode("utf-8").split("\0")
+                        elif mech.upper() == "LOGIN":
+                            await reply("334 VXNlcm5hbWU6")
+                            user = base64.b64decode(await read_line()).decode("utf-8")
+                            await reply("334 UGFzc3dvcmQ6")
+                            password = base64.b64decode(await read_line()).decode("utf-8")
+                        else:
+                            await reply("504 5.5.4 Unrecognized authentication type")
+                            continue
+                    except (ValueError, UnicodeDecodeError):
+                        await reply("501 5.5.2 Cannot decode response")
+                        continue
+                    authed = self.check_login(user, password)
+                    await reply("235 2.7.0 Authentication successful" if authed
+                                else "535 5.7.8 Authentication credentials invalid")
+                elif verb == "MAIL":
+                    if not authed:
+                        await reply("530 5.7.0 Authentication required")
+                    elif self.max_per_session and sent >= self.max_per_session:
+                        await reply("421 4.7.0 Too many messages for this session")
+                        break
+                    else:
+                        match = ADDRESS_RE.search(arg)
+                        sender, rcpts = (match.group(1) if match else arg), []
+                        await reply("250 2.1.0 OK")
+                elif verb == "RCPT":
+                    match = ADDRESS_RE.search(arg)
+                    addr = match.group(1) if match else arg
+                    if sender is None:
+                        await reply("503 5.5.1 MAIL first")
+                    elif addr.lower().startswith("reject"):
+                        self.count("rejected")
+                        await reply("550 5.1.1 Mailbox unavailable")
+                    else:
+                        rcpts.append(addr)
+                        await reply("250 2.1.5 OK")
+                elif verb == "DATA":
+                    if not rcpts:
+                        await reply("503 5.5.1 RCPT first")
+                        continue
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    size = 0
+                    while True:
+                        data = await reader.readline()
+                        if data in (b".\r\n", b".\n", b""):
+                            break
+                        size += len(data)
+                    await reply(self.accept_message(size, len(rcpts)))
+                    sent += 1
+                    sender, rcpts = None, []
+                elif verb == "RSET":
+                    sender, rcpts = None, []
+                    await reply("250 2.0.0 OK")
+                elif verb == "NOOP":
+                    await reply("250 2.0.0 OK")
+                elif verb == "QUIT":
+                    await reply("221 2.0.0 Bye")
+                    break
+                else:
+                    await reply("502 5.5.2 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            writer.close()
+
+
+class _AioHandler:
+    def __init__(self, server: FakeSMTPServer):
+        self.server = server
+
+    async def handle_EHLO(self, _smtp, session, _envelope, hostname, responses):
+        self.server.count("connections")  # one EHLO per connection (no STARTTLS here)
+        session.host_name = hostname
+        return responses
+
+    async def handle_RCPT(self, _smtp, _session, envelope, address, _rcpt_options):
+        if address.lower().startswith("reject"):
+            self.server.count("rejected")
+            return "550 5.1.1 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 2.1.5 OK"
+
+    async def handle_DATA(self, _smtp, _session, envelope):
+        return self.server.accept_message(len(envelope.content or b""), len(envelope.rcpt_tos))
+
+
+def start_server(port: int = 0, **config) -> FakeSMTPServer:
+    """Serve on 127.0.0.1:port (0 = any free port) in a background thread."""
+    return FakeSMTPServer(port=port, **config).start()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--max-per-session", type=int, default=0)
+    parser.add_argument("--backend", choices=("auto", "aiosmtpd", "builtin"), default="auto")
+    args = parser.parse_args()
+
+    server = FakeSMTPServer(port=args.port, user=args.user, password=args.password,
+                            fail_rate=args.fail_rate, latency_ms=args.latency_ms,
+                            max_per_session=args.max_per_session, backend=args.backend).start()
+    print(f"=== Fake SMTP Server on {server.host}:{server.port} ({server.backend}) ===")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    print(f"=== Fake SMTP Server Stopped === {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Gmail MIME – full body text and attachments from a Gmail API payload.
+
+gmail_watcher.py used to store only the ~200-character snippet. For a
+format=full message this walks the MIME tree:
+
+  - Body: the first text/plain part; failing that, the first text/html
+    part converted to text (script/style dropped, block tags become line
+    breaks, entities decoded). base64url is decoded only up to
+    GMAIL_BODY_MAX_CHARS (default 20000) worth of input, so a huge body
+    never gets decoded whole.
+  - Attachments (parts with a filename): streamed into the content-addressed
+    blob store (mcp_blob_store.put_stream), decoding base64url in chunks as
+    it is read — the decoded file never sits in memory, and an attachment
+    received twice is stored once. Parts over GMAIL_ATTACHMENT_MAX_BYTES
+    (default 25 MiB) are listed but not downloaded. GMAIL_ATTACHMENTS=false
+    lists them without downloading any.
+
+Task files reference attachments by sha256 and size (plain text, not a
+blob marker, so mcp_blob_store.render() never inlines a binary file).
+"""
+
+from __future__ import annotations
+
+import base64
+import io
+import os
+import re
+from html.parser import HTMLParser
+
+import mcp_blob_store as blob_store
+
+BODY_MAX_CHARS = int(os.getenv("GMAIL_BODY_MAX_CHARS", "20000"))
+ATTACHMENTS_ENABLED = os.getenv("GMAIL_ATTACHMENTS", "true").strip().lower() == "true"
+ATTACHMENT_MAX_BYTES = int(os.getenv("GMAIL_ATTACHMENT_MAX_BYTES", str(25 * 1024 * 1024)))
+DECODE_CHUNK = 64 * 1024  # base64 characters per step (multiple of 4)
+
+_CHARSET_RE = re.compile(r"charset=\"?([\w.-]+)", re.IGNORECASE)
+
+
+# ---------------------------------------------------------------------------
+# Decoding
+# ---------------------------------------------------------------------------
+
+def _pad(data: str) -> str:
+    return data + "=" * (-len(data) % 4)
+
+
+def decode_b64url(data: str, max_bytes: int | None = None) -> bytes:
+    """Decode Gmail base64url, reading only enough input for max_bytes."""
+    if max_bytes is not None:
+        data = data[: ((max_bytes + 2) // 3) * 4]
+    try:
+        return base64.urlsafe_b64decode(_pad(data))
+    except (ValueError, TypeError):
+        return b""
+
+
+class B64UrlReader(io.RawIOBase):
+    """File-like reader that decodes a base64url string a chunk at a time."""
+
+    def __init__(self, data: str):
+        self._data = data
+        self._pos = 0
+        self._buf = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf and self._pos < len(self._data):
+            piece = self._data[self._pos:self._pos + DECODE_CHUNK]
+            self._pos += DECODE_CHUNK
+            try:
+                self._buf = base64.urlsafe_b64decode(_pad(piece))
+            except (ValueError, TypeError):
+                self._buf, self._pos = b"", len(self._data)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+class _TextExtractor(HTMLParser):
+    BLOCK = {"br", "p", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "table", "ul", "ol"}
+    SKIP = {"script", "style", "head"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip:
+            self._skip -= 1
+        elif tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html: str) -> str:
+    parser = _TextExtractor()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        return re.sub(r"<[^>]+>", " ", html)
+    text = "".join(parser.parts)
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    return re.sub(r"\n\s*\n+", "\n\n", text).strip()
+
+
+# ---------------------------------------------------------------------------
+# MIME walk
+# ---------------------------------------------------------------------------
+
+def _header(part: dict, name: str) -> str:
+    for h in part.get("headers", []) or []:
+        if h.get("name", "").lower() == name.lower():
+            return h.get("value", "")
+    return ""
+
+
+def walk(part: dict):
+    """Yield every part of a payload, depth first."""
+    yield part
+    for child in part.get("parts", []) or []:
+        yield from walk(child)
+
+
+def _part_text(part: dict) -> tuple[str, bool]:
+    """Decode a text part (capped). Returns (text, truncated)."""
+    data = (part.get("body") or {}).get("data", "")
+    raw = decode_b64url(data, BODY_MAX_CHARS * 4)  # utf-8: at most 4 bytes/char
+    m = _CHARSET_RE.search(_header(part, "Content-Type"))
+    charset = m.group(1) if m else "utf-8"
+    try:
+        text = raw.decode(charset, errors="replace")
+    except LookupError:
+        text = raw.decode("utf-8", errors="replace")
+    full_size = int((part.get("body") or {}).get("size", len(raw)) or 0)
+    truncated = len(text) > BODY_MAX_CHARS or full_size > len(raw)
+    return text[:BODY_MAX_CHARS], truncated
+
+
+def extract_body(payload: dict) -> tuple[str, bool]:
+    """Best text body of a payload. Returns (text, truncated); ("", False) if none."""
+    plain = html = None
+    for part in walk(payload):
+        if part.get("filename"):
+            continue  # attached .txt/.html files are attachments, not the body
+        mime = (part.get("mimeType") or "").lower()
+        if mime == "text/plain" and plain is None and (part.get("body") or {}).get("data"):
+            plain = part
+        elif mime == "text/html" and html is None and (part.get("body") or {}).get("data"):
+            html = part
+    if plain is not None:
+        text, truncated = _part_text(plain)
+        return text.strip(), truncated
+    if html is not None:
+        text, truncated = _part_text(html)
+        return html_to_text(text)[:BODY_MAX_CHARS], truncated
+    return "", False
+
+
+def save_attachments(service, msg_id: str, payload: dict) -> list[dict]:
+    """Store every attachment of a message in the blob store.
+
+    Returns [{"filename", "mime_type", "size", "sha256"}]; sha256 is "" for
+    attachments that were skipped (too large, disabled or failed).
+    """
+    out: list[dict] = []
+    for part in walk(payload):
+        filename = part.get("filename")
+        if not filename:
+            continue
+        body = part.get("body") or {}
+        entry = {
+            "filename": filename,
+            "mime_type": part.get("mimeType", "application/octet-stream"),
+            "size": int(body.get("size", 0) or 0),
+            "sha256": "",
+        }
+        out.append(entry)
+        if not ATTACHMENTS_ENABLED or entry["size"] > ATTACHMENT_MAX_BYTES:
+            continue
+        try:
+            data = body.get("data")
+            if not data and body.get("attachmentId"):
+                data = service.users().messages().attachments().get(
+                    userId="me", messageId=msg_id, id=body["attachmentId"]
+                ).execute().get("data", "")
+            if data:
+                entry["sha256"], entry["size"] = blob_store.put_stream(io.BufferedReader(B64UrlReader(data)))
+        except Exception:
+            pass
+    return out
+
+
+def render_attachments(attachments: list[dict]) -> str:
+    """Markdown list for the task file (empty string if none)."""
+    if not attachments:
+        return ""
+    lines = ["## Attachments", ""]
+    for a in attachments:
+        ref = f"sha256:{a['sha256']}" if a["sha256"] else "not downloaded"
+        lines.append(f"- {a['filename']} ({a['mime_type']}, {a['size']:,} bytes) — {ref}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,233 @@
+"""Gmail REST – minimal stdlib client for the Gmail endpoints gmail_watcher uses.
+
+Mirrors the googleapiclient call chain the watcher is written against, so
+the watcher code is the same either way:
+
+  service.users().getProfile(userId="me").execute()
+  service.users().messages().list(userId="me", ...).execute()
+  service.users().messages().get(userId="me", id=..., format=...).execute()
+  service.users().messages().attachments().get(userId="me", messageId=..., id=...).execute()
+  service.users().history().list(userId="me", startHistoryId=..., ...).execute()
+  batch = service.new_batch_http_request(callback=cb); batch.add(req, request_id=...); batch.execute()
+
+gmail_watcher.auth_gmail() uses it when GMAIL_API_BASE is set — e.g. the
+offline fake (fake_gmail_server.py), or https://gmail.googleapis.com with an
+OAuth access token in GMAIL_ACCESS_TOKEN. One persistent HTTP/1.1
+connection is reused for every call; errors raise HttpError carrying
+.resp.status like googleapiclient's.
+
+service.stats counts round trips, API calls (batch sub-requests included)
+and bytes sent / received.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import uuid
+from urllib.parse import quote, urlencode, urlsplit
+
+BATCH_PATH = "/batch/gmail/v1"
+API_PREFIX = "/gmail/v1/users"
+
+
+class _Resp:
+    def __init__(self, status: int):
+        self.status = status
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, content: bytes = b""):
+        super().__init__(f"HTTP {status}: {content[:200]!r}")
+        self.resp = _Resp(status)
+        self.content = content
+
+
+class Request:
+    """One API call; execute() sends it on its own, or add it to a batch."""
+
+    def __init__(self, service: "GmailRestService", path: str, params: dict):
+        self.service = service
+        self.path = path
+        self.params = {k: v for k, v in params.items() if v is not None}
+
+    @property
+    def uri(self) -> str:
+        query = urlencode(self.params, doseq=True)
+        return f"{self.path}?{query}" if query else self.path
+
+    def execute(self) -> dict:
+        status, body = self.service._send("GET", self.uri)
+        self.service.stats["api_calls"] += 1
+        if status >= 400:
+            raise HttpError(status, body)
+        return json.loads(body or b"{}")
+
+
+class BatchRequest:
+    """Gmail batch endpoint: many GETs in one multipart/mixed round trip."""
+
+    def __init__(self, service: "GmailRestService", callback=None):
+        self.service = service
+        self.callback = callback
+        self.items: list[tuple[str, Request, object]] = []
+
+    def add(self, request: Request, callback=None, request_id: str | None = None) -> None:
+        self.items.append((request_id or str(len(self.items) + 1), request, callback))
+
+    def execute(self) -> None:
+        if not self.items:
+            return
+        boundary = f"batch_{uuid.uuid4().hex}"
+        parts = []
+        for rid, req, _cb in self.items:
+            parts.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <{rid}>\r\n\r\nGET {req.uri} HTTP/1.1\r\n\r\n"
+            )
+        body = ("".join(parts) + f"--{boundary}--\r\n").encode("utf-8")
+        status, raw, ctype = self.service._send(
+            "POST", BATCH_PATH, body, f"multipart/mixed; boundary={boundary}", want_type=True
+        )
+        self.service.stats["api_calls"] += len(self.items)
+        if status >= 400:
+            raise HttpError(status, raw)
+        answers = parse_batch_response(raw, ctype)
+        for rid, _req, cb in self.items:
+            status, payload = answers.get(rid, (500, b""))
+            if status >= 400:
+                response, exc = None, HttpError(status, payload)
+            else:
+                response, exc = json.loads(payload or b"{}"), None
+            for fn in (cb, self.callback):
+                if fn is not None:
+                    fn(rid, response, exc)
+
+
+def parse_batch_response(raw: bytes, content_type: str) -> dict[str, tuple[int, bytes]]:
+    """Split a multipart/mixed batch response into {request_id: (status, body)}."""
+    marker = "boundary="
+    idx = content_type.find(marker)
+    if idx == -1:
+        return {}
+    boundary = content_type[idx + len(marker):].split(";")[0].strip().strip('"').encode()
+    out: dict[str, tuple[int, bytes]] = {}
+    for part in raw.split(b"--" + boundary):
+        part = part.strip(b"\r\n")
+        if not part or part == b"--":
+            continue
+        head, _, http_msg = part.partition(b"\r\n\r\n")
+        rid = ""
+        for line in head.split(b"\r\n"):
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-id":
+                rid = value.strip().strip("<>")
+                if rid.startswith("response-"):
+                    rid = rid[len("response-"):]
+        status_line, _, rest = http_msg.partition(b"\r\n")
+        _headers, _, body = rest.partition(b"\r\n\r\n")
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            status = 500
+        out[rid] = (status, body.strip(b"\r\n"))
+    return out
+
+
+class _Attachments:
+    def __init__(self, service):
+        self.service = service
+
+    def get(self, userId: str, messageId: str, id: str) -> Request:
+        return Request(
+            self.service,
+            f"{API_PREFIX}/{quote(userId)}/messages/{quote(messageId)}/attachments/{quote(id)}",
+            {},
+        )
+
+
+class _Messages:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId: str, **params) -> Request:
+        return Request(self.service, f"{API_PREFIX}/{quote(userId)}/messages", params)
+
+    def get(self, userId: str, id: str, **params) -> Request:
+        return Request(self.service, f"{API_PREFIX}/{quote(userId)}/messages/{quote(id)}", params)
+
+    def attachments(self) -> _Attachments:
+        return _Attachments(self.service)
+
+
+class _History:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, userId: str, **params) -> Request:
+        return Request(self.service, f"{API_PREFIX}/{quote(userId)}/history", params)
+
+
+class _Users:
+    def __init__(self, service):
+        self.service = service
+
+    def messages(self) -> _Messages:
+        return _Messages(self.service)
+
+    def history(self) -> _History:
+        return _History(self.service)
+
+    def getProfile(self, userId: str) -> Request:
+        return Request(self.service, f"{API_PREFIX}/{quote(userId)}/profile", {})
+
+
+class GmailRestService:
+    def __init__(self, base_url: str, access_token: str = "", timeout: float = 60.0):
+        parts = urlsplit(base_url.rstrip("/"))
+        self.scheme, self.host = parts.scheme or "http", parts.netloc
+        self.prefix = parts.path
+        self.token = access_token
+        self.timeout = timeout
+        self._conn: http.client.HTTPConnection | None = None
+        self.stats = {"round_trips": 0, "api_calls": 0, "bytes_sent": 0, "bytes_received": 0}
+
+    def users(self) -> _Users:
+        return _Users(self)
+
+    def new_batch_http_request(self, callback=None) -> BatchRequest:
+        return BatchRequest(self, callback)
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self._conn = cls(self.host, timeout=self.timeout)
+        return self._conn
+
+    def _send(self, method: str, path: str, body: bytes | None = None,
+              content_type: str = "", want_type: bool = False):
+        headers = {"Accept-Encoding": "identity"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        if content_type:
+            headers["Content-Type"] = content_type
+        for attempt in (1, 2):
+            try:
+                conn = self._connection()
+                conn.request(method, self.prefix + path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # Stale keep-alive connection: reconnect once
+                if self._conn is not None:
+                    self._conn.close()
+                self._conn = None
+                if attempt == 2:
+                    raise
+        self.stats["round_trips"] += 1
+        self.stats["bytes_sent"] += len(body or b"") + len(path)
+        self.stats["bytes_received"] += len(data)
+        if want_type:
+            return resp.status, data, resp.getheader("Content-Type", "")
+        return resp.status, data
@@ -4,17 +4,77 @@ Gmail Watcher – ingests unread inbox emails into Inbox/ as task files.
 CLOUD MODE:
   - Always runs (no GMAIL_OAUTH_ENABLED guard).
   - Exits cleanly if credentials missing.
+
+INCREMENTAL SYNC:
+  - First run (or no checkpoint): full sync — every unread INBOX message
+    (GMAIL_QUERY, default "is:unread"), paginated GMAIL_PAGE_SIZE (default
+    500) at a time, bounded by GMAIL_RESYNC_MAX (default 2000).
+  - The mailbox historyId is checkpointed in Logs/gmail_sync.json. Later
+    runs call users.history.list from the checkpoint and only see messages
+    added since, however many there are.
+  - An expired checkpoint (history.list answers 404) falls back to a
+    bounded full resync; duplicates are still skipped by message id.
+  - The checkpoint only advances after a run whose writes all succeeded.
+
+BATCHED, METADATA-FIRST FETCH:
+  - Messages are fetched through the Gmail batch endpoint, GMAIL_BATCH_SIZE
+    (default 100, the API maximum) requests per round trip.
+  - Pass 1 fetches format=metadata with only From/Subject/Date; the domain
+    allowlist and the duplicate check run on that.
+  - Pass 2 fetches format=full only for the messages that survive.
+  - Sub-requests that fail (e.g. 429 rate limit) are retried once in a
+    smaller batch after a short pause; messages still failing are counted
+    as errors and the checkpoint is held back so they are seen next run.
+
+DUPLICATE CHECK:
+  - Ingested message ids are appended to Logs/gmail_seen_ids.txt and
+    loaded once per run into a set, so the check is O(1) per message
+    instead of a folder scan. The first run without the file backfills it
+    from existing email_* filenames in every workflow folder (sharded and
+    archived Done/ included).
+
+FULL BODY:
+  - Task files carry the decoded message body (text/plain preferred, HTML
+    converted to text, capped at GMAIL_BODY_MAX_CHARS) instead of the
+    snippet; attachments are stored in Blobs/ and referenced by sha256 and
+    size (gmail_mime.py).
+
+THREAD COALESCING:
+  - Messages are grouped by threadId: one task per thread per run, replies
+    appended in date order.
+  - Logs/gmail_threads.json maps each thread to its task. A later reply to
+    a thread whose task is still unprocessed (Inbox/ or Needs_Action/) is
+    appended to that task; if the task is awaiting approval, the whole
+    thread is re-queued into Inbox/ under the same name so the agent
+    refreshes its plan and summary. Only closed threads (approved / done)
+    start a new task. Threads idle for GMAIL_THREAD_TTL_DAYS (default 30)
+    are forgotten.
+
+OFFLINE / BENCHMARK:
+  - GMAIL_API_BASE=http://127.0.0.1:8790 talks to that base URL through
+    the stdlib client in gmail_rest.py instead of googleapiclient + OAuth
+    (bearer token from GMAIL_ACCESS_TOKEN, if set). fake_gmail_server.py
+    serves a synthetic mailbox there; bench_gmail.py measures throughput.
 """
 
 from __future__ import annotations
 
 import json
+import os
 import re
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent
+import gmail_mime
+import mcp_blob_store as blob_store
+from mcp_file_ops import archive_manifest, read_located, strip_front_matter, write_many
+from mcp_vault import INSTALL_DIR, VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 INBOX = BASE_DIR / "Inbox"
+NEEDS_ACTION = BASE_DIR / "Needs_Action"
+PENDING_APPROVAL = BASE_DIR / "Pending_Approval"
 DONE = BASE_DIR / "Done"
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
@@ -30,6 +90,26 @@ ALLOWED_DOMAINS = {
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 MARK_AS_READ = False
 
+API_BASE = os.getenv("GMAIL_API_BASE", "").strip()
+
+SYNC_FILE = LOGS_DIR / "gmail_sync.json"
+LIST_QUERY = os.getenv("GMAIL_QUERY", "is:unread")
+PAGE_SIZE = max(1, min(500, int(os.getenv("GMAIL_PAGE_SIZE", "500"))))
+RESYNC_MAX = int(os.getenv("GMAIL_RESYNC_MAX", "2000"))
+BATCH_SIZE = max(1, min(100, int(os.getenv("GMAIL_BATCH_SIZE", "100"))))
+METADATA_HEADERS = ["From", "Subject", "Date"]
+RETRY_PAUSE_SECONDS = 1.0
+
+SEEN_FILE = LOGS_DIR / "gmail_seen_ids.txt"
+# email_<YYYYMMDD_HHMMSS>_<msg_id>[_n].md, also as _source_ / derived names
+_EMAIL_NAME_RE = re.compile(r"email_\d{8}_\d{6}_([0-9A-Za-z]+)(?:_\d+)?(?:_Plan)?\.md$")
+SEEN_SCAN_FOLDERS = ["Inbox", "Needs_Action", "Pending_Approval", "Approved", "Done", "Plans"]
+
+_seen_ids: set[str] | None = None
+
+THREADS_FILE = LOGS_DIR / "gmail_threads.json"
+THREAD_TTL_DAYS = int(os.getenv("GMAIL_THREAD_TTL_DAYS", "30"))
+
 
 # ---------------------------------------------------------------------------
 
@@ -79,13 +159,62 @@ def get_header(headers: list[dict], name: str) -> str:
     return ""
 
 
+def _backfill_seen_ids() -> set[str]:
+    """Build the seen-id set from existing email_* filenames (one-time)."""
+    ids: set[str] = set()
+    names: list[str] = list(archive_manifest(DONE))
+    for folder in SEEN_SCAN_FOLDERS:
+        path = BASE_DIR / folder
+        if path.is_dir():
+            # rglob: Done/ and Plans/ may be date-sharded (YYYY/MM/DD/...)
+            names.extend(f.name for f in path.rglob("*email_*.md"))
+    for name in names:
+        m = _EMAIL_NAME_RE.search(name)
+        if m:
+            ids.add(m.group(1))
+    return ids
+
+
+def load_seen_ids() -> set[str]:
+    """Seen message ids, loaded once per process (backfilled on first use)."""
+    global _seen_ids
+    if _seen_ids is None:
+        try:
+            with open(SEEN_FILE, "r", encoding="utf-8") as f:
+                _seen_ids = {line.strip() for line in f if line.strip()}
+        except FileNotFoundError:
+            _seen_ids = _backfill_seen_ids()
+            try:
+                SEEN_FILE.parent.mkdir(parents=True, exist_ok=True)
+                tmp = SEEN_FILE.with_suffix(f".{os.getpid()}.tmp")
+                tmp.write_text("".join(f"{i}\n" for i in sorted(_seen_ids)), encoding="utf-8")
+                os.replace(tmp, SEEN_FILE)
+            except Exception:
+                pass
+            log_event("gmail_seen_backfill", {"ids": len(_seen_ids)})
+        except Exception:
+            _seen_ids = _backfill_seen_ids()
+    return _seen_ids
+
+
+def mark_seen(msg_ids: list[str]) -> None:
+    """Record ingested message ids (in memory and appended to SEEN_FILE)."""
+    seen = load_seen_ids()
+    new = [i for i in msg_ids if i not in seen]
+    if not new:
+        return
+    seen.update(new)
+    try:
+        with open(SEEN_FILE, "a", encoding="utf-8") as f:
+            f.write("".join(f"{i}\n" for i in new))
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        pass
+
+
 def file_exists_for_id(msg_id: str) -> bool:
-    suffix = f"_{msg_id}.md"
-    for folder in [INBOX, DONE]:
-        if folder.is_dir():
-            if any(f.name.endswith(suffix) for f in folder.glob("*.md")):
-                return True
-    return False
+    return msg_id in load_seen_ids()
 
 
 # ---------------------------------------------------------------------------
@@ -93,6 +222,11 @@ def file_exists_for_id(msg_id: str) -> bool:
 # ---------------------------------------------------------------------------
 
 def auth_gmail():
+    if API_BASE:
+        # Fake server (fake_gmail_server.py) or a pre-issued OAuth access token
+        from gmail_rest import GmailRestService
+        return GmailRestService(API_BASE, os.getenv("GMAIL_ACCESS_TOKEN", ""))
+
     try:
         from google.auth.transport.requests import Request
         from google.oauth2.credentials import Credentials
@@ -103,8 +237,12 @@ def auth_gmail():
         raise SystemExit(1)
 
     creds = None
+    # token.json is per vault (one mailbox each); the OAuth client
+    # credentials.json may be shared from the install directory.
     token_path = BASE_DIR / "token.json"
     creds_path = BASE_DIR / "credentials.json"
+    if not creds_path.exists():
+        creds_path = INSTALL_DIR / "credentials.json"
 
     if token_path.exists():
         creds = Credentials.from_authorized_user_file(str(token_path), SCOPES)
@@ -126,12 +264,276 @@ def auth_gmail():
 
 
 # ---------------------------------------------------------------------------
-# Main
+# Sync (full list or history since the checkpoint)
 # ---------------------------------------------------------------------------
 
-def main() -> None:
-    print("=== Gmail Watcher Running ===")
+def load_sync_state() -> dict:
+    try:
+        return json.loads(SYNC_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
 
+
+def save_sync_state(history_id: str, mode: str) -> None:
+    if not history_id:
+        return
+    try:
+        SYNC_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = SYNC_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(
+            json.dumps({"history_id": history_id, "mode": mode, "updated": utc_ts()}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp, SYNC_FILE)
+    except Exception:
+        pass
+
+
+def _http_status(exc: Exception) -> int | None:
+    """HTTP status of a googleapiclient HttpError (or anything with .resp.status)."""
+    status = getattr(getattr(exc, "resp", None), "status", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def full_sync(service) -> tuple[list[str], str]:
+    """List up to RESYNC_MAX matching INBOX message ids. Returns (ids, history_id).
+
+    The historyId is read before listing, so a message arriving mid-list is
+    seen again by the next incremental run rather than missed.
+    """
+    profile = service.users().getProfile(userId="me").execute()
+    history_id = str(profile.get("historyId", ""))
+    ids: list[str] = []
+    token = None
+    while len(ids) < RESYNC_MAX:
+        kwargs = {
+            "userId": "me",
+            "labelIds": ["INBOX"],
+            "q": LIST_QUERY,
+            "maxResults": min(PAGE_SIZE, RESYNC_MAX - len(ids)),
+        }
+        if token:
+            kwargs["pageToken"] = token
+        resp = service.users().messages().list(**kwargs).execute()
+        ids.extend(m["id"] for m in resp.get("messages", []))
+        token = resp.get("nextPageToken")
+        if not token:
+            break
+    return ids, history_id
+
+
+def incremental_sync(service, start_history_id: str) -> tuple[list[str], str]:
+    """Message ids added to INBOX since start_history_id. Returns (ids, new history_id)."""
+    ids: list[str] = []
+    seen: set[str] = set()
+    latest = start_history_id
+    want_unread = "is:unread" in LIST_QUERY
+    token = None
+    while True:
+        kwargs = {
+            "userId": "me",
+            "startHistoryId": start_history_id,
+            "historyTypes": ["messageAdded"],
+            "labelId": "INBOX",
+            "maxResults": PAGE_SIZE,
+        }
+        if token:
+            kwargs["pageToken"] = token
+        resp = service.users().history().list(**kwargs).execute()
+        for record in resp.get("history", []):
+            for added in record.get("messagesAdded", []):
+                msg = added.get("message", {})
+                labels = set(msg.get("labelIds") or ())
+                if labels and ("INBOX" not in labels or (want_unread and "UNREAD" not in labels)):
+                    continue
+                if msg.get("id") and msg["id"] not in seen:
+                    seen.add(msg["id"])
+                    ids.append(msg["id"])
+        latest = str(resp.get("historyId", latest))
+        token = resp.get("nextPageToken")
+        if not token:
+            break
+    return ids, latest
+
+
+def changed_message_ids(service) -> tuple[list[str], str, str]:
+    """Ids to consider this run. Returns (ids, history_id, mode: incremental|full|resync)."""
+    checkpoint = load_sync_state().get("history_id", "")
+    if checkpoint:
+        try:
+            ids, history_id = incremental_sync(service, checkpoint)
+            return ids, history_id, "incremental"
+        except Exception as exc:
+            if _http_status(exc) != 404:
+                raise
+            # Checkpoint too old for the history API: bounded full resync
+            append_log(f"{utc_ts()} - Gmail: history_expired | from={checkpoint} | resync\n")
+            log_event("gmail_history_expired", {"history_id": checkpoint})
+            ids, history_id = full_sync(service)
+            return ids, history_id, "resync"
+    ids, history_id = full_sync(service)
+    return ids, history_id, "full"
+
+
+# ---------------------------------------------------------------------------
+# Batched fetch
+# ---------------------------------------------------------------------------
+
+def batch_get(
+    service,
+    ids: list[str],
+    fmt: str,
+    headers: list[str] | None = None,
+    counters: dict | None = None,
+) -> tuple[dict[str, dict], list[str]]:
+    """messages.get for every id through the batch endpoint.
+
+    Returns ({id: message}, failed_ids). counters["round_trips"] is
+    incremented per batch request sent.
+    """
+    found: dict[str, dict] = {}
+    failed: list[str] = []
+
+    def callback(request_id, response, exception):
+        if exception is None:
+            found[request_id] = response
+        else:
+            failed.append(request_id)
+
+    def run(chunk_ids: list[str], size: int) -> None:
+        for i in range(0, len(chunk_ids), size):
+            batch = service.new_batch_http_request(callback=callback)
+            for msg_id in chunk_ids[i:i + size]:
+                kwargs = {"userId": "me", "id": msg_id, "format": fmt}
+                if headers:
+                    kwargs["metadataHeaders"] = headers
+                batch.add(service.users().messages().get(**kwargs), request_id=msg_id)
+            if counters is not None:
+                counters["round_trips"] = counters.get("round_trips", 0) + 1
+            try:
+                batch.execute()
+            except Exception:
+                # The whole round trip failed: every id in it not yet answered
+                failed.extend(m for m in chunk_ids[i:i + size] if m not in found and m not in failed)
+
+    run(ids, BATCH_SIZE)
+    if failed:
+        retry, failed[:] = list(failed), []
+        time.sleep(RETRY_PAUSE_SECONDS)
+        run(retry, max(1, BATCH_SIZE // 4))
+    return found, failed
+
+
+# ---------------------------------------------------------------------------
+# Rendering and thread coalescing
+# ---------------------------------------------------------------------------
+
+def render_message(service, detail: dict) -> dict:
+    """Headers, body text and attachment list of one full message."""
+    payload = detail.get("payload", {})
+    headers = payload.get("headers", [])
+    body, truncated = gmail_mime.extract_body(payload)
+    if not body:
+        body = detail.get("snippet", "")
+    elif truncated:
+        body += f"\n\n*(truncated at {gmail_mime.BODY_MAX_CHARS} characters)*"
+    return {
+        "sender": get_header(headers, "From"),
+        "subject": get_header(headers, "Subject"),
+        "date": get_header(headers, "Date"),
+        "body": body,
+        "attachments": gmail_mime.render_attachments(
+            gmail_mime.save_attachments(service, detail["id"], payload)
+        ),
+    }
+
+
+def task_content(m: dict, thread_id: str, count: int) -> str:
+    return (
+        "# Email Task\n\n"
+        f"From: {m['sender']}\n"
+        f"Subject: {m['subject']}\n"
+        f"Date: {m['date']}\n"
+        f"Thread: {thread_id}\n\n"
+        "## Body\n\n"
+        f"{m['body']}\n\n"
+        f"{m['attachments']}"
+        "Source: Gmail\n"
+        f"Allowed Domain: {extract_domain(m['sender'])}\n"
+        "Status: New\n"
+    )
+
+
+def reply_section(m: dict) -> str:
+    return (
+        f"\n## Reply — {m['sender']} ({m['date']})\n\n"
+        f"{m['body']}\n\n"
+        f"{m['attachments']}"
+    )
+
+
+def load_threads() -> dict:
+    try:
+        return json.loads(THREADS_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def save_threads(threads: dict) -> None:
+    """Persist the thread map, dropping threads idle for GMAIL_THREAD_TTL_DAYS."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=THREAD_TTL_DAYS)).strftime("%Y-%m-%d %H:%M:%SZ")
+    threads = {k: v for k, v in threads.items() if v.get("updated", "") >= cutoff}
+    try:
+        THREADS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = THREADS_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(threads, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, THREADS_FILE)
+    except Exception:
+        pass
+
+
+def _replace_text(path: Path, text: str) -> bool:
+    try:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        return True
+    except Exception:
+        return False
+
+
+def merge_into_task(task: str, rendered: list[dict]) -> str:
+    """Fold replies into the thread's existing task if it is still open.
+
+    Returns "merged" (appended to the unprocessed task in Inbox/ or
+    Needs_Action/), "requeued" (the task awaits approval: the whole thread
+    goes back to Inbox/ under the same name so the agent refreshes its
+    plan and summary), or "" (thread closed — caller starts a new task).
+    """
+    replies = "".join(reply_section(r) for r in rendered)
+    for folder in (INBOX, NEEDS_ACTION):
+        path = folder / task
+        if path.exists():
+            current = path.read_text(encoding="utf-8", errors="ignore")
+            return "merged" if _replace_text(path, current.rstrip("\n") + "\n" + replies) else ""
+    if (PENDING_APPROVAL / task).exists():
+        original = strip_front_matter(read_located(DONE, f"_source_{task}"))
+        original = blob_store.render(original).strip()
+        if original and _replace_text(INBOX / task, original + "\n" + replies):
+            return "requeued"
+    return ""
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def ingest() -> dict:
+    """Fetch new unread Gmail messages into Inbox/. Returns {"ingested", "bytes", "errors"}."""
+    stats = {"ingested": 0, "bytes": 0, "errors": 0}
     INBOX.mkdir(parents=True, exist_ok=True)
     DONE.mkdir(parents=True, exist_ok=True)
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
@@ -144,69 +546,112 @@ def main() -> None:
     except Exception:
         append_log(f"{utc_ts()} - Gmail: auth_failed\n")
         log_event("gmail_auth_failed", {})
-        return
-
-    results = service.users().messages().list(
-        userId="me",
-        labelIds=["INBOX"],
-        q="is:unread",
-        maxResults=10,
-    ).execute()
-
-    messages = results.get("messages", [])
-
-    if not messages:
-        append_log(f"{utc_ts()} - Gmail: no_unread\n")
-        log_event("gmail_no_unread", {})
-        return
-
-    ingested = 0
-
-    for msg in messages:
-        msg_id = msg["id"]
+        stats["errors"] += 1
+        return stats
 
-        detail = service.users().messages().get(
-            userId="me", id=msg_id, format="full"
-        ).execute()
-
-        headers = detail.get("payload", {}).get("headers", [])
-        sender = get_header(headers, "From")
-        subject = get_header(headers, "Subject")
-        date = get_header(headers, "Date")
-        snippet = detail.get("snippet", "")
-
-        if not domain_allowed(sender):
+    try:
+        message_ids, history_id, mode = changed_message_ids(service)
+    except Exception as exc:
+        append_log(f"{utc_ts()} - Gmail: sync_failed | {exc!r}\n")
+        log_event("gmail_sync_failed", {"error": repr(exc)})
+        stats["errors"] += 1
+        return stats
+    log_event("gmail_sync", {"mode": mode, "messages": len(message_ids), "history_id": history_id})
+
+    if not message_ids:
+        append_log(f"{utc_ts()} - Gmail: no_unread | sync={mode}\n")
+        log_event("gmail_no_unread", {"mode": mode})
+        save_sync_state(history_id, mode)
+        return stats
+
+    # Pass 1: headers only, then filter; pass 2: full payloads for survivors
+    counters = {"round_trips": 0}
+    meta, failed = batch_get(service, message_ids, "metadata", METADATA_HEADERS, counters)
+    survivors = []
+    for msg_id in message_ids:
+        if msg_id not in meta:
             continue
-
-        if file_exists_for_id(msg_id):
+        sender = get_header(meta[msg_id].get("payload", {}).get("headers", []), "From")
+        if domain_allowed(sender) and not file_exists_for_id(msg_id):
+            survivors.append(msg_id)
+    details, failed_full = batch_get(service, survivors, "full", counters=counters)
+    failed += failed_full
+    stats["errors"] += len(failed)
+    log_event("gmail_fetch", {
+        "listed": len(message_ids), "metadata": len(meta), "full": len(details),
+        "failed": len(failed), "round_trips": counters["round_trips"],
+    })
+
+    # Messages of one thread become one task (oldest first)
+    groups: dict[str, list[dict]] = {}
+    for msg_id in survivors:
+        detail = details.get(msg_id)
+        if detail is not None:
+            groups.setdefault(detail.get("threadId") or msg_id, []).append(detail)
+
+    threads = load_threads()
+    batch: list[tuple[str, str]] = []
+    batch_meta: list[tuple[str, list[str], str]] = []  # (thread id, message ids, sender)
+    merged = requeued = 0
+
+    for thread_id, msgs in groups.items():
+        msgs.sort(key=lambda d: int(d.get("internalDate", 0) or 0))
+        rendered = [render_message(service, d) for d in msgs]
+        ids = [d["id"] for d in msgs]
+
+        entry = threads.get(thread_id)
+        how = merge_into_task(entry["task"], rendered) if entry else ""
+        if how:
+            entry["messages"] = entry.get("messages", []) + ids
+            entry["updated"] = utc_ts()
+            mark_seen(ids)
+            if how == "merged":
+                merged += len(ids)
+            else:
+                requeued += 1
+            append_log(f"{utc_ts()} - Gmail: thread_{how} | {entry['task']} | +{len(ids)} message(s)\n")
+            log_event(f"gmail_thread_{how}", {"file": entry["task"], "thread": thread_id, "messages": len(ids)})
             continue
 
-        filename = f"email_{utc_file_ts()}_{msg_id}.md"
-
-        content = (
-            "# Email Task\n\n"
-            f"From: {sender}\n"
-            f"Subject: {subject}\n"
-            f"Date: {date}\n\n"
-            "## Snippet\n\n"
-            f"{snippet}\n\n"
-            "Source: Gmail\n"
-            f"Allowed Domain: {extract_domain(sender)}\n"
-            "Status: New\n"
-        )
-
-        (INBOX / filename).write_text(content, encoding="utf-8")
-
+        first = rendered[0]
+        filename = f"email_{utc_file_ts()}_{ids[0]}.md"
+        content = task_content(first, thread_id, len(ids)) + "".join(reply_section(r) for r in rendered[1:])
+        batch.append((filename, content))
+        batch_meta.append((thread_id, ids, first["sender"]))
+
+    # One batched write for the whole poll (temp file + rename per message)
+    written = write_many(INBOX, batch)
+    for filename, (thread_id, ids, sender) in zip(written, batch_meta):
+        mark_seen(ids)
+        threads[thread_id] = {"task": filename, "messages": ids, "updated": utc_ts()}
         append_log(
-            f"{utc_ts()} - Gmail: ingested | {filename} | from={sender}\n"
+            f"{utc_ts()} - Gmail: ingested | {filename} | from={sender} | messages={len(ids)}\n"
         )
-        log_event("gmail_ingested", {"file": filename})
-        ingested += 1
+        log_event("gmail_ingested", {"file": filename, "thread": thread_id, "messages": len(ids)})
+    save_threads(threads)
+    ingested = len(written)
+    stats["ingested"] = ingested + requeued
+    stats["bytes"] = sum(len(c.encode("utf-8")) for _, c in batch[:ingested])
+    if ingested < len(batch):
+        stats["errors"] += 1
+    elif not failed:
+        save_sync_state(history_id, mode)
+
+    append_log(
+        f"{utc_ts()} - Gmail: done | ingested={ingested} | merged={merged} | requeued={requeued}"
+        f" | sync={mode} | seen={len(message_ids)} | full={len(details)}"
+        f" | round_trips={counters['round_trips']} | failed={len(failed)}\n"
+    )
+    log_event("gmail_watcher_done", {"ingested": ingested, "merged": merged,
+                                     "requeued": requeued, "mode": mode})
+
+    return stats
 
-    append_log(f"{utc_ts()} - Gmail: done | ingested={ingested}\n")
-    log_event("gmail_watcher_done", {"ingested": ingested})
 
-    print(f"=== Gmail Watcher Done ({ingested} ingested) ===")
+def main() -> None:
+    print("=== Gmail Watcher Running ===")
+    stats = ingest()
+    print(f"=== Gmail Watcher Done ({stats['ingested']} ingested) ===")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+"""Ingest Runner – runs every ingestion source concurrently, with per-channel metrics.
+
+The watchers used to run one after another, so a slow Gmail poll held up the
+local file channels. The runner starts each source's ingest() on its own
+thread, a few at a time, and waits for all of them, bounded by a per-source
+timeout:
+
+  inbox      watcher_inbox.ingest       Inbox/ -> Needs_Action/
+  manual     watcher_manual.ingest      manual_input.txt -> Needs_Action/
+  whatsapp   whatsapp_watcher.ingest    whatsapp_input.txt -> Needs_Action/
+  linkedin   linkedin_watcher.ingest    linkedin_input.txt -> Needs_Action/
+  gmail      gmail_watcher.ingest       Gmail -> Inbox/  (only if GMAIL_OAUTH_ENABLED=true)
+
+Gmail writes to Inbox/, so if it ingested anything the inbox source runs once
+more afterwards — the same order a sequential cron pass had.
+
+Every run records, per channel: ingested, bytes, duration_ms, errors,
+timed_out and failed (the source raised, exited nonzero or timed out). They are logged as one "ingest_metrics" event per channel, one
+summary line in run_log.md and a table on stdout, followed by the
+Needs_Action/ backlog gauges (mcp_backpressure.emit_gauges).
+
+Behaviour:
+  - INGEST_CONCURRENCY (default 4) sources run at once; the others wait
+    for a free slot.
+  - INGEST_TIMEOUT_SECONDS (default 120) bounds each source, counted from
+    the moment it starts (time spent waiting for a slot does not count).
+    A source that overruns is reported as timed_out and its slot is freed.
+    Sources run on daemon threads, so a hung one (e.g. a stuck Gmail call)
+    is abandoned and never keeps the process alive after the runner
+    returns; file writes are atomic and checkpointed, so nothing is
+    half-done.
+  - Sources never take the runner down: exceptions and SystemExit count as
+    errors for that channel.
+
+Usage:
+  python ingest_runner.py
+  python ingest_runner.py --only manual,whatsapp
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import mcp_backpressure as backpressure
+from mcp_file_ops import append_file, log_event
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+LOGS_DIR = BASE_DIR / "Logs"
+RUN_LOG = BASE_DIR / "run_log.md"
+
+CONCURRENCY = max(1, int(os.getenv("INGEST_CONCURRENCY", "4")))
+TIMEOUT_SECONDS = float(os.getenv("INGEST_TIMEOUT_SECONDS", "120"))
+GMAIL_ENABLED = os.getenv("GMAIL_OAUTH_ENABLED", "false").strip().lower() == "true"
+
+# channel -> module exposing ingest() -> {"ingested", "bytes", "errors"}
+SOURCES = {
+    "gmail": "gmail_watcher",
+    "inbox": "watcher_inbox",
+    "manual": "watcher_manual",
+    "whatsapp": "whatsapp_watcher",
+    "linkedin": "linkedin_watcher",
+}
+
+
+def utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def enabled_sources() -> list[str]:
+    return [name for name in SOURCES if name != "gmail" or GMAIL_ENABLED]
+
+
+def is_failure(exc: BaseException) -> bool:
+    """False only for sys.exit() / sys.exit(0), which is a clean stop."""
+    return not (isinstance(exc, SystemExit) and exc.code in (None, 0))
+
+
+def _run_source(channel: str) -> dict:
+    """Run one source's ingest() and time it. Never raises."""
+    started = time.monotonic()
+    metrics = {"ingested": 0, "bytes": 0, "errors": 0}
+    failed = False
+    try:
+        result = importlib.import_module(SOURCES[channel]).ingest() or {}
+        for key in metrics:
+            metrics[key] = int(result.get(key, 0))
+    except (Exception, SystemExit) as exc:
+        # Source scripts may sys.exit() on config errors; count it, move on.
+        if is_failure(exc):
+            failed = True
+            metrics["errors"] += 1
+            append_file(RUN_LOG, f"{utc_ts()} - Ingest_Runner: source_error | {channel} | {exc!r}\n")
+    metrics["duration_ms"] = int((time.monotonic() - started) * 1000)
+    metrics["failed"] = failed
+    return metrics
+
+
+def _run_batch(channels: list[str]) -> dict[str, dict]:
+    """Run channels CONCURRENCY at a time, each bounded by TIMEOUT_SECONDS from its start."""
+    results: dict[str, dict] = {}
+    waiting = list(channels)
+    running: dict[str, float] = {}  # channel -> deadline
+    finished: "queue.Queue[tuple[str, dict]]" = queue.Queue()
+    while waiting or running:
+        while waiting and len(running) < CONCURRENCY:
+            channel = waiting.pop(0)
+            running[channel] = time.monotonic() + TIMEOUT_SECONDS
+            threading.Thread(
+                target=lambda ch=channel: finished.put((ch, _run_source(ch))),
+                name=f"ingest-{channel}", daemon=True,
+            ).start()
+        try:
+            channel, metrics = finished.get(timeout=max(0.0, min(running.values()) - time.monotonic()))
+            if running.pop(channel, None) is not None:  # ignore a source that already timed out
+                results[channel] = {**metrics, "timed_out": False}
+        except queue.Empty:
+            now = time.monotonic()
+            for channel, deadline in list(running.items()):
+                if deadline <= now:
+                    del running[channel]
+                    append_file(RUN_LOG, f"{utc_ts()} - Ingest_Runner: source_timeout | {channel} "
+                                         f"| {TIMEOUT_SECONDS:g}s\n")
+                    results[channel] = {
+                        "ingested": 0, "bytes": 0, "errors": 1,
+                        "duration_ms": int(TIMEOUT_SECONDS * 1000), "timed_out": True, "failed": True,
+                    }
+    return results
+
+
+def run_all(channels: list[str] | None = None) -> dict[str, dict]:
+    """Run the given sources (default: all enabled) concurrently.
+
+    Returns {channel: {"ingested", "bytes", "duration_ms", "errors", "timed_out", "failed"}}.
+    """
+    channels = channels or enabled_sources()
+    results = _run_batch(channels)
+
+    # Gmail feeds Inbox/: give the inbox source one more pass if it grew.
+    if results.get("gmail", {}).get("ingested") and "inbox" in channels:
+        extra = _run_batch(["inbox"])["inbox"]
+        inbox = results.setdefault("inbox", {"timed_out": False, "failed": False})
+        for key in ("ingested", "bytes", "errors", "duration_ms"):
+            inbox[key] = inbox.get(key, 0) + extra[key]
+        inbox["timed_out"] = inbox["timed_out"] or extra["timed_out"]
+        inbox["failed"] = inbox["failed"] or extra["failed"]
+
+    results = {ch: results[ch] for ch in channels if ch in results}
+    for channel in results:
+        log_event(LOGS_DIR, "ingest_metrics", {"channel": channel, **results[channel]})
+    totals = {
+        key: sum(m.get(key, 0) for m in results.values())
+        for key in ("ingested", "bytes", "errors")
+    }
+    summary = " | ".join(
+        f"{ch}={m['ingested']}/{m['bytes']}B/{m['duration_ms']}ms"
+        + (f"/err={m['errors']}" if m["errors"] else "")
+        + ("/TIMEOUT" if m["timed_out"] else "")
+        for ch, m in results.items()
+    )
+    append_file(RUN_LOG, f"{utc_ts()} - Ingest_Runner: done | {summary}\n")
+    log_event(LOGS_DIR, "ingest_runner_done", {**totals, "channels": len(results)})
+    backpressure.emit_gauges()
+    return results
+
+
+def print_table(results: dict[str, dict]) -> None:
+    print(f"  {'channel':<10} {'ingested':>8} {'bytes':>10} {'ms':>8} {'errors':>6}")
+    for ch, m in results.items():
+        flag = "  (timed out)" if m["timed_out"] else ""
+        print(
+            f"  {ch:<10} {m['ingested']:>8} {m['bytes']:>10} "
+            f"{m['duration_ms']:>8} {m['errors']:>6}{flag}"
+        )
+
+
+def main() -> None:
+    channels = None
+    if "--only" in sys.argv[1:]:
+        idx = sys.argv.index("--only")
+        if idx + 1 < len(sys.argv):
+            channels = [c.strip() for c in sys.argv[idx + 1].split(",") if c.strip() in SOURCES]
+
+    print(f"=== Ingest Runner Running (concurrency={CONCURRENCY}, timeout={TIMEOUT_SECONDS:g}s) ===")
+    results = run_all(channels)
+    print("=== Ingest Runner Done ===")
+    print_table(results)
+    print("  Backlog (Needs_Action/):")
+    backpressure.print_gauges(backpressure.gauges())
+
+
+if __name__ == "__main__":
+    main()
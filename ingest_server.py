@@ -0,0 +1,442 @@
+"""Ingest Server – local HTTP / Unix-socket endpoint that writes tasks into Needs_Action/.
+
+Cron-driven watchers add up to one schedule interval of latency before the
+agent sees a task. This server accepts task payloads directly and commits
+them within milliseconds.
+
+Endpoints:
+  POST /ingest     JSON  {"channel": "whatsapp", "sender": "...", "text": "...",
+                          "subject": "...", "process": false}
+                   or raw text body with ?channel=...&sender=... (or the
+                   X-Channel / X-Sender headers)
+                   -> 202 {"task_id": "wa_20260220_101500_000001.md", "channel": "whatsapp"}
+  GET  /health     -> 200 {"ok": true, "pending": n, "stats": {...}}
+
+Behaviour:
+  - Group commit: accepted payloads are queued and written together by one
+    committer (mcp_file_ops.write_many) every INGEST_COMMIT_MS (default 10)
+    or as soon as INGEST_COMMIT_BATCH (default 256) are waiting. A response
+    is sent only after its file has been renamed into place, and carries
+    its task id.
+  - One run_log line and one "ingest_server_batch" event per batch, not per
+    request, so logging never becomes the bottleneck.
+  - Validation: channel must be one of CHANNEL_PREFIXES, text is required,
+    bodies over INGEST_MAX_BYTES (default 64 KiB) get 413.
+  - Backpressure (mcp_backpressure.py): payloads over the Needs_Action/
+    watermark are rejected with 503 + Retry-After instead of written.
+  - Pre-triage rules (mcp_triage.py) run before admission: a dropped or
+    archived payload gets 200 {"task_id": null, "triaged": true} and does
+    not count against the watermark. Rule hit counts are flushed at most
+    every 5 seconds and on shutdown.
+  - "process": true (or ?process=1, or INGEST_TRIGGER_AGENT=true) schedules
+    an agent.py pass after the batch commits. Passes are coalesced: at most
+    one runs at a time, plus one queued.
+  - Binds 127.0.0.1 only. If INGEST_TOKEN is set, requests must send
+    "Authorization: Bearer <token>".
+  - Pure asyncio with a minimal HTTP/1.1 parser (keep-alive, Content-Length
+    bodies) — no extra dependency, thousands of requests/second on one core.
+
+Usage:
+  python ingest_server.py                      # http://127.0.0.1:8787
+  python ingest_server.py --port 9000
+  python ingest_server.py --unix /tmp/vault.sock
+  curl -d '{"channel":"manual","sender":"me","text":"Call back Alice"}' \\
+       http://127.0.0.1:8787/ingest
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import itertools
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import mcp_backpressure as backpressure
+import mcp_triage as triage
+from mcp_file_ops import append_file, log_event, write_many
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+NEEDS_ACTION = BASE_DIR / "Needs_Action"
+LOGS_DIR = BASE_DIR / "Logs"
+RUN_LOG = BASE_DIR / "run_log.md"
+
+HOST = "127.0.0.1"
+PORT = int(os.getenv("INGEST_PORT", "8787"))
+COMMIT_SECONDS = int(os.getenv("INGEST_COMMIT_MS", "10")) / 1000
+COMMIT_BATCH = int(os.getenv("INGEST_COMMIT_BATCH", "256"))
+MAX_BYTES = int(os.getenv("INGEST_MAX_BYTES", str(64 * 1024)))
+TOKEN = os.getenv("INGEST_TOKEN", "")
+TRIAGE_STATS_SECONDS = 5.0
+TRIGGER_AGENT = os.getenv("INGEST_TRIGGER_AGENT", "false").strip().lower() == "true"
+
+# channel -> filename prefix (matches mcp_state_store.channel_for)
+CHANNEL_PREFIXES = {
+    "manual": "manual_",
+    "whatsapp": "wa_",
+    "linkedin": "li_",
+    "gmail": "email_",
+}
+
+_seq = itertools.count(1)
+
+STATUS_TEXT = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized",
+    404: "Not Found", 405: "Method Not Allowed", 411: "Length Required",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+def utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def ts_slug() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+
+
+# ---------------------------------------------------------------------------
+# Payloads
+# ---------------------------------------------------------------------------
+
+class BadRequest(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_payload(body: bytes, query: dict, headers: dict) -> dict:
+    """Validate a request into {"channel", "sender", "subject", "text", "process"}."""
+    ctype = headers.get("content-type", "")
+    if "json" in ctype or body[:1] == b"{":
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise BadRequest(400, "invalid JSON")
+        if not isinstance(data, dict):
+            raise BadRequest(400, "JSON body must be an object")
+    else:
+        data = {"text": body.decode("utf-8", errors="replace")}
+
+    def pick(key: str) -> str:
+        value = data.get(key) or (query.get(key) or [""])[0] or headers.get(f"x-{key}", "")
+        return str(value).strip()
+
+    channel = pick("channel").lower() or "manual"
+    if channel not in CHANNEL_PREFIXES:
+        raise BadRequest(400, f"unknown channel {channel!r}; expected one of {sorted(CHANNEL_PREFIXES)}")
+    text = str(data.get("text", "")).strip()
+    if not text:
+        raise BadRequest(400, "text is required")
+    process = data.get("process", (query.get("process") or [""])[0] in ("1", "true"))
+    return {
+        "channel": channel,
+        "sender": pick("sender")[:200],
+        "subject": pick("subject")[:200],
+        "text": text,
+        "process": bool(process) or TRIGGER_AGENT,
+    }
+
+
+def render_task(p: dict) -> tuple[str, str]:
+    """(filename, content) for an accepted payload."""
+    name = f"{CHANNEL_PREFIXES[p['channel']]}{ts_slug()}_{next(_seq):06d}.md"
+    lines = [f"# {p['channel'].capitalize()} Task (Ingest Server)", ""]
+    if p["sender"]:
+        lines.append(f"From: {p['sender']}")
+    if p["subject"]:
+        lines.append(f"Subject: {p['subject']}")
+    lines += [f"Received: {utc_ts()}", "Source: ingest_server", "", p["text"], ""]
+    return name, "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Group commit
+# ---------------------------------------------------------------------------
+
+class AgentTrigger:
+    """Runs agent.main() on a background thread; coalesces overlapping requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+        self._again = False
+        self.runs = 0
+
+    def request(self) -> None:
+        with self._lock:
+            if self._running:
+                self._again = True
+                return
+            self._running = True
+        threading.Thread(target=self._loop, name="agent-pass", daemon=True).start()
+
+    def _loop(self) -> None:
+        while True:
+            try:
+                importlib.import_module("agent").main()
+            except (Exception, SystemExit) as exc:
+                append_file(RUN_LOG, f"{utc_ts()} - Ingest_Server: agent_error | {exc!r}\n")
+            self.runs += 1
+            with self._lock:
+                if not self._again:
+                    self._running = False
+                    return
+                self._again = False
+
+
+class Committer:
+    """Collects accepted payloads and writes them to Needs_Action/ in batches."""
+
+    def __init__(self, trigger: AgentTrigger):
+        self.queue: list[tuple[dict, asyncio.Future]] = []
+        self.wakeup = asyncio.Event()
+        self.trigger = trigger
+        self.stats = {"accepted": 0, "triaged": 0, "rejected": 0, "batches": 0}
+        self._gates: dict[str, backpressure.Gate] = {}
+        self._gates_at = 0.0
+        self._stats_at = time.monotonic()
+
+    def submit(self, payload: dict) -> asyncio.Future:
+        fut = asyncio.get_running_loop().create_future()
+        self.queue.append((payload, fut))
+        if len(self.queue) >= COMMIT_BATCH:
+            self.wakeup.set()
+        return fut
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), COMMIT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if self.queue:
+                batch, self.queue = self.queue, []
+                # File I/O off the event loop so accepts continue meanwhile
+                await loop.run_in_executor(None, self._commit, batch)
+
+    def _commit(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        started = time.monotonic()
+        loop = batch[0][1].get_loop()
+        results: list[tuple[asyncio.Future, int, dict]] = []
+
+        # Admission per channel, in arrival order. Gates count the folder once
+        # and track depth in memory; re-count at most once a second so the
+        # agent draining Needs_Action/ is noticed.
+        if started - self._gates_at > 1.0:
+            self._gates, self._gates_at = {}, started
+        gates = self._gates
+        admitted: list[tuple[dict, asyncio.Future, tuple[str, str]]] = []
+        for payload, fut in batch:
+            ch = payload["channel"]
+            item = triage.apply_batch(ch, [render_task(payload)])[0]
+            if item is None:
+                # Dropped or archived by a pre-triage rule: nothing to queue
+                results.append((fut, 200, {"task_id": None, "channel": ch, "triaged": True}))
+                continue
+            if ch not in gates:
+                gates[ch] = backpressure.Gate(ch)
+            if gates[ch].allowance() <= 0:
+                results.append((fut, 503, {"error": "backlog over watermark", "retry_after": 30}))
+                continue
+            gates[ch].admitted(1)
+            admitted.append((payload, fut, item))
+
+        written = write_many(NEEDS_ACTION, [item for _p, _f, item in admitted])
+        process = False
+        for i, (payload, fut, _item) in enumerate(admitted):
+            if i < len(written):
+                results.append((fut, 202, {"task_id": written[i], "channel": payload["channel"]}))
+                process = process or payload["process"]
+            else:
+                results.append((fut, 500, {"error": "write failed"}))
+
+        accepted = sum(1 for _f, status, _b in results if status == 202)
+        triaged = sum(1 for _f, status, _b in results if status == 200)
+        self.stats["accepted"] += accepted
+        self.stats["triaged"] += triaged
+        self.stats["rejected"] += len(results) - accepted - triaged
+        self.stats["batches"] += 1
+        ms = int((time.monotonic() - started) * 1000)
+        append_file(
+            RUN_LOG,
+            f"{utc_ts()} - Ingest_Server: committed {accepted} task(s) -> Needs_Action/"
+            f" | triaged={triaged} | rejected={len(results) - accepted - triaged} | {ms}ms\n",
+        )
+        log_event(LOGS_DIR, "ingest_server_batch",
+                  {"accepted": accepted, "triaged": triaged,
+                   "rejected": len(results) - accepted - triaged, "duration_ms": ms})
+        if started - self._stats_at > TRIAGE_STATS_SECONDS:
+            triage.flush_stats()
+            self._stats_at = started
+        if process and accepted:
+            self.trigger.request()
+
+        for fut, status, body in results:
+            loop.call_soon_threadsafe(_resolve, fut, (status, body))
+
+
+def _resolve(fut: asyncio.Future, value) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def _response(status: int, body: dict, keep_alive: bool) -> bytes:
+    payload = json.dumps(body).encode("utf-8")
+    head = [
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(payload)}",
+        "Connection: keep-alive" if keep_alive else "Connection: close",
+    ]
+    if status == 503:
+        head.append(f"Retry-After: {body.get('retry_after', 30)}")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload
+
+
+async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, committer: Committer) -> None:
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                writer.write(_response(400, {"error": "bad request line"}, False))
+                return
+            headers = {}
+            for line in lines[1:]:
+                key, sep, value = line.partition(":")
+                if sep:
+                    headers[key.strip().lower()] = value.strip()
+            keep_alive = (
+                headers.get("connection", "").lower() != "close"
+                if version == "HTTP/1.1"
+                else headers.get("connection", "").lower() == "keep-alive"
+            )
+
+            body = b""
+            length = headers.get("content-length")
+            if length is not None:
+                if not length.isdigit() or int(length) > MAX_BYTES:
+                    writer.write(_response(413, {"error": f"body over {MAX_BYTES} bytes"}, False))
+                    return
+                body = await reader.readexactly(int(length))
+            elif "transfer-encoding" in headers:
+                writer.write(_response(411, {"error": "Content-Length required"}, False))
+                return
+
+            url = urlsplit(target)
+            status, result = await _route(method, url.path, parse_qs(url.query), headers, body, committer)
+            writer.write(_response(status, result, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                return
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+
+async def _route(method, path, query, headers, body, committer: Committer) -> tuple[int, dict]:
+    if TOKEN and headers.get("authorization", "") != f"Bearer {TOKEN}":
+        return 401, {"error": "unauthorized"}
+    if path == "/health":
+        return 200, {"ok": True, "pending": len(committer.queue), "stats": committer.stats}
+    if path != "/ingest":
+        return 404, {"error": "not found"}
+    if method != "POST":
+        return 405, {"error": "use POST"}
+    try:
+        payload = parse_payload(body, query, headers)
+    except BadRequest as exc:
+        committer.stats["rejected"] += 1
+        return exc.status, {"error": str(exc)}
+    return await committer.submit(payload)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+async def serve(port: int, unix_path: str | None) -> None:
+    NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
+    committer = Committer(AgentTrigger())
+    commit_task = asyncio.create_task(committer.run())
+
+    async def client(reader, writer):
+        await handle(reader, writer, committer)
+
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.unlink(unix_path)
+        server = await asyncio.start_unix_server(client, path=unix_path)
+        where = f"unix:{unix_path}"
+    else:
+        server = await asyncio.start_server(client, HOST, port, backlog=1024)
+        where = f"http://{HOST}:{port}"
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+
+    print(f"=== Ingest Server Running on {where} ===")
+    print(f"  Commit window {int(COMMIT_SECONDS * 1000)} ms / batch {COMMIT_BATCH}"
+          f" | auth={'token' if TOKEN else 'none'} | trigger_agent={TRIGGER_AGENT}")
+    append_file(RUN_LOG, f"{utc_ts()} - Ingest_Server: started | {where}\n")
+    log_event(LOGS_DIR, "ingest_server_started", {"where": where})
+
+    async with server:
+        await stop.wait()
+        server.close()
+        await server.wait_closed()
+    # Flush anything still queued before exiting
+    committer.wakeup.set()
+    await asyncio.sleep(COMMIT_SECONDS * 2)
+    commit_task.cancel()
+    triage.flush_stats()
+
+    append_file(RUN_LOG, f"{utc_ts()} - Ingest_Server: stopped | {committer.stats}\n")
+    log_event(LOGS_DIR, "ingest_server_stopped", committer.stats)
+    print(f"=== Ingest Server Done === {committer.stats}")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    port = PORT
+    unix_path = None
+    if "--port" in args:
+        port = int(args[args.index("--port") + 1])
+    if "--unix" in args:
+        unix_path = args[args.index("--unix") + 1]
+    try:
+        asyncio.run(serve(port, unix_path))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
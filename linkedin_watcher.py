@@ -1,8 +1,9 @@
 """Watcher 5 (BONUS) – LinkedIn simulated ingestion.
 
-Reads linkedin_input.txt (simulated DMs / leads), splits on '---' separator
+Streams linkedin_input.txt (simulated DMs / leads), splits on '---' separator
 lines, creates Needs_Action/li_<timestamp>_<n>.md for each block,
-then clears the file. Logs each ingested task to run_log.md (UTC).
+then clears the file once every block is checkpointed (tail_reader.py).
+Logs each ingested task to run_log.md (UTC).
 
 This is a SIMULATED watcher (no real LinkedIn API required). It demonstrates
 multi-channel ingestion by reading a local text file as a stand-in for
@@ -15,9 +16,11 @@ from __future__ import annotations
 
 import json
 from datetime import datetime, timezone
-from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent
+from tail_reader import TailReader, ingest_blocks
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 LINKEDIN_INPUT = BASE_DIR / "linkedin_input.txt"
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
 LOGS_DIR = BASE_DIR / "Logs"
@@ -53,9 +56,9 @@ def log_event(event_type: str, data: dict) -> None:
         pass
 
 
-def main() -> None:
-    print("=== LinkedIn Watcher (Simulated) Running ===")
-
+def ingest() -> dict:
+    """Ingest new linkedin_input.txt blocks. Returns {"ingested", "bytes", "errors"}."""
+    stats = {"ingested": 0, "bytes": 0, "errors": 0}
     NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -63,48 +66,62 @@ def main() -> None:
         print("No linkedin_input.txt found. Skipping.")
         append_log(f"{utc_ts()} - LinkedIn_Watcher: no_input_file\n")
         log_event("linkedin_watcher_skip", {"reason": "no_input_file"})
-        return
+        return stats
 
-    raw = LINKEDIN_INPUT.read_text(encoding="utf-8", errors="ignore").strip()
-    if not raw:
-        print("linkedin_input.txt is empty. Skipping.")
-        append_log(f"{utc_ts()} - LinkedIn_Watcher: empty_file\n")
-        log_event("linkedin_watcher_skip", {"reason": "empty_file"})
-        return
-
-    blocks = [b.strip() for b in raw.split("---") if b.strip()]
-
-    if not blocks:
-        print("No task blocks found in linkedin_input.txt.")
-        return
-
-    ingested = 0
+    # Stream blocks from the last checkpointed offset; anything appended while
+    # we read is picked up next run instead of being lost to a truncate.
+    # Files are written in batches, one checkpoint per batch.
     slug = ts_slug()
-    for i, block in enumerate(blocks, start=1):
-        fname = f"li_{slug}_{i}.md"
-        dest = NEEDS_ACTION / fname
-        try:
-            dest.write_text(
-                f"# LinkedIn Lead/DM Task (Simulated)\n\nSource: linkedin_input.txt\n\n{block}\n",
-                encoding="utf-8",
-            )
-            append_log(f"{utc_ts()} - LinkedIn_Watcher: ingested -> {fname}\n")
+    result = ingest_blocks(
+        TailReader(LINKEDIN_INPUT),
+        NEEDS_ACTION,
+        lambda block, n: (
+            f"li_{slug}_{n}.md",
+            f"# LinkedIn Lead/DM Task (Simulated)\n\nSource: linkedin_input.txt\n\n{block}\n",
+        ),
+        channel="linkedin",
+    )
+    written = result["written"]
+    stats.update(ingested=len(written), bytes=result["bytes"], errors=result["errors"])
+    if written:
+        append_log("".join(f"{utc_ts()} - LinkedIn_Watcher: ingested -> {fname}\n" for fname in written))
+        for fname in written:
             log_event("linkedin_task_ingested", {"file": fname})
             print(f"Ingested: {fname}")
-            ingested += 1
-        except Exception as exc:
-            print(f"Error writing {fname}: {exc}")
-
-    # Clear input file after processing
-    try:
-        LINKEDIN_INPUT.write_text("", encoding="utf-8")
+    if result["errors"]:
+        print("Error writing a batch; remaining blocks are retried next run.")
+    if result["triaged"]:
+        print(f"Triage: {result['triaged']} block(s) dropped/archived by rules.")
+    if result["spilled"]:
+        print(f"Backpressure: spilled {result['spilled']} block(s) to Logs/overflow_linkedin.jsonl.")
+    if result["paused"]:
+        print("Backpressure: Needs_Action/ over watermark; remaining blocks stay in linkedin_input.txt.")
+
+    # Compaction happens only once everything is checkpointed and nothing new arrived
+    if result["compacted"]:
         print("Cleared linkedin_input.txt.")
-    except Exception:
-        pass
 
-    append_log(f"{utc_ts()} - LinkedIn_Watcher: done | ingested={ingested}\n")
-    log_event("linkedin_watcher_done", {"ingested": ingested})
-    print(f"=== LinkedIn Watcher Done ({ingested} tasks ingested) ===")
+    if not written and (result["paused"] or result["spilled"]):
+        append_log(f"{utc_ts()} - LinkedIn_Watcher: paused | backpressure\n")
+        log_event("linkedin_watcher_skip", {"reason": "backpressure"})
+        return stats
+
+    if not written:
+        print("No new task blocks in linkedin_input.txt. Skipping.")
+        append_log(f"{utc_ts()} - LinkedIn_Watcher: empty_file\n")
+        log_event("linkedin_watcher_skip", {"reason": "empty_file"})
+        return stats
+
+    append_log(f"{utc_ts()} - LinkedIn_Watcher: done | ingested={len(written)}\n")
+    log_event("linkedin_watcher_done", {"ingested": len(written)})
+    return stats
+
+
+def main() -> None:
+    print("=== LinkedIn Watcher (Simulated) Running ===")
+    ingested = ingest()["ingested"]
+    if ingested:
+        print(f"=== LinkedIn Watcher Done ({ingested} tasks ingested) ===")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,349 @@
+"""MCP Backpressure – admission control on Needs_Action/ depth.
+
+Watchers used to push work as fast as it arrived: a burst of 5k WhatsApp
+lines became 5k Needs_Action files the agent could not drain in one run.
+Before writing, ingestion sources now ask a Gate how many tasks they may add.
+
+Watermarks (hysteresis):
+  - a channel is paused once its depth reaches its high watermark, or the
+    total depth reaches the global high watermark;
+  - it stays paused until depth falls back to the low watermark.
+
+Configuration:
+  BACKPRESSURE_HIGH            global high watermark (default 1000, 0 = off)
+  BACKPRESSURE_LOW             global low watermark  (default 80% of high)
+  BACKPRESSURE_CHANNELS        per-channel "high:low" overrides,
+                               e.g. "whatsapp=300:200,manual=100:50"
+  BACKPRESSURE_MODE            pause (default) — leave work in the source
+                               (input file offset / Inbox/) until resumed
+                               spill — move it into Logs/overflow_<channel>.jsonl
+                               so the source is emptied; spilled items are
+                               re-admitted first, in order, once pressure drops
+
+Behaviour:
+  - Paused/resumed transitions are persisted in Logs/backpressure_state.json
+    and logged once per transition (backpressure_paused / _resumed events).
+  - emit_gauges() logs a "backlog_depth" event per channel and for the
+    total (depth, watermarks, paused, overflow queue length); ingest_runner
+    and silver_daemon call it after every ingestion / agent pass.
+  - Watermarks are soft under concurrency: parallel sources may overshoot
+    by at most one batch each.
+  - The overflow queue is append-only; Logs/overflow_<channel>.head.json
+    holds the read offset and queue length, so depth checks are O(1) and
+    re-admission streams from the head. The consumed head is dropped once
+    the queue drains, or once it passes OVERFLOW_COMPACT_BYTES (default 8 MB).
+  - NEVER crashes: on any error the gate admits everything (fail-open), so a
+    broken state file never stops ingestion.
+
+Usage:
+  python mcp_backpressure.py     # print current depth and pause state
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import mcp_state_store as state_store
+from mcp_file_ops import log_event, write_many
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+NEEDS_ACTION = BASE_DIR / "Needs_Action"
+LOGS_DIR = BASE_DIR / "Logs"
+STATE_FILE = LOGS_DIR / "backpressure_state.json"
+
+GLOBAL = "_global"
+
+_lock = threading.Lock()
+_queue_lock = threading.Lock()  # overflow queue + head sidecar
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+def mode() -> str:
+    return os.getenv("BACKPRESSURE_MODE", "pause").strip().lower()
+
+
+def watermarks(channel: str) -> tuple[int, int]:
+    """Return (high, low) for channel, or the global pair for GLOBAL. high 0 = no limit."""
+    high = int(os.getenv("BACKPRESSURE_HIGH", "1000"))
+    low = int(os.getenv("BACKPRESSURE_LOW", str(int(high * 0.8))))
+    if channel != GLOBAL:
+        for item in os.getenv("BACKPRESSURE_CHANNELS", "").split(","):
+            key, sep, val = item.partition("=")
+            if sep and key.strip() == channel:
+                h, _, l = val.partition(":")
+                high = int(h)
+                low = int(l) if l.strip() else int(high * 0.8)
+    return high, min(low, high)
+
+
+# ---------------------------------------------------------------------------
+# Depth and state
+# ---------------------------------------------------------------------------
+
+def depths() -> dict[str, int]:
+    """Count Needs_Action/*.md per channel, plus the total under GLOBAL."""
+    counts: dict[str, int] = {GLOBAL: 0}
+    try:
+        with os.scandir(NEEDS_ACTION) as it:
+            for e in it:
+                if e.name.endswith(".md") and e.is_file():
+                    ch = state_store.channel_for(e.name)
+                    counts[ch] = counts.get(ch, 0) + 1
+                    counts[GLOBAL] += 1
+    except OSError:
+        pass
+    return counts
+
+
+def _load_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _save_state(state: dict) -> None:
+    try:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = STATE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, STATE_FILE)
+    except Exception:
+        pass
+
+
+def _transition(key: str, depth: int, was: bool) -> bool:
+    """Apply the hysteresis rule for key at depth; persist and log transitions."""
+    high, low = watermarks(key)
+    if high <= 0:
+        return False
+    now = depth >= high if not was else depth > low
+    if now != was:
+        with _lock:
+            state = _load_state()
+            state[key] = now
+            _save_state(state)
+        log_event(
+            LOGS_DIR,
+            "backpressure_paused" if now else "backpressure_resumed",
+            {"channel": key, "depth": depth, "high": high, "low": low},
+        )
+    return now
+
+
+def gauges() -> dict[str, dict]:
+    """Per-channel and global backlog gauges: depth, watermarks, pause state, overflow."""
+    d = depths()
+    paused = _load_state()
+    out = {}
+    for key in sorted(set(d) | {k for k, v in paused.items() if v}):
+        high, low = watermarks(key)
+        out[key] = {
+            "depth": d.get(key, 0),
+            "high": high,
+            "low": low,
+            "paused": bool(paused.get(key, False)),
+        }
+        if key != GLOBAL:
+            out[key]["overflow"] = overflow_depth(key)
+    return out
+
+
+def emit_gauges() -> dict[str, dict]:
+    """Log one "backlog_depth" event per channel (and the total); return the gauges."""
+    g = gauges()
+    for key, values in g.items():
+        log_event(LOGS_DIR, "backlog_depth", {"channel": key, **values})
+    return g
+
+
+# ---------------------------------------------------------------------------
+# Gate
+# ---------------------------------------------------------------------------
+
+class Gate:
+    """Admission decisions for one channel during one ingestion pass.
+
+    Depth is counted once at construction and then tracked in memory, so
+    allowance() is cheap enough to call per file.
+    """
+
+    def __init__(self, channel: str):
+        self.channel = channel
+        try:
+            d = depths()
+            self.depth = {channel: d.get(channel, 0), GLOBAL: d[GLOBAL]}
+            saved = _load_state()
+        except Exception:
+            self.depth, saved = {channel: 0, GLOBAL: 0}, {}
+        self.paused = {key: bool(saved.get(key, False)) for key in self.depth}
+        self._refresh()
+
+    def _refresh(self) -> None:
+        for key, depth in self.depth.items():
+            try:
+                self.paused[key] = _transition(key, depth, self.paused[key])
+            except Exception:
+                self.paused[key] = False  # fail open
+
+    def allowance(self) -> int:
+        """How many more tasks this channel may add now (large number = unlimited)."""
+        if any(self.paused.values()):
+            return 0
+        room = []
+        for key, depth in self.depth.items():
+            high, _low = watermarks(key)
+            if high > 0:
+                room.append(high - depth)
+        return max(0, min(room)) if room else 1 << 30
+
+    def admitted(self, n: int) -> None:
+        """Record that n tasks were written."""
+        if n:
+            for key in self.depth:
+                self.depth[key] += n
+            self._refresh()
+
+
+# ---------------------------------------------------------------------------
+# Overflow queue (BACKPRESSURE_MODE=spill)
+# ---------------------------------------------------------------------------
+
+OVERFLOW_COMPACT_BYTES = int(os.getenv("OVERFLOW_COMPACT_BYTES", str(8 * 1024 * 1024)))
+
+
+def overflow_path(channel: str) -> Path:
+    return LOGS_DIR / f"overflow_{channel}.jsonl"
+
+
+def _head_path(channel: str) -> Path:
+    return LOGS_DIR / f"overflow_{channel}.head.json"
+
+
+def _load_head(channel: str) -> dict:
+    """{"offset": bytes already re-admitted, "depth": items still queued}."""
+    try:
+        head = json.loads(_head_path(channel).read_text(encoding="utf-8"))
+        return {"offset": int(head["offset"]), "depth": int(head["depth"])}
+    except Exception:
+        pass
+    # No sidecar yet (queue spilled by an older version): count once.
+    try:
+        with open(overflow_path(channel), "rb") as f:
+            depth = sum(1 for line in f if line.strip())
+    except OSError:
+        depth = 0
+    return {"offset": 0, "depth": depth}
+
+
+def _save_head(channel: str, head: dict) -> None:
+    path = _head_path(channel)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(head), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def spill(channel: str, items: list[tuple[str, str]]) -> bool:
+    """Append (filename, content) items to the channel's overflow queue."""
+    try:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        with _queue_lock:
+            head = _load_head(channel)
+            with open(overflow_path(channel), "a", encoding="utf-8") as f:
+                for name, content in items:
+                    f.write(json.dumps({"name": name, "content": content}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            head["depth"] += len(items)
+            _save_head(channel, head)
+        return True
+    except Exception:
+        return False
+
+
+def overflow_depth(channel: str) -> int:
+    if not overflow_path(channel).exists():
+        return 0
+    with _queue_lock:
+        return _load_head(channel)["depth"]
+
+
+def _drop_head(channel: str, head: dict) -> None:
+    """Remove the consumed head of the queue (all of it once drained)."""
+    path = overflow_path(channel)
+    if head["depth"] <= 0:
+        path.unlink(missing_ok=True)
+        _head_path(channel).unlink(missing_ok=True)
+        return
+    if head["offset"] < OVERFLOW_COMPACT_BYTES:
+        return
+    # Stream the unread tail into a new file; amortised over the bytes consumed
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(path, "rb") as fin, open(tmp, "wb") as fout:
+        fin.seek(head["offset"])
+        shutil.copyfileobj(fin, fout, 1024 * 1024)
+        fout.flush()
+        os.fsync(fout.fileno())
+    os.replace(tmp, path)
+    _save_head(channel, {"offset": 0, "depth": head["depth"]})
+
+
+def readmit(channel: str, folder: str | Path, gate: Gate) -> tuple[list[str], int]:
+    """Move as many spilled items as the gate allows into folder, oldest first.
+
+    Reads only the items it admits, from the saved head offset. Items are
+    written before the offset moves, so a crash in between re-delivers
+    rather than loses them. Returns (filenames written, bytes).
+    """
+    path = overflow_path(channel)
+    if not path.exists():
+        return [], 0
+    try:
+        allowance = gate.allowance()
+        if allowance <= 0:
+            return [], 0
+        with _queue_lock:
+            head = _load_head(channel)
+            take, ends = [], []
+            with open(path, "rb") as f:
+                f.seek(head["offset"])
+                pos = head["offset"]
+                while len(take) < allowance:
+                    line = f.readline()
+                    if not line:
+                        break
+                    pos += len(line)
+                    if line.strip():
+                        take.append(json.loads(line))
+                        ends.append(pos)
+            written = write_many(folder, [(i["name"], i["content"]) for i in take])
+            if written:
+                head = {"offset": ends[len(written) - 1], "depth": max(0, head["depth"] - len(written))}
+                if len(written) == len(take) and len(take) < allowance:
+                    head["depth"] = 0  # read to the end: the queue is drained
+                _save_head(channel, head)
+                _drop_head(channel, head)
+        gate.admitted(len(written))
+        return written, sum(len(i["content"].encode("utf-8")) for i in take[:len(written)])
+    except Exception:
+        return [], 0
+
+
+def print_gauges(g: dict[str, dict]) -> None:
+    for key, values in g.items():
+        extra = f" overflow={values['overflow']}" if "overflow" in values else ""
+        print(f"  {key:<16} depth={values['depth']:<6} high={values['high']:<6} "
+              f"low={values['low']:<6} paused={values['paused']}{extra}")
+
+
+if __name__ == "__main__":
+    print(f"mode={mode()}")
+    print_gauges(gauges())
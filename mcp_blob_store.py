@@ -0,0 +1,186 @@
+"""MCP Blob Store – content-addressed storage for task bodies and attachments.
+
+The same original task text used to be written three times (Done/_source_<name>,
+the "Original Content" section of Pending_Approval/<name>, and prompt snippets).
+With the blob store enabled it is written once:
+
+  Blobs/<aa>/<bb>/<sha256>       raw bytes
+  Blobs/<aa>/<bb>/<sha256>.gz    gzip-compressed (BLOB_COMPRESS=true)
+
+Derived files embed a reference marker instead of the text:
+
+  <!-- blob:sha256:<64 hex> -->
+
+render() expands markers back to the original text on demand.
+
+Behaviour:
+  - Disabled unless BLOB_STORE_ENABLED=true — agent.py keeps inlining text.
+  - Writes are atomic (temp file + os.replace) and idempotent: identical
+    content is stored once no matter how many tasks reference it.
+  - put_stream() hashes while copying, so large payloads never sit in memory.
+
+Usage:
+  python mcp_blob_store.py render <file.md>   # print file with blobs expanded
+  python mcp_blob_store.py stats              # blob count and bytes on disk
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+BLOBS_DIR = BASE_DIR / "Blobs"
+
+BLOB_REF_RE = re.compile(r"<!-- blob:sha256:([0-9a-f]{64}) -->")
+CHUNK_SIZE = 64 * 1024
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def enabled() -> bool:
+    return os.getenv("BLOB_STORE_ENABLED", "false").strip().lower() in ("true", "1", "yes")
+
+
+def _compress() -> bool:
+    return os.getenv("BLOB_COMPRESS", "true").strip().lower() in ("true", "1", "yes")
+
+
+def _blob_path(sha: str, compressed: bool) -> Path:
+    name = f"{sha}.gz" if compressed else sha
+    return BLOBS_DIR / sha[:2] / sha[2:4] / name
+
+
+def _find(sha: str) -> Path | None:
+    for compressed in (True, False):
+        p = _blob_path(sha, compressed)
+        if p.exists():
+            return p
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def put_stream(src: BinaryIO) -> tuple[str, int]:
+    """Store bytes read from src. Returns (sha256 hex, size in bytes).
+
+    Streams through a temp file in CHUNK_SIZE pieces, hashing as it goes.
+    """
+    BLOBS_DIR.mkdir(parents=True, exist_ok=True)
+    compressed = _compress()
+    h = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=BLOBS_DIR, prefix=".tmp_")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            out = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if compressed else raw
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+                size += len(chunk)
+                out.write(chunk)
+            if compressed:
+                out.close()
+        sha = h.hexdigest()
+        if _find(sha) is None:
+            dst = _blob_path(sha, compressed)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp, dst)
+        return sha, size
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+
+def put_bytes(data: bytes) -> str:
+    """Store data and return its sha256 hex."""
+    sha = hashlib.sha256(data).hexdigest()
+    if _find(sha) is not None:
+        return sha
+    return put_stream(io.BytesIO(data))[0]
+
+
+def put_text(text: str) -> str:
+    """Store UTF-8 text and return its sha256 hex."""
+    return put_bytes(text.encode("utf-8"))
+
+
+def exists(sha: str) -> bool:
+    return _find(sha) is not None
+
+
+def open_blob(sha: str) -> BinaryIO:
+    """Open a blob for streaming reads (decompressing if needed)."""
+    p = _find(sha)
+    if p is None:
+        raise FileNotFoundError(f"blob not found: {sha}")
+    return gzip.open(p, "rb") if p.suffix == ".gz" else open(p, "rb")
+
+
+def get_text(sha: str) -> str:
+    """Return the blob as text, or "" if it is missing."""
+    try:
+        with open_blob(sha) as f:
+            return f.read().decode("utf-8", errors="ignore")
+    except Exception:
+        return ""
+
+
+def copy_to(sha: str, dst: str | Path) -> bool:
+    """Stream a blob out to dst. Returns True on success."""
+    try:
+        Path(dst).parent.mkdir(parents=True, exist_ok=True)
+        with open_blob(sha) as src, open(dst, "wb") as out:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+        return True
+    except Exception:
+        return False
+
+
+def blob_ref(sha: str) -> str:
+    """Marker that derived files embed in place of the blob's content."""
+    return f"<!-- blob:sha256:{sha} -->"
+
+
+def render(text: str) -> str:
+    """Expand every blob marker in text with the referenced content."""
+    return BLOB_REF_RE.sub(lambda m: get_text(m.group(1)) or m.group(0), text)
+
+
+def stats() -> dict:
+    """Return {"blobs": n, "bytes": n} for the store on disk."""
+    count = total = 0
+    if BLOBS_DIR.is_dir():
+        for p in BLOBS_DIR.glob("*/*/*"):
+            count += 1
+            total += p.stat().st_size
+    return {"blobs": count, "bytes": total}
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "render":
+        print(render(Path(sys.argv[2]).read_text(encoding="utf-8", errors="ignore")))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "stats":
+        print(stats())
+    else:
+        print(__doc__)
@@ -1,20 +1,62 @@
 """MCP Calendar Operations – create/read calendar events (BONUS).
 
-Currently runs in SIMULATED MODE (local JSON store).
+Currently runs in SIMULATED MODE (local store).
 Extend with Google Calendar API credentials to enable live mode.
 All events logged to run_log.md and Logs/events_<date>.jsonl.
+
+Store:
+  - Events are rows in Logs/calendar.db (SQLite, WAL, like mcp_outbox):
+    creating one is a single INSERT, ids are uuid4 hex, so events created
+    in the same second never collide.
+  - An in-memory interval tree (a treap ordered by start, each node holding
+    the latest end in its subtree) indexes every event. It is loaded once
+    per process and then picks up only rows added since (by rowid), also
+    those written by other processes.
+  - read_events(start, end), find_conflicts() and find_free_slots() query
+    the tree: O(log n + k) for k matching events instead of a full scan.
+  - Times are ISO 8601 strings; naive times are taken as UTC. Intervals
+    are half-open [start, end), so back-to-back events do not conflict.
+  - An existing Logs/calendar_events.json (the old store) is imported on
+    first use and renamed to calendar_events.json.imported.
 """
 
 from __future__ import annotations
 
 import json
+import random
+import sqlite3
+import threading
+import uuid
 from datetime import datetime, timezone
-from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
-CALENDAR_DB = LOGS_DIR / "calendar_events.json"
+CALENDAR_DB = LOGS_DIR / "calendar.db"
+LEGACY_JSON = LOGS_DIR / "calendar_events.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq         INTEGER PRIMARY KEY AUTOINCREMENT,
+    id          TEXT NOT NULL UNIQUE,
+    title       TEXT NOT NULL,
+    start       TEXT NOT NULL,
+    end         TEXT NOT NULL,
+    start_ts    REAL,
+    end_ts      REAL,
+    description TEXT NOT NULL DEFAULT '',
+    created_at  TEXT NOT NULL,
+    mode        TEXT NOT NULL DEFAULT 'simulated'
+);
+CREATE INDEX IF NOT EXISTS idx_events_start ON events(start_ts);
+"""
+
+_EVENT_FIELDS = ("id", "title", "start", "end", "description", "created_at", "mode")
+
+_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
 
 
 # ---------------------------------------------------------------------------
@@ -25,10 +67,6 @@ def _utc_ts() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
 
 
-def _ts_slug() -> str:
-    return datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-
-
 def _append_log(text: str) -> None:
     try:
         RUN_LOG.parent.mkdir(parents=True, exist_ok=True)
@@ -50,36 +88,225 @@ def _log_event(event_type: str, data: dict) -> None:
         pass
 
 
-def _load_db() -> list:
+def _to_ts(value: str) -> float | None:
+    """Epoch seconds of an ISO 8601 time (naive = UTC), None if unparsable."""
     try:
-        if CALENDAR_DB.exists():
-            return json.loads(CALENDAR_DB.read_text(encoding="utf-8"))
-    except Exception:
-        pass
-    return []
+        dt = datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _to_iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _parse_range(start: str, end: str) -> tuple[float, float] | dict:
+    """(start_ts, end_ts), or an error result."""
+    start_ts, end_ts = _to_ts(start), _to_ts(end)
+    if start_ts is None or end_ts is None:
+        return {"ok": False, "reason": "invalid_time", "start": start, "end": end}
+    if end_ts < start_ts:
+        return {"ok": False, "reason": "end_before_start", "start": start, "end": end}
+    return start_ts, end_ts
+
+
+# ---------------------------------------------------------------------------
+# Interval tree
+# ---------------------------------------------------------------------------
+
+class _Node:
+    __slots__ = ("start", "end", "key", "event", "prio", "max_end", "left", "right")
+
+    def __init__(self, start: float, end: float, key: str, event: dict, prio: float):
+        self.start, self.end, self.key, self.event, self.prio = start, end, key, event, prio
+        self.max_end = end
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+
+def _update(node: _Node) -> None:
+    node.max_end = max(
+        node.end,
+        node.left.max_end if node.left else node.end,
+        node.right.max_end if node.right else node.end,
+    )
+
+
+def _rotate_right(node: _Node) -> _Node:
+    top = node.left
+    node.left, top.right = top.right, node
+    _update(node)
+    _update(top)
+    return top
+
+
+def _rotate_left(node: _Node) -> _Node:
+    top = node.right
+    node.right, top.left = top.left, node
+    _update(node)
+    _update(top)
+    return top
+
+
+class IntervalTree:
+    """Treap of [start, end) intervals ordered by (start, key), max-end augmented.
+
+    Expected O(log n) insert; overlap queries visit O(log n + k) nodes for k
+    matches and return them in start order.
+    """
+
+    def __init__(self) -> None:
+        self.root: _Node | None = None
+        self.size = 0
+        self._rng = random.Random()
+
+    def insert(self, start: float, end: float, key: str, event: dict) -> None:
+        self.root = self._insert(self.root, _Node(start, end, key, event, self._rng.random()))
+        self.size += 1
+
+    def _insert(self, root: _Node | None, node: _Node) -> _Node:
+        if root is None:
+            return node
+        if (node.start, node.key) < (root.start, root.key):
+            root.left = self._insert(root.left, node)
+            if root.left.prio > root.prio:
+                return _rotate_right(root)
+        else:
+            root.right = self._insert(root.right, node)
+            if root.right.prio > root.prio:
+                return _rotate_left(root)
+        _update(root)
+        return root
+
+    def overlapping(self, start: float, end: float) -> list[_Node]:
+        """Intervals overlapping [start, end), plus instants (start == end) inside it."""
+        out: list[_Node] = []
+        self._collect(self.root, start, end, out)
+        return out
+
+    def _collect(self, node: _Node | None, start: float, end: float, out: list[_Node]) -> None:
+        if node is None or node.max_end < start:
+            return  # everything below ends before the range
+        self._collect(node.left, start, end, out)
+        if node.start >= end and not (node.start == end == start):
+            return  # this node and its right subtree start after the range
+        if node.end > start or (node.start >= start and node.start == node.end):
+            out.append(node)
+        self._collect(node.right, start, end, out)
 
 
-def _save_db(events: list) -> None:
-    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+class _Calendar:
+    """The tree plus the last SQLite rowid it has seen."""
+
+    def __init__(self) -> None:
+        self.tree = IntervalTree()
+        self.seen_seq = 0
+
+    def sync(self, conn: sqlite3.Connection) -> None:
+        rows = conn.execute(
+            "SELECT * FROM events WHERE seq > ? ORDER BY seq", (self.seen_seq,)
+        ).fetchall()
+        for r in rows:
+            self.add(r)
+            self.seen_seq = r["seq"]
+
+    def add(self, row) -> None:
+        if row["start_ts"] is None:
+            return  # legacy event without a usable time: stored, not indexed
+        event = {k: row[k] for k in _EVENT_FIELDS}
+        end_ts = row["end_ts"] if row["end_ts"] is not None else row["start_ts"]
+        self.tree.insert(row["start_ts"], max(end_ts, row["start_ts"]), row["id"], event)
+
+
+_calendar = _Calendar()
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(CALENDAR_DB), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _import_legacy(conn)
+        _conn = conn
+    return _conn
+
+
+def _import_legacy(conn: sqlite3.Connection) -> None:
+    """Move events of the old calendar_events.json into the database, once."""
+    if not LEGACY_JSON.exists():
+        return
     try:
-        CALENDAR_DB.write_text(json.dumps(events, indent=2), encoding="utf-8")
+        events = json.loads(LEGACY_JSON.read_text(encoding="utf-8"))
     except Exception:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    if not LEGACY_JSON.exists():  # another process imported it meanwhile
+        conn.execute("ROLLBACK")
+        return
+    try:
+        for e in events if isinstance(events, list) else []:
+            start, end = str(e.get("start", "")), str(e.get("end", "") or e.get("start", ""))
+            # Old ids were second-resolution timestamps; duplicates get a new id
+            event_id = str(e.get("id") or uuid.uuid4().hex)
+            if conn.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)).fetchone():
+                event_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO events (id, title, start, end, start_ts, end_ts, description, created_at, mode) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (event_id, str(e.get("title", "")), start, end, _to_ts(start), _to_ts(end),
+                 str(e.get("description", "")), str(e.get("created_at") or _utc_ts()),
+                 str(e.get("mode", "simulated"))),
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        return
+    try:
+        LEGACY_JSON.replace(LEGACY_JSON.with_name(LEGACY_JSON.name + ".imported"))
+    except OSError:
         pass
+    _append_log(f"{_utc_ts()} - calendar_legacy_imported | events={len(events)}\n")
+
+
+def _synced() -> _Calendar:
+    """The in-memory index, caught up with the database (call under _lock)."""
+    _calendar.sync(_connect())
+    return _calendar
 
 
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
-def create_event(title: str, start: str, end: str, description: str = "") -> dict:
+def create_event(
+    title: str, start: str, end: str, description: str = "", reject_conflicts: bool = False
+) -> dict:
     """Create a calendar event in the local simulated store.
 
     Returns:
-        {"ok": True, "event": {...}}
+        {"ok": True, "event": {...}, "conflicts": [...]}
+        {"ok": False, "reason": "conflict", "conflicts": [...]}  with reject_conflicts
+        {"ok": False, "reason": "invalid_time" | "end_before_start" | "store_error"}
     """
-    events = _load_db()
+    parsed = _parse_range(start, end)
+    if isinstance(parsed, dict):
+        return parsed
+    start_ts, end_ts = parsed
     event = {
-        "id": _ts_slug(),
+        "id": uuid.uuid4().hex,
         "title": title,
         "start": start,
         "end": end,
@@ -87,19 +314,106 @@ def create_event(title: str, start: str, end: str, description: str = "") -> dic
         "created_at": _utc_ts(),
         "mode": "simulated",
     }
-    events.append(event)
-    _save_db(events)
+    try:
+        with _lock:
+            conflicts = [n.event for n in _synced().tree.overlapping(start_ts, end_ts)]
+            if conflicts and reject_conflicts:
+                _log_event("calendar_event_conflict", {
+                    "title": title, "start": start, "end": end,
+                    "conflicts": [c["id"] for c in conflicts],
+                })
+                return {"ok": False, "reason": "conflict", "conflicts": conflicts}
+            conn = _connect()
+            conn.execute(
+                "INSERT INTO events (id, title, start, end, start_ts, end_ts, description, created_at, mode) "
+                "VALUES (:id, :title, :start, :end, :start_ts, :end_ts, :description, :created_at, :mode)",
+                {**event, "start_ts": start_ts, "end_ts": end_ts},
+            )
+            _synced()  # indexes this row (and any added elsewhere meanwhile)
+    except Exception as exc:
+        return {"ok": False, "reason": "store_error", "error": str(exc)}
     _append_log(f"{_utc_ts()} - calendar_event_created | title={title} | start={start}\n")
-    _log_event("calendar_event_created", {"title": title, "start": start, "end": end})
-    return {"ok": True, "event": event}
+    _log_event("calendar_event_created", {
+        "id": event["id"], "title": title, "start": start, "end": end,
+        "conflicts": [c["id"] for c in conflicts],
+    })
+    return {"ok": True, "event": event, "conflicts": conflicts}
 
 
-def read_events() -> dict:
-    """Read all calendar events from the local store.
+def read_events(start: str | None = None, end: str | None = None) -> dict:
+    """Read calendar events, all of them or those overlapping [start, end).
 
     Returns:
-        {"ok": True, "events": [...], "count": N}
+        {"ok": True, "events": [...], "count": N}   (ordered by start)
     """
-    events = _load_db()
-    _log_event("calendar_events_read", {"count": len(events)})
+    try:
+        with _lock:
+            if start is None and end is None:
+                rows = _connect().execute(
+                    "SELECT * FROM events ORDER BY start_ts IS NULL, start_ts, seq"
+                ).fetchall()
+                events = [{k: r[k] for k in _EVENT_FIELDS} for r in rows]
+            else:
+                parsed = _parse_range(start or "0001-01-01", end or "9999-12-31")
+                if isinstance(parsed, dict):
+                    return parsed
+                events = [n.event for n in _synced().tree.overlapping(*parsed)]
+    except Exception as exc:
+        return {"ok": False, "reason": "store_error", "error": str(exc), "events": [], "count": 0}
+    _log_event("calendar_events_read", {"count": len(events), "start": start, "end": end})
     return {"ok": True, "events": events, "count": len(events)}
+
+
+def find_conflicts(start: str, end: str) -> dict:
+    """Events that overlap [start, end).
+
+    Returns:
+        {"ok": True, "conflicts": [...], "count": N}
+    """
+    parsed = _parse_range(start, end)
+    if isinstance(parsed, dict):
+        return parsed
+    try:
+        with _lock:
+            conflicts = [n.event for n in _synced().tree.overlapping(*parsed)]
+    except Exception as exc:
+        return {"ok": False, "reason": "store_error", "error": str(exc)}
+    return {"ok": True, "conflicts": conflicts, "count": len(conflicts)}
+
+
+def find_free_slots(start: str, end: str, duration_minutes: int = 30, limit: int = 10) -> dict:
+    """Free gaps of at least duration_minutes between start and end.
+
+    Returns:
+        {"ok": True, "slots": [{"start": iso, "end": iso, "minutes": N}, ...]}
+        (UTC, earliest first, at most limit)
+    """
+    parsed = _parse_range(start, end)
+    if isinstance(parsed, dict):
+        return parsed
+    window_start, window_end = parsed
+    need = duration_minutes * 60
+    try:
+        with _lock:
+            busy = _synced().tree.overlapping(window_start, window_end)
+    except Exception as exc:
+        return {"ok": False, "reason": "store_error", "error": str(exc)}
+
+    slots: list[dict] = []
+    cursor = window_start
+    for node in busy:  # in start order
+        if len(slots) >= limit:
+            break
+        if min(node.start, window_end) - cursor >= need:
+            slots.append({"start": cursor, "end": node.start})
+        cursor = max(cursor, node.end)
+    if len(slots) < limit and window_end - cursor >= need:
+        slots.append({"start": cursor, "end": window_end})
+    return {
+        "ok": True,
+        "slots": [
+            {"start": _to_iso(s["start"]), "end": _to_iso(s["end"]),
+             "minutes": int((s["end"] - s["start"]) // 60)}
+            for s in slots
+        ],
+    }
@@ -6,6 +6,26 @@ Behaviour:
   - Otherwise: SIMULATED MODE — writes evidence JSON to Logs/email_simulated_<ts>.json.
   - NEVER crashes regardless of credential state.
   - All events logged to run_log.md and Logs/events_<date>.jsonl.
+  - Failures carry "retryable": connection errors, timeouts and SMTP 4xx
+    replies are transient; 5xx replies (bad recipient, auth) are permanent.
+  - queue_email() puts a message in the durable outbox (mcp_outbox.py);
+    send_due_emails() sends the ones that are due, with backoff between
+    failed attempts and a dead-letter state after OUTBOX_MAX_ATTEMPTS.
+
+Connections:
+  - Authenticated sessions (EHLO, STARTTLS, LOGIN done once) are kept in a
+    per-process pool of up to SMTP_POOL_SIZE idle sessions (default 4,
+    0 = connect per call) and reused until idle for SMTP_IDLE_TIMEOUT
+    seconds (default 60). A pooled session the server has dropped is
+    replaced by a fresh one and the message is sent again, once.
+  - send_many(messages) sends a whole batch over one session, one message
+    after another, with a result per message; a 5xx for one recipient does
+    not stop the rest. send_email() is send_many() of one message.
+  - send_many_async(messages, concurrency) does the same over several
+    sessions with aiosmtplib when it is installed (pip install aiosmtplib);
+    without it the batch runs through send_many() in a worker thread.
+  - fake_smtp_server.py is a local stand-in server and bench_smtp.py
+    measures messages/sec against it.
 
 Required env vars for real sending:
   SMTP_HOST   SMTP server hostname
@@ -13,21 +33,39 @@ Required env vars for real sending:
   SMTP_USER   SMTP login username
   SMTP_PASS   SMTP login password (never logged)
   SMTP_FROM   Sender address (optional; defaults to SMTP_USER)
+  SMTP_STARTTLS  "false" to skip STARTTLS (local test servers only; default true)
 """
 
 from __future__ import annotations
 
+import asyncio
+import atexit
+import hashlib
 import json
 import os
 import smtplib
+import threading
+import time
 from datetime import datetime, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-from pathlib import Path
+from typing import Iterable
+
+import mcp_outbox as outbox
+from mcp_vault import VAULT_ROOT
+
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None  # type: ignore
 
-BASE_DIR = Path(__file__).resolve().parent
+BASE_DIR = VAULT_ROOT
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
+OUTBOX_KIND = "email"
+TIMEOUT_SECONDS = 15
+POOL_SIZE = max(0, int(os.getenv("SMTP_POOL_SIZE", "4")))
+IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
 
 
 # ---------------------------------------------------------------------------
@@ -63,6 +101,200 @@ def _log_event(event_type: str, data: dict) -> None:
         pass
 
 
+def _retryable(exc: Exception) -> bool:
+    """True for failures worth retrying later (network, timeouts, SMTP 4xx)."""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _msg in exc.recipients.values()]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    if isinstance(getattr(exc, "recipients", None), list):  # aiosmtplib
+        codes = [getattr(r, "code", 0) for r in exc.recipients]
+        return bool(codes) and all(400 <= code < 500 for code in codes)
+    code = getattr(exc, "smtp_code", getattr(exc, "code", None))
+    if isinstance(code, int) and code >= 400:
+        return code < 500
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, OSError))
+
+
+def _session_broken(exc: Exception) -> bool:
+    """True when the connection is unusable (vs. one message being refused)."""
+    code = getattr(exc, "smtp_code", getattr(exc, "code", None))
+    if code == 421:  # service closing the channel
+        return True
+    if isinstance(exc, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+        return False
+    if aiosmtplib is not None and isinstance(
+        exc, (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused)
+    ):
+        return False
+    return isinstance(exc, OSError)
+
+
+def _smtp_config() -> dict:
+    """SMTP settings from the environment; "missing" lists absent credentials."""
+    host = os.getenv("SMTP_HOST", "").strip()
+    user = os.getenv("SMTP_USER", "").strip()
+    password = os.getenv("SMTP_PASS", "").strip()
+    try:
+        port = int(os.getenv("SMTP_PORT", "587").strip())
+    except ValueError:
+        port = 587
+    return {
+        "host": host,
+        "port": port,
+        "user": user,
+        "password": password,
+        # SMTP_FROM is optional — falls back to user if not provided
+        "from": os.getenv("SMTP_FROM", "").strip() or user,
+        "starttls": os.getenv("SMTP_STARTTLS", "true").strip().lower() not in ("false", "0", "no"),
+        "missing": [k for k, v in {"SMTP_HOST": host, "SMTP_USER": user, "SMTP_PASS": password}.items() if not v],
+    }
+
+
+def _build_message(sender: str, to: str, subject: str, body: str) -> str:
+    msg = MIMEMultipart("alternative")
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to
+    msg.attach(MIMEText(body, "plain"))
+    return msg.as_string()
+
+
+def _write_simulated(to: str, subject: str, body: str, missing: list[str]) -> dict:
+    """Simulated mode: write evidence JSON instead of sending."""
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    slug = _ts_slug()
+    evidence_path = LOGS_DIR / f"email_simulated_{slug}.json"
+    n = 1
+    while True:
+        # Several messages within one second each get their own file
+        try:
+            with open(evidence_path, "x", encoding="utf-8"):
+                break
+        except FileExistsError:
+            n += 1
+            evidence_path = LOGS_DIR / f"email_simulated_{slug}_{n}.json"
+        except Exception:
+            break
+    evidence = {
+        "ts": _utc_ts(),
+        "mode": "simulated",
+        "to": to,
+        "subject": subject,
+        "body": body,
+        "reason": "not_configured",
+        "missing": missing,
+    }
+    try:
+        evidence_path.write_text(json.dumps(evidence, indent=2), encoding="utf-8")
+    except Exception:
+        pass
+    _append_log(
+        f"{_utc_ts()} - email_send_attempt | simulated | not_configured | to={to}\n"
+    )
+    _log_event("email_send_simulated", {
+        "to": to, "subject": subject, "evidence": str(evidence_path)
+    })
+    return {
+        "ok": False,
+        "reason": "not_configured",
+        "evidence_path": str(evidence_path),
+    }
+
+
+def _log_attempt(cfg: dict, to: str, subject: str) -> None:
+    _append_log(f"{_utc_ts()} - email_send_attempt | live | to={to} | from={cfg['from']}\n")
+    _log_event("email_send_attempt", {"to": to, "subject": subject, "smtp_host": cfg["host"]})
+
+
+def _sent(to: str, subject: str) -> dict:
+    _append_log(f"{_utc_ts()} - email_send_success | to={to}\n")
+    _log_event("email_send_success", {"to": to, "subject": subject})
+    return {"ok": True}
+
+
+def _failed(to: str, exc: Exception) -> dict:
+    retryable = _retryable(exc)
+    _append_log(f"{_utc_ts()} - email_send_error | to={to} | retryable={retryable} | {exc}\n")
+    _log_event("email_send_error", {"to": to, "reason": str(exc), "retryable": retryable})
+    return {"ok": False, "reason": str(exc), "retryable": retryable}
+
+
+def _quit(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+class _SMTPPool:
+    """Idle authenticated SMTP sessions, shared by all threads of the process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._idle: list[tuple[float, tuple, smtplib.SMTP]] = []  # (released at, identity, session)
+
+    @staticmethod
+    def _identity(cfg: dict) -> tuple:
+        return (cfg["host"], cfg["port"], cfg["user"], cfg["password"], cfg["starttls"])
+
+    def _expired(self, now: float) -> list[smtplib.SMTP]:
+        stale = [entry[2] for entry in self._idle if now - entry[0] >= IDLE_TIMEOUT]
+        self._idle = [entry for entry in self._idle if now - entry[0] < IDLE_TIMEOUT]
+        return stale
+
+    def acquire(self, cfg: dict) -> tuple[smtplib.SMTP, bool]:
+        """(session, reused) — most recently used idle session, else a new one."""
+        ident = self._identity(cfg)
+        with self._lock:
+            stale = self._expired(time.monotonic())
+            session = None
+            for i in range(len(self._idle) - 1, -1, -1):
+                if self._idle[i][1] == ident:
+                    session = self._idle.pop(i)[2]
+                    break
+        for old in stale:
+            _quit(old)
+        if session is not None:
+            return session, True
+        return self._open(cfg), False
+
+    @staticmethod
+    def _open(cfg: dict) -> smtplib.SMTP:
+        server = smtplib.SMTP(cfg["host"], cfg["port"], timeout=TIMEOUT_SECONDS)
+        try:
+            server.ehlo()
+            if cfg["starttls"]:
+                server.starttls()
+                server.ehlo()
+            server.login(cfg["user"], cfg["password"])  # password NOT logged
+        except Exception:
+            _quit(server)
+            raise
+        return server
+
+    def release(self, cfg: dict, server: smtplib.SMTP) -> None:
+        with self._lock:
+            stale = self._expired(time.monotonic())
+            if len(self._idle) < POOL_SIZE:
+                self._idle.append((time.monotonic(), self._identity(cfg), server))
+                server = None
+        for old in stale + ([server] if server is not None else []):
+            _quit(old)
+
+    def close_all(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for _ts, _ident, server in idle:
+            _quit(server)
+
+
+_pool = _SMTPPool()
+atexit.register(_pool.close_all)
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
@@ -77,77 +309,134 @@ def send_email(to: str, subject: str, body: str) -> dict:
 
     Returns:
         {"ok": True}                                         on real success
-        {"ok": False, "reason": "...", "evidence_path": "..."} on simulated/error
+        {"ok": False, "reason": "...", "evidence_path": "..."} on simulated
+        {"ok": False, "reason": "...", "retryable": bool}     on error
     """
-    smtp_host = os.getenv("SMTP_HOST", "").strip()
-    smtp_port_raw = os.getenv("SMTP_PORT", "587").strip()
-    smtp_user = os.getenv("SMTP_USER", "").strip()
-    smtp_pass = os.getenv("SMTP_PASS", "").strip()
-    # SMTP_FROM is optional — falls back to smtp_user if not provided
-    smtp_from = os.getenv("SMTP_FROM", "").strip() or smtp_user
+    return send_many([{"to": to, "subject": subject, "body": body}])[0]
 
-    try:
-        smtp_port = int(smtp_port_raw)
-    except ValueError:
-        smtp_port = 587
+
+def send_many(messages: Iterable[dict]) -> list[dict]:
+    """Send {"to", "subject", "body"} messages over one pooled SMTP session.
+
+    Returns one send_email()-style result per message, in order.
+    """
+    messages = list(messages)
+    cfg = _smtp_config()
 
     # ---- Simulated mode if credentials missing --------------------------
-    if not smtp_host or not smtp_user or not smtp_pass:
-        LOGS_DIR.mkdir(parents=True, exist_ok=True)
-        evidence_path = LOGS_DIR / f"email_simulated_{_ts_slug()}.json"
-        evidence = {
-            "ts": _utc_ts(),
-            "mode": "simulated",
-            "to": to,
-            "subject": subject,
-            "body": body,
-            "reason": "not_configured",
-            "missing": [
-                k for k, v in {
-                    "SMTP_HOST": smtp_host,
-                    "SMTP_USER": smtp_user,
-                    "SMTP_PASS": smtp_pass,
-                }.items() if not v
-            ],
-        }
+    if cfg["missing"]:
+        return [_write_simulated(m["to"], m["subject"], m["body"], cfg["missing"]) for m in messages]
+
+    # ---- Real SMTP send -------------------------------------------------
+    results: list[dict] = []
+    server, reused = None, False
+    connect_error: Exception | None = None
+    for m in messages:
+        _log_attempt(cfg, m["to"], m["subject"])
+        while True:
+            if server is None and connect_error is None:
+                try:
+                    server, reused = _pool.acquire(cfg)
+                except Exception as exc:
+                    connect_error = exc  # cannot connect or log in: same outcome for the rest
+            if connect_error is not None:
+                results.append(_failed(m["to"], connect_error))
+                break
+            try:
+                server.sendmail(cfg["from"], [m["to"]], _build_message(cfg["from"], m["to"], m["subject"], m["body"]))
+                results.append(_sent(m["to"], m["subject"]))
+                reused = True
+                break
+            except Exception as exc:
+                if _session_broken(exc):
+                    _quit(server)
+                    server, stale = None, reused
+                    if stale:
+                        continue  # session had worked, server dropped it: reconnect once
+                results.append(_failed(m["to"], exc))
+                break
+    if server is not None:
+        _pool.release(cfg, server)
+    return results
+
+
+async def send_many_async(messages: Iterable[dict], concurrency: int | None = None) -> list[dict]:
+    """send_many() over up to concurrency sessions at once (default SMTP_POOL_SIZE).
+
+    Needs aiosmtplib; without it the batch goes through send_many() in a
+    worker thread. Results are in message order.
+    """
+    messages = list(messages)
+    cfg = _smtp_config()
+    if cfg["missing"] or aiosmtplib is None:
+        return await asyncio.to_thread(send_many, messages)
+
+    results: list[dict] = [{}] * len(messages)
+    pending = iter(range(len(messages)))  # shared by the workers (one event loop)
+
+    async def _open():
+        client = aiosmtplib.SMTP(
+            hostname=cfg["host"], port=cfg["port"], timeout=TIMEOUT_SECONDS, start_tls=cfg["starttls"]
+        )
+        await client.connect()
+        await client.login(cfg["user"], cfg["password"])  # password NOT logged
+        return client
+
+    async def _close(client) -> None:
         try:
-            evidence_path.write_text(json.dumps(evidence, indent=2), encoding="utf-8")
+            await client.quit()
         except Exception:
-            pass
-        _append_log(
-            f"{_utc_ts()} - email_send_attempt | simulated | not_configured | to={to}\n"
-        )
-        _log_event("email_send_simulated", {
-            "to": to, "subject": subject, "evidence": str(evidence_path)
-        })
-        return {
-            "ok": False,
-            "reason": "not_configured",
-            "evidence_path": str(evidence_path),
-        }
+            client.close()
 
-    # ---- Real SMTP send -------------------------------------------------
-    _append_log(f"{_utc_ts()} - email_send_attempt | live | to={to} | from={smtp_from}\n")
-    _log_event("email_send_attempt", {"to": to, "subject": subject, "smtp_host": smtp_host})
+    async def _worker() -> None:
+        client, reused, connect_error = None, False, None
+        try:
+            for i in pending:
+                m = messages[i]
+                _log_attempt(cfg, m["to"], m["subject"])
+                while True:
+                    if client is None and connect_error is None:
+                        try:
+                            client, reused = await _open(), False
+                        except Exception as exc:
+                            connect_error = exc
+                    if connect_error is not None:
+                        results[i] = _failed(m["to"], connect_error)
+                        break
+                    try:
+                        await client.sendmail(
+                            cfg["from"], [m["to"]], _build_message(cfg["from"], m["to"], m["subject"], m["body"])
+                        )
+                        results[i] = _sent(m["to"], m["subject"])
+                        reused = True
+                        break
+                    except Exception as exc:
+                        if _session_broken(exc):
+                            await _close(client)
+                            client, stale = None, reused
+                            if stale:
+                                continue
+                        results[i] = _failed(m["to"], exc)
+                        break
+        finally:
+            if client is not None:
+                await _close(client)
 
-    try:
-        msg = MIMEMultipart("alternative")
-        msg["Subject"] = subject
-        msg["From"] = smtp_from
-        msg["To"] = to
-        msg.attach(MIMEText(body, "plain"))
+    workers = max(1, min(concurrency or POOL_SIZE or 1, len(messages)))
+    await asyncio.gather(*(_worker() for _ in range(workers)))
+    return results
 
-        with smtplib.SMTP(smtp_host, smtp_port, timeout=15) as server:
-            server.ehlo()
-            server.starttls()
-            server.login(smtp_user, smtp_pass)  # password NOT logged
-            server.sendmail(smtp_from, [to], msg.as_string())
-
-        _append_log(f"{_utc_ts()} - email_send_success | to={to}\n")
-        _log_event("email_send_success", {"to": to, "subject": subject})
-        return {"ok": True}
-
-    except Exception as exc:
-        _append_log(f"{_utc_ts()} - email_send_error | to={to} | {exc}\n")
-        _log_event("email_send_error", {"to": to, "reason": str(exc)})
-        return {"ok": False, "reason": str(exc)}
+
+def queue_email(to: str, subject: str, body: str, key: str | None = None) -> dict | None:
+    """Put an email in the outbox (idempotent on key; default: hash of the message)."""
+    if key is None:
+        digest = hashlib.sha1(f"{to}\n{subject}\n{body}".encode("utf-8")).hexdigest()[:16]
+        key = f"{OUTBOX_KIND}:{digest}"
+    row = outbox.enqueue(OUTBOX_KIND, key, {"to": to, "subject": subject, "body": body})
+    _log_event("email_queued", {"to": to, "subject": subject, "key": key})
+    return row
+
+
+def send_due_emails(concurrency: int = 1) -> list[tuple[dict, dict]]:
+    """Send every queued email whose next attempt is due. Returns [(row, result)]."""
+    return outbox.run_due(OUTBOX_KIND, lambda p: send_email(p["to"], p["subject"], p["body"]), concurrency)
@@ -2,15 +2,25 @@
 
 Used by agent.py, approve.py, post_approved.py instead of raw file calls.
 Maintains backward compatibility with mcp_server.py names.
+Re-exports the vault root (mcp_vault.py): VAULT_ROOT.
 """
 
 from __future__ import annotations
 
+import errno
+import fnmatch
+import itertools
 import json
+import os
+import re
 import shutil
+import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
 
+import mcp_state_store as state_store
+from mcp_vault import VAULT_ROOT
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -51,6 +61,69 @@ def write_file(path: str | Path, content: str) -> bool:
         return False
 
 
+def unique_path(folder: str | Path, name: str) -> Path:
+    """Return folder/name, or folder/<stem>_<k><suffix> if that name is taken."""
+    folder = Path(folder)
+    dest = folder / name
+    k = 2
+    while dest.exists():
+        dest = folder / f"{Path(name).stem}_{k}{Path(name).suffix}"
+        k += 1
+    return dest
+
+
+def write_many(folder: str | Path, items: list[tuple[str, str]]) -> list[str]:
+    """Write a batch of (filename, content) files into folder.
+
+    Each file is written to a temp name and hard-linked into place, so readers
+    never see a partial file and an existing file is never overwritten — even
+    by a concurrent writer (the link fails and the next free name from
+    unique_path() is tried). Stops at the first failure. Tasks written into a
+    state folder are recorded in the state index (mcp_state_store).
+    Returns the filenames actually written, in order.
+    """
+    folder = Path(folder)
+    written: list[str] = []
+    tmp = None
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        for name, content in items:
+            tmp = folder / f".{name}.{os.getpid()}.tmp"
+            tmp.write_text(content, encoding="utf-8")
+            while True:
+                dest = unique_path(folder, name)
+                try:
+                    os.link(tmp, dest)
+                    break
+                except FileExistsError:
+                    continue  # lost a race for this name; pick the next one
+            tmp.unlink()
+            written.append(dest.name)
+    except Exception:
+        if tmp is not None and tmp.exists():
+            tmp.unlink(missing_ok=True)
+    _index_files([(None, folder / name) for name in written])
+    return written
+
+
+def _index_files(changes: list[tuple[Path | None, Path]]) -> None:
+    """Mirror (src or None, dst) writes/moves of *.md tasks into the state index."""
+    if not state_store.enabled() or not changes:
+        return
+    try:
+        with state_store.transaction() as conn:
+            for src, dst in changes:
+                if dst.suffix != ".md":
+                    continue
+                state = state_store.state_of(dst)
+                if state is not None:
+                    state_store.record(dst.name, state, path=dst, moved_from=src, conn=conn)
+                elif src is not None and state_store.state_of(src) is not None:
+                    state_store.forget(src.name, state_store.state_of(src), conn=conn)
+    except Exception:
+        pass  # folders are authoritative; state_store.reconcile() repairs the index
+
+
 def append_file(path: str | Path, content: str) -> bool:
     """Append content to a file. Creates parent dirs if needed."""
     try:
@@ -89,6 +162,452 @@ def copy_file(src: str | Path, dst: str | Path) -> bool:
         return False
 
 
+# ---------------------------------------------------------------------------
+# Bulk moves (rename when possible, journaled for crash recovery)
+# ---------------------------------------------------------------------------
+#
+# move_many() writes the whole batch to Logs/.move_journal_<pid>_<n>.json
+# before touching any file and deletes it when the batch is done. If the
+# process dies mid-batch, the next move_many() (or recover_moves()) finds the
+# journal of a dead process and rolls it forward: every source that still
+# exists is moved to its destination. Each single move is atomic — a rename,
+# or for cross-device moves a streamed copy to a temp name, fsync and rename —
+# so a destination is never half-written and rolling forward is always safe.
+
+MOVE_JOURNAL_DIR = VAULT_ROOT / "Logs"
+COPY_CHUNK = 1024 * 1024
+
+_journal_seq = itertools.count(1)
+
+
+def _fsync_dir(folder: Path) -> None:
+    try:
+        fd = os.open(folder, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows: directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _move_one(src: Path, dst: Path) -> str:
+    """Move src to dst atomically. Returns "rename" or "copy"; raises on failure."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(src, dst)
+        return "rename"
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+    # Different filesystem: stream the bytes, never loading the file whole.
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.part")
+    try:
+        with open(src, "rb") as fin, open(tmp, "wb") as fout:
+            shutil.copyfileobj(fin, fout, COPY_CHUNK)
+            fout.flush()
+            os.fsync(fout.fileno())
+        shutil.copystat(src, tmp)
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    src.unlink()
+    return "copy"
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (OSError, AttributeError):
+        return True  # cannot tell (permissions / platform): leave it alone
+    return True
+
+
+def recover_moves(journal_dir: str | Path = MOVE_JOURNAL_DIR) -> int:
+    """Roll forward batches left behind by crashed processes. Returns files moved."""
+    moved = 0
+    for journal in sorted(Path(journal_dir).glob(".move_journal_*.json")):
+        try:
+            entry = json.loads(journal.read_text(encoding="utf-8"))
+            if _pid_alive(int(entry.get("pid", 0))):
+                continue
+            for src, dst in entry.get("moves", []):
+                if Path(src).exists():
+                    _move_one(Path(src), Path(dst))
+                    moved += 1
+            journal.unlink()
+        except Exception:
+            continue  # leave the journal for the next attempt
+    return moved
+
+
+def move_many(
+    moves: list[tuple[str | Path, str | Path]],
+    journal_dir: str | Path = MOVE_JOURNAL_DIR,
+    index: bool = True,
+) -> dict:
+    """Move a batch of (src, dst) files with one journal and one result.
+
+    Uses os.replace (a rename) when src and dst share a filesystem, and a
+    streamed copy + fsync + rename across devices. Missing sources and
+    individual failures are reported, not raised. Moved tasks are recorded in
+    the state index unless index=False (transition_many records its own).
+
+    Returns {"moved": [(src, dst)], "failed": [(src, error)], "renamed": n,
+             "copied": n, "bytes": n, "recovered": n}.
+    """
+    result = {"moved": [], "failed": [], "renamed": 0, "copied": 0, "bytes": 0, "recovered": 0}
+    moves = [(Path(s), Path(d)) for s, d in moves]
+    journal_dir = Path(journal_dir)
+    result["recovered"] = recover_moves(journal_dir)
+    if not moves:
+        return result
+
+    journal = journal_dir / f".move_journal_{os.getpid()}_{next(_journal_seq)}.json"
+    try:
+        journal_dir.mkdir(parents=True, exist_ok=True)
+        with open(journal, "w", encoding="utf-8") as f:
+            json.dump(
+                {"pid": os.getpid(), "ts": utc_ts(),
+                 "moves": [[str(s), str(d)] for s, d in moves]},
+                f,
+            )
+            f.flush()
+            os.fsync(f.fileno())
+    except Exception:
+        journal = None  # still move; just without crash recovery
+
+    touched: set[Path] = set()
+    for src, dst in moves:
+        try:
+            size = src.stat().st_size
+            how = _move_one(src, dst)
+            result["renamed" if how == "rename" else "copied"] += 1
+            result["bytes"] += size
+            result["moved"].append((src, dst))
+            touched.update((src.parent, dst.parent))
+        except Exception as exc:
+            result["failed"].append((src, repr(exc)))
+
+    for folder in touched:
+        _fsync_dir(folder)
+    if journal is not None:
+        journal.unlink(missing_ok=True)
+    if index:
+        _index_files(result["moved"])
+    return result
+
+
+# ---------------------------------------------------------------------------
+# State-aware ops (mirror folder moves into mcp_state_store when enabled)
+# ---------------------------------------------------------------------------
+
+def transition_task(
+    src: str | Path,
+    dst: str | Path,
+    state: str,
+    *,
+    task_id: str | None = None,
+    **meta,
+) -> bool:
+    """Move src to dst and record the task's new state in one transaction.
+
+    With the state store disabled this is exactly move_file(). With it enabled,
+    the row update is rolled back if the move fails, so the index never claims
+    a state the folders do not show. Extra keyword args (path, content_hash,
+    channel, artefacts) are passed through to state_store.record(); path
+    defaults to dst and the row for src is carried over.
+    """
+    if not state_store.enabled():
+        return move_file(src, dst)
+    moved = False
+    try:
+        with state_store.transaction() as conn:
+            meta.setdefault("path", dst)
+            meta.setdefault("moved_from", src)
+            state_store.record(task_id or Path(dst).name, state, conn=conn, **meta)
+            moved = move_file(src, dst)
+            if not moved:
+                raise OSError(f"move failed: {src} -> {dst}")
+        return True
+    except Exception:
+        # Folders are authoritative: if only the index failed, still move.
+        return moved or move_file(src, dst)
+
+
+def transition_many(
+    moves: list[tuple[str | Path, str | Path, dict]],
+    state: str,
+) -> dict:
+    """Bulk transition_task(): move_many() plus one index transaction.
+
+    Each item is (src, dst, meta); meta may hold task_id and any
+    state_store.record() keyword (path defaults to dst). Only files that
+    actually moved are recorded. Returns move_many()'s result.
+    """
+    result = move_many([(src, dst) for src, dst, _meta in moves], index=False)
+    if not state_store.enabled() or not result["moved"]:
+        return result
+    moved = {str(src) for src, _dst in result["moved"]}
+    try:
+        with state_store.transaction() as conn:
+            for src, dst, meta in moves:
+                if str(Path(src)) not in moved:
+                    continue
+                meta = dict(meta)
+                task_id = meta.pop("task_id", None) or Path(dst).name
+                meta.setdefault("path", dst)
+                meta.setdefault("moved_from", src)
+                state_store.record(task_id, state, conn=conn, **meta)
+    except Exception:
+        pass  # folders are authoritative; state_store.reconcile() repairs the index
+    return result
+
+
+def list_tasks_in_state(folder: str | Path, prefix: str = "") -> list[str]:
+    """List *.md task files in a state folder, via the state index when enabled.
+
+    Falls back to a directory scan when the store is disabled.
+    """
+    folder = Path(folder)
+    if state_store.enabled():
+        return state_store.list_state(folder.name, prefix)
+    return list_files(folder, f"{prefix}*.md")
+
+
+# ---------------------------------------------------------------------------
+# Front-matter metadata (header-only reads)
+# ---------------------------------------------------------------------------
+#
+# Pending_Approval/ and Approved/ files start with a small front-matter block:
+#
+#   ---
+#   hash: "ec417a5820f7"
+#   channel: "gmail"
+#   skills: {"plan": "openai_ok", "summary": "openai_ok"}
+#   ---
+#
+# Each value is JSON, which keeps the block valid YAML (Obsidian shows it as
+# properties) while parsing with nothing but json.loads. Workflow state is not
+# stored here — it would go stale as files move; the folder is the state.
+
+FRONT_MATTER_MAX_BYTES = 4096
+
+
+def render_front_matter(meta: dict) -> str:
+    """Render meta as a front-matter block (one `key: <json>` line per field)."""
+    lines = [f"{k}: {json.dumps(v, sort_keys=True)}" for k, v in meta.items()]
+    return "---\n" + "\n".join(lines) + "\n---\n\n"
+
+
+def parse_front_matter(text: str) -> dict:
+    """Parse a leading front-matter block. Returns {} if there is none."""
+    if not text.startswith("---\n"):
+        return {}
+    end = text.find("\n---", 4)
+    if end == -1:
+        return {}
+    meta: dict = {}
+    for line in text[4:end].splitlines():
+        key, sep, raw = line.partition(":")
+        if not sep:
+            continue
+        raw = raw.strip()
+        try:
+            meta[key.strip()] = json.loads(raw)
+        except ValueError:
+            meta[key.strip()] = raw
+    return meta
+
+
+def strip_front_matter(text: str) -> str:
+    """Return text without its leading front-matter block."""
+    if not text.startswith("---\n"):
+        return text
+    end = text.find("\n---", 4)
+    if end == -1:
+        return text
+    return text[end + 4:].lstrip("\n")
+
+
+def read_front_matter(path: str | Path, max_bytes: int = FRONT_MATTER_MAX_BYTES) -> dict:
+    """Read only the first max_bytes of a file and parse its front matter."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(max_bytes)
+        return parse_front_matter(head.decode("utf-8", errors="ignore"))
+    except Exception:
+        return {}
+
+
+def folder_metadata(
+    folder: str | Path,
+    pattern: str = "*.md",
+    index_path: str | Path | None = None,
+) -> dict[str, dict]:
+    """Return {filename: front-matter} for every file in folder matching pattern.
+
+    Backed by a cached index of the folder's *.md files (default
+    Logs/.meta_index_<folder>.json) keyed on each file's mtime and size: unchanged files cost one stat, changed files
+    one header read. File bodies are never read. Each dict also carries
+    "state": the folder's name, since the folder a file is in is its state.
+    """
+    folder = Path(folder)
+    if not folder.is_dir():
+        return {}
+    if index_path is None:
+        index_path = folder.parent / "Logs" / f".meta_index_{folder.name}.json"
+    index_path = Path(index_path)
+
+    try:
+        cached = json.loads(index_path.read_text(encoding="utf-8"))
+    except Exception:
+        cached = {}
+
+    fresh: dict[str, dict] = {}
+    dirty = False
+    for name in list_files(folder, "*.md"):
+        try:
+            st = os.stat(folder / name)
+        except OSError:
+            continue
+        entry = cached.get(name)
+        if entry and entry.get("mtime_ns") == st.st_mtime_ns and entry.get("size") == st.st_size:
+            fresh[name] = entry
+            continue
+        fresh[name] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "meta": read_front_matter(folder / name),
+        }
+        dirty = True
+
+    if dirty or len(fresh) != len(cached):
+        write_file(index_path, json.dumps(fresh, sort_keys=True))
+    return {
+        name: {**entry["meta"], "state": folder.name}
+        for name, entry in fresh.items()
+        if fnmatch.fnmatchcase(name, pattern)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Date-sharded layout + archive lookup (Done/, Plans/)
+# ---------------------------------------------------------------------------
+#
+# With VAULT_SHARDING=true new files land in <folder>/YYYY/MM/DD/<name> so the
+# top-level directory stays small. archiver.py later compacts old day shards
+# into <folder>/_archive/YYYY-MM.zip and records each file in
+# <folder>/_archive/manifest.jsonl. locate_file() / read_located() hide the
+# layout: callers ask for a name and get the live path or the archived copy.
+
+ARCHIVE_DIRNAME = "_archive"
+_NAME_DATE_RE = re.compile(r"(20\d{2})-?(\d{2})-?(\d{2})(?:_\d{6})?")
+_manifest_cache: dict[str, tuple[float, dict]] = {}
+
+
+def sharding_enabled() -> bool:
+    return os.getenv("VAULT_SHARDING", "false").strip().lower() in ("true", "1", "yes")
+
+
+def shard_path(folder: str | Path, name: str, when: datetime | None = None) -> Path:
+    """Return <folder>/YYYY/MM/DD/<name> for when (default: now, UTC)."""
+    when = when or datetime.now(timezone.utc)
+    return Path(folder) / when.strftime("%Y") / when.strftime("%m") / when.strftime("%d") / name
+
+
+def sharded_dest(folder: str | Path, name: str) -> Path:
+    """Destination for a new file: today's shard if sharding is on, else flat."""
+    if sharding_enabled():
+        return shard_path(folder, name)
+    return Path(folder) / name
+
+
+def name_date(name: str) -> datetime | None:
+    """Date embedded in a vault filename (YYYYMMDD_HHMMSS or YYYY-MM-DD), if any."""
+    m = _NAME_DATE_RE.search(name)
+    if not m:
+        return None
+    try:
+        return datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)), tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+def archive_manifest(folder: str | Path) -> dict[str, dict]:
+    """Return {name: manifest entry} for files archived out of folder (cached on mtime)."""
+    manifest = Path(folder) / ARCHIVE_DIRNAME / "manifest.jsonl"
+    try:
+        mtime = manifest.stat().st_mtime
+    except OSError:
+        return {}
+    key = str(manifest)
+    cached = _manifest_cache.get(key)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    entries: dict[str, dict] = {}
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry["name"]] = entry
+    _manifest_cache[key] = (mtime, entries)
+    return entries
+
+
+def locate_file(folder: str | Path, name: str) -> Path | None:
+    """Find a live file by name in a flat or date-sharded folder.
+
+    Checks, in order: the flat path, the shard implied by a date in the name,
+    today's shard, and the state store's recorded path. Returns None if the
+    file is not live (it may still be archived — see read_located()).
+    """
+    folder = Path(folder)
+    candidates = [folder / name]
+    when = name_date(name)
+    if when:
+        candidates.append(shard_path(folder, name, when))
+    candidates.append(shard_path(folder, name))
+    for c in candidates:
+        if c.is_file():
+            return c
+    row = state_store.get(name, folder.name if folder.name in state_store.STATES else None)
+    if row.get("path"):
+        p = folder.parent / row["path"]
+        if p.is_file() and p.is_relative_to(folder):
+            return p
+    return None
+
+
+def read_located(folder: str | Path, name: str) -> str:
+    """Read a file by name from its live location or from the monthly archive."""
+    live = locate_file(folder, name)
+    if live is not None:
+        return read_file(live)
+    entry = archive_manifest(folder).get(name)
+    if not entry:
+        return ""
+    try:
+        with zipfile.ZipFile(Path(folder) / ARCHIVE_DIRNAME / entry["archive"]) as zf:
+            return zf.read(entry["path"]).decode("utf-8", errors="ignore")
+    except Exception:
+        return ""
+
+
+def file_known(folder: str | Path, name: str) -> bool:
+    """True if name is live in folder (any layout) or recorded in its archive."""
+    return locate_file(folder, name) is not None or name in archive_manifest(folder)
+
+
 # ---------------------------------------------------------------------------
 # Structured event logging (JSONL)
 # ---------------------------------------------------------------------------
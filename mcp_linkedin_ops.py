@@ -8,23 +8,82 @@ Behaviour:
       returns {"ok": false, "reason": "...", "evidence_path": "..."}
   - NEVER crashes regardless of credential state.
   - All attempts logged to run_log.md and Logs/events_<date>.jsonl.
+
+Live calls:
+  - One pooled requests.Session per process (keep-alive, up to
+    LINKEDIN_POOL_SIZE connections, default 8), safe to share between the
+    posting threads of post_approved.py.
+  - Per-account token bucket (keyed by LINKEDIN_PERSON_URN) matched to the
+    member UGC quota: LINKEDIN_RATE_PER_DAY (default 150) refilled evenly,
+    bursts up to LINKEDIN_RATE_BURST (default 10). State lives in
+    Logs/linkedin_rate.json (flock'd), so the quota holds across runs and
+    processes. A 429 Retry-After blocks the account there too. When no
+    token frees up within LINKEDIN_RATE_MAX_WAIT seconds (default 30) the
+    call returns reason "rate_limited" without sending anything.
+  - A UGC POST is not idempotent, so only failures where LinkedIn cannot
+    have created the post are resent: 429, 503 and connect-phase errors
+    (connection refused, DNS, connect timeout). They are retried up to
+    LINKEDIN_MAX_RETRIES times (default 3) with full-jitter exponential
+    backoff from LINKEDIN_BACKOFF_SECONDS (default 1), never sooner than
+    Retry-After; a wait beyond LINKEDIN_BACKOFF_MAX_SECONDS (default 60) is
+    not slept but returned to the caller. Other 4xx are permanent and not
+    retried. Failures carry "retryable" and "attempts".
+  - A read timeout, a connection lost after sending, or 500/502/504 leaves
+    it unknown whether the post went live. Such an attempt is not resent
+    here: the result is retryable with "ambiguous": True, and the next try
+    (the outbox, on a later run) settles it — LinkedIn answers a repeated
+    text with 422 "Content is a duplicate of <urn>", which create_post()
+    reports as success with "already_posted": True.
+  - LINKEDIN_API_BASE (default https://api.linkedin.com) points the client
+    elsewhere, e.g. at fake_linkedin_server.py.
 """
 
 from __future__ import annotations
 
 import json
 import os
+import random
+import re
+import threading
+import time
 from datetime import datetime, timezone
-from pathlib import Path
+from email.utils import parsedate_to_datetime
+
+from mcp_vault import VAULT_ROOT
 
 try:
     import requests as _requests
 except ImportError:
     _requests = None  # type: ignore
 
-BASE_DIR = Path(__file__).resolve().parent
+try:
+    import fcntl
+except ImportError:  # Windows: the rate state is guarded per process only
+    fcntl = None  # type: ignore
+
+BASE_DIR = VAULT_ROOT
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
+RATE_FILE = LOGS_DIR / "linkedin_rate.json"
+RATE_LOCK_FILE = LOGS_DIR / "linkedin_rate.lock"
+
+API_BASE = os.getenv("LINKEDIN_API_BASE", "https://api.linkedin.com").strip().rstrip("/")
+TIMEOUT_SECONDS = float(os.getenv("LINKEDIN_TIMEOUT_SECONDS", "15"))
+POOL_SIZE = max(1, int(os.getenv("LINKEDIN_POOL_SIZE", "8")))
+RATE_PER_DAY = float(os.getenv("LINKEDIN_RATE_PER_DAY", "150"))
+RATE_BURST = max(1.0, float(os.getenv("LINKEDIN_RATE_BURST", "10")))
+RATE_MAX_WAIT = float(os.getenv("LINKEDIN_RATE_MAX_WAIT", "30"))
+MAX_RETRIES = max(0, int(os.getenv("LINKEDIN_MAX_RETRIES", "3")))
+BACKOFF_SECONDS = float(os.getenv("LINKEDIN_BACKOFF_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LINKEDIN_BACKOFF_MAX_SECONDS", "60"))
+RETRYABLE_STATUS = {429, 503}        # rejected before anything was created: safe to resend
+AMBIGUOUS_STATUS = {500, 502, 504}   # the post may or may not have been created
+_CONNECT_ERRORS = {"NewConnectionError", "NameResolutionError", "ConnectTimeoutError"}
+DUPLICATE_RE = re.compile(r"duplicate", re.IGNORECASE)
+POST_URN_RE = re.compile(r"urn:li:(?:share|ugcPost):\d+")
+
+_lock = threading.Lock()
+_session = None
 
 
 # ---------------------------------------------------------------------------
@@ -63,7 +122,19 @@ def _log_event(event_type: str, data: dict) -> None:
 def _write_simulated_evidence(reason: str, text: str, token_present: bool, urn_present: bool) -> str:
     """Write simulated evidence JSON and return its path."""
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
-    evidence_path = LOGS_DIR / f"linkedin_simulated_{_ts_slug()}.json"
+    slug = _ts_slug()
+    evidence_path = LOGS_DIR / f"linkedin_simulated_{slug}.json"
+    n = 1
+    while True:
+        # Concurrent posts within one second each get their own file
+        try:
+            with open(evidence_path, "x", encoding="utf-8"):
+                break
+        except FileExistsError:
+            n += 1
+            evidence_path = LOGS_DIR / f"linkedin_simulated_{slug}_{n}.json"
+        except Exception:
+            break
     evidence = {
         "ts": _utc_ts(),
         "mode": "simulated",
@@ -79,27 +150,166 @@ def _write_simulated_evidence(reason: str, text: str, token_present: bool, urn_p
     return str(evidence_path)
 
 
+# ---------------------------------------------------------------------------
+# Session pool
+# ---------------------------------------------------------------------------
+
+def _get_session():
+    """The process-wide pooled Session (created on first use)."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = _requests.Session()
+            adapter = _requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+# ---------------------------------------------------------------------------
+# Per-account rate limit (token bucket, persisted)
+# ---------------------------------------------------------------------------
+
+def _update_rate_state(fn):
+    """Run fn(state) -> result on Logs/linkedin_rate.json under a lock; save and return."""
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
+    with _lock, open(RATE_LOCK_FILE, "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            try:
+                state = json.loads(RATE_FILE.read_text(encoding="utf-8"))
+            except Exception:
+                state = {}
+            result = fn(state)
+            tmp = RATE_FILE.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
+            os.replace(tmp, RATE_FILE)
+            return result
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _try_take(account: str) -> float:
+    """Take one token for account. Returns 0, or seconds until one is available."""
+    def take(state: dict) -> float:
+        now = time.time()
+        bucket = state.setdefault(account, {"tokens": RATE_BURST, "ts": now, "blocked_until": 0})
+        elapsed = max(0.0, now - bucket.get("ts", now))
+        bucket["tokens"] = min(RATE_BURST, bucket.get("tokens", RATE_BURST) + elapsed * RATE_PER_DAY / 86400)
+        bucket["ts"] = now
+        blocked = bucket.get("blocked_until", 0) - now
+        if blocked > 0:
+            return blocked
+        if bucket["tokens"] >= 1:
+            bucket["tokens"] -= 1
+            return 0.0
+        return (1 - bucket["tokens"]) * 86400 / RATE_PER_DAY
+    if RATE_PER_DAY <= 0:
+        return 0.0
+    try:
+        return _update_rate_state(take)
+    except Exception:
+        return 0.0  # fail open
+
+
+def _block_account(account: str, seconds: float) -> None:
+    """Record a server-imposed pause (429 Retry-After) for account."""
+    def block(state: dict) -> None:
+        bucket = state.setdefault(account, {"tokens": 0.0, "ts": time.time(), "blocked_until": 0})
+        bucket["blocked_until"] = max(bucket.get("blocked_until", 0), time.time() + seconds)
+    try:
+        _update_rate_state(block)
+    except Exception:
+        pass
+
+
+def _acquire_rate(account: str) -> float:
+    """Wait up to RATE_MAX_WAIT for a token. Returns 0 once taken, else the remaining wait."""
+    deadline = time.monotonic() + RATE_MAX_WAIT
+    while True:
+        wait = _try_take(account)
+        if wait <= 0:
+            return 0.0
+        if time.monotonic() + wait > deadline:
+            return wait
+        time.sleep(wait)
+
+
+# ---------------------------------------------------------------------------
+# Retries
+# ---------------------------------------------------------------------------
+
+def _retry_after(resp) -> float:
+    """Seconds from a Retry-After header (delta or HTTP date); 0 if absent."""
+    value = (resp.headers.get("Retry-After") or "").strip() if resp is not None else ""
+    if not value:
+        return 0.0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _maybe_delivered(exc: Exception) -> bool:
+    """False only when the request certainly never reached LinkedIn (connect phase)."""
+    if isinstance(exc, _requests.ConnectTimeout):
+        return False
+    if isinstance(exc, _requests.Timeout):
+        return True  # read timeout: the POST went out
+    cause = exc.args[0] if exc.args else None
+    cause = getattr(cause, "reason", cause)  # urllib3 MaxRetryError -> underlying error
+    return type(cause).__name__ not in _CONNECT_ERRORS
+
+
+def _backoff(attempt: int, retry_after: float) -> float:
+    """Full-jitter exponential delay before retry number attempt, at least retry_after."""
+    ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * (2 ** (attempt - 1)))
+    return max(retry_after, random.uniform(0, ceiling))
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
+def posting_mode() -> str:
+    """"live", or the reason create_post() would simulate: "simulated_mode" / "not_configured"."""
+    token = os.getenv("LINKEDIN_ACCESS_TOKEN", "").strip()
+    person_urn = os.getenv("LINKEDIN_PERSON_URN", "").strip()
+    if os.getenv("LINKEDIN_SIMULATED", "true").strip().lower() in ("true", "1", "yes"):
+        return "simulated_mode"
+    if not token or not person_urn:
+        return "not_configured"
+    return "live"
+
+
 def create_post(text: str) -> dict:
     """Post text to LinkedIn.
 
     Returns:
         {"ok": True, "post_id": "..."}               on real success
+        {"ok": True, "post_id": "...", "already_posted": True}  text already live (422 duplicate)
         {"ok": False, "reason": "...", "evidence_path": "..."}  on simulated / error
+        {"ok": False, ..., "retryable": True, "ambiguous": True}  outcome unknown, not resent
     """
     token = os.getenv("LINKEDIN_ACCESS_TOKEN", "").strip()
     person_urn = os.getenv("LINKEDIN_PERSON_URN", "").strip()
-    simulated_flag = os.getenv("LINKEDIN_SIMULATED", "true").strip().lower() in ("true", "1", "yes")
+    mode = posting_mode()
 
     token_present = bool(token)
     urn_present = bool(person_urn)
 
     # ---- Simulated mode ------------------------------------------------
-    if not token or not person_urn or simulated_flag:
-        reason = "simulated_mode" if simulated_flag else "not_configured"
+    if mode != "live":
+        reason = mode
         evidence_path = _write_simulated_evidence(reason, text, token_present, urn_present)
         _append_log(
             f"{_utc_ts()} - linkedin_post_attempt | mode=simulated | reason={reason}\n"
@@ -115,7 +325,7 @@ def create_post(text: str) -> dict:
         return {"ok": False, "reason": reason}
 
     # ---- Live API call -------------------------------------------------
-    url = "https://api.linkedin.com/v2/ugcPosts"
+    url = f"{API_BASE}/v2/ugcPosts"
     headers = {
         "Authorization": f"Bearer {token}",
         "Content-Type": "application/json",
@@ -138,28 +348,73 @@ def create_post(text: str) -> dict:
     _append_log(f"{_utc_ts()} - linkedin_post_attempt | mode=live\n")
     _log_event("linkedin_post_attempt", {"mode": "live"})
 
-    try:
-        resp = _requests.post(url, headers=headers, json=payload, timeout=15)
-        if resp.status_code in (200, 201):
-            post_id = resp.headers.get("x-restli-id", "unknown")
-            _append_log(f"{_utc_ts()} - linkedin_post_success | post_id={post_id}\n")
-            _log_event("linkedin_post_success", {"post_id": post_id})
-            return {"ok": True, "post_id": post_id}
+    session = _get_session()
+    attempt = 0
+    while True:
+        wait = _acquire_rate(person_urn)
+        if wait > 0:
+            _append_log(f"{_utc_ts()} - linkedin_post_error | rate_limited | retry_after={wait:.0f}s\n")
+            _log_event("linkedin_post_error", {"reason": "rate_limited", "retry_after": round(wait, 1)})
+            return {"ok": False, "reason": "rate_limited", "retryable": True,
+                    "attempts": attempt, "retry_after": round(wait, 1)}
+        attempt += 1
+
+        resp = None
+        ambiguous = False
+        try:
+            resp = session.post(url, headers=headers, json=payload, timeout=TIMEOUT_SECONDS)
+        except (_requests.Timeout, _requests.ConnectionError) as exc:
+            error, retryable = f"{type(exc).__name__}: {exc}", True
+            ambiguous = _maybe_delivered(exc)
+        except Exception as exc:
+            _append_log(f"{_utc_ts()} - linkedin_post_error | {exc}\n")
+            _log_event("linkedin_post_error", {"reason": str(exc)})
+            return {"ok": False, "reason": str(exc), "retryable": False, "attempts": attempt}
         else:
-            body_preview = resp.text[:300]
+            if resp.status_code in (200, 201):
+                post_id = resp.headers.get("x-restli-id", "unknown")
+                _append_log(f"{_utc_ts()} - linkedin_post_success | post_id={post_id}\n")
+                _log_event("linkedin_post_success", {"post_id": post_id, "attempts": attempt})
+                return {"ok": True, "post_id": post_id, "attempts": attempt}
+            if resp.status_code == 422 and DUPLICATE_RE.search(resp.text or ""):
+                # This author already published this exact text — e.g. an earlier
+                # attempt timed out after LinkedIn had created the post.
+                match = POST_URN_RE.search(resp.text)
+                post_id = match.group(0) if match else "unknown"
+                _append_log(f"{_utc_ts()} - linkedin_post_already_posted | post_id={post_id}\n")
+                _log_event("linkedin_post_already_posted", {"post_id": post_id, "attempts": attempt})
+                return {"ok": True, "post_id": post_id, "already_posted": True, "attempts": attempt}
+            error = f"api_error_{resp.status_code}"
+            ambiguous = resp.status_code in AMBIGUOUS_STATUS
+            retryable = ambiguous or resp.status_code in RETRYABLE_STATUS
+
+        retry_after = _retry_after(resp)
+        if resp is not None and resp.status_code == 429 and retry_after:
+            _block_account(person_urn, retry_after)
+        delay = _backoff(attempt, retry_after)
+
+        if not retryable or ambiguous or attempt > MAX_RETRIES or delay > BACKOFF_MAX_SECONDS:
+            body_preview = resp.text[:300] if resp is not None else ""
+            status = resp.status_code if resp is not None else None
             _append_log(
-                f"{_utc_ts()} - linkedin_post_error | status={resp.status_code} | body={body_preview}\n"
+                f"{_utc_ts()} - linkedin_post_error | status={status} | attempts={attempt}"
+                f" | retryable={retryable} | body={body_preview or error}\n"
             )
             _log_event(
                 "linkedin_post_error",
-                {"status": resp.status_code, "body": body_preview},
+                {"status": status, "body": body_preview, "reason": error,
+                 "retryable": retryable, "ambiguous": ambiguous, "attempts": attempt},
             )
-            return {
-                "ok": False,
-                "reason": f"api_error_{resp.status_code}",
-                "body": body_preview,
-            }
-    except Exception as exc:
-        _append_log(f"{_utc_ts()} - linkedin_post_error | {exc}\n")
-        _log_event("linkedin_post_error", {"reason": str(exc)})
-        return {"ok": False, "reason": str(exc)}
+            result = {"ok": False, "reason": error, "body": body_preview,
+                      "retryable": retryable, "attempts": attempt}
+            if ambiguous:
+                result["ambiguous"] = True
+            if retryable:
+                result["retry_after"] = round(delay, 1)
+            return result
+
+        _append_log(
+            f"{_utc_ts()} - linkedin_post_retry | {error} | attempt={attempt} | delay={delay:.2f}s\n"
+        )
+        _log_event("linkedin_post_retry", {"reason": error, "attempt": attempt, "delay": round(delay, 2)})
+        time.sleep(delay)
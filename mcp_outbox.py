@@ -0,0 +1,410 @@
+"""MCP Outbox – durable queue of outbound actions with retry scheduling.
+
+Outbound actions (LinkedIn posts, emails) used to be retried blindly: a
+failed draft sat in Approved/ and was re-read, re-parsed and re-sent on
+every run, with no attempt count and no way to give up. Every outbound
+action now goes through one row in Logs/outbox.db:
+
+  id               row id
+  kind             "linkedin_post" | "email" | ...
+  key              unique idempotency key (e.g. linkedin_post:<draft filename>)
+  payload          JSON needed to send it (post text, recipient/subject/body)
+  ref              vault-relative reference to the source (e.g. Approved/<draft>)
+  state            pending | sent | dead
+  attempts         sends tried so far
+  next_attempt_at  epoch seconds; only rows due by now are picked
+  last_error       reason of the last failed attempt
+  result           JSON of the successful send (e.g. {"post_id": ...})
+
+Scheduling (run_due):
+  - Picks only pending rows whose next_attempt_at has passed, and leases
+    them for OUTBOX_LEASE_SECONDS (default 300) so two concurrent runs never
+    send the same row.
+  - Success -> sent. Failure -> attempts + 1 and next_attempt_at = now +
+    OUTBOX_BACKOFF_SECONDS (default 600) * 2^(attempts-1), jittered, capped at
+    OUTBOX_BACKOFF_MAX_SECONDS (default 86400), never sooner than the
+    sender's retry_after.
+  - A permanent failure (result "retryable": False) or OUTBOX_MAX_ATTEMPTS
+    (default 6) failed attempts -> dead, with an "outbox_dead_letter"
+    event and run_log line. Dead rows are never picked again until
+    requeued.
+  - Results whose reason is in DEFERRED_REASONS (simulated / not configured,
+    or throttled locally before any request) are not attempts: the row stays
+    pending and is due again next run, or after the sender's retry_after.
+
+Behaviour:
+  - SQLite in WAL mode (like mcp_state_store), one connection per process.
+  - NEVER crashes: public calls return empty results on database errors.
+
+Usage:
+  python mcp_outbox.py                 # row counts per kind and state
+  python mcp_outbox.py --list [state]  # rows (default: pending and dead)
+  python mcp_outbox.py --retry <id>    # requeue a dead row, attempts reset
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable
+
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+LOGS_DIR = BASE_DIR / "Logs"
+RUN_LOG = BASE_DIR / "run_log.md"
+OUTBOX_DB = LOGS_DIR / "outbox.db"
+
+MAX_ATTEMPTS = max(1, int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6")))
+BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "600"))
+BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "86400"))
+LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+# Nothing was sent: simulated / not configured, or the sender's own rate
+# limiter (mcp_linkedin_ops token bucket) had no token. A server 429 is an attempt.
+DEFERRED_REASONS = {"not_configured", "simulated_mode", "rate_limited"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind            TEXT NOT NULL,
+    key             TEXT NOT NULL UNIQUE,
+    payload         TEXT NOT NULL,
+    ref             TEXT,
+    state           TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error      TEXT,
+    result          TEXT,
+    created_at      TEXT NOT NULL,
+    updated_at      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(state, kind, next_attempt_at);
+"""
+
+_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def _append_log(text: str) -> None:
+    try:
+        RUN_LOG.parent.mkdir(parents=True, exist_ok=True)
+        with open(RUN_LOG, "a", encoding="utf-8") as f:
+            f.write(text)
+    except Exception:
+        pass
+
+
+def _log_event(event_type: str, data: dict) -> None:
+    try:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        events_file = LOGS_DIR / f"events_{today}.jsonl"
+        entry = {"ts": _utc_ts(), "event": event_type, **data}
+        with open(events_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception:
+        pass
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(OUTBOX_DB), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _conn = conn
+    return _conn
+
+
+def _row(r: sqlite3.Row) -> dict:
+    d = dict(r)
+    d["payload"] = json.loads(d["payload"] or "{}")
+    d["result"] = json.loads(d["result"]) if d.get("result") else None
+    return d
+
+
+def backoff_delay(attempts: int, retry_after: float = 0.0) -> float:
+    """Seconds until the next attempt after `attempts` failures (jittered 50-100%)."""
+    base = min(BACKOFF_MAX_SECONDS, BACKOFF_SECONDS * (2 ** max(0, attempts - 1)))
+    return max(float(retry_after or 0), base * random.uniform(0.5, 1.0))
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def enqueue(kind: str, key: str, payload: dict, ref: str | None = None) -> dict | None:
+    """Add an action (due now). Idempotent on key: an existing row is returned unchanged."""
+    now = _utc_ts()
+    try:
+        with _lock:
+            conn = _connect()
+            conn.execute(
+                "INSERT OR IGNORE INTO outbox (kind, key, payload, ref, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, key, json.dumps(payload), ref, time.time(), now, now),
+            )
+            row = conn.execute("SELECT * FROM outbox WHERE key = ?", (key,)).fetchone()
+        return _row(row) if row else None
+    except Exception:
+        return None
+
+
+def get_many(keys: list[str]) -> dict[str, dict]:
+    """{key: row} for the keys that have a row."""
+    out: dict[str, dict] = {}
+    try:
+        with _lock:
+            conn = _connect()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for r in conn.execute(f"SELECT * FROM outbox WHERE key IN ({marks})", chunk):
+                    out[r["key"]] = _row(r)
+    except Exception:
+        pass
+    return out
+
+
+def update_payload(key: str, payload: dict, ref: str | None = None) -> bool:
+    """Replace the payload of a pending row (e.g. its source was edited)."""
+    try:
+        with _lock:
+            cur = _connect().execute(
+                "UPDATE outbox SET payload = ?, ref = COALESCE(?, ref), updated_at = ? "
+                "WHERE key = ? AND state = 'pending'",
+                (json.dumps(payload), ref, _utc_ts(), key),
+            )
+        return bool(cur.rowcount)
+    except Exception:
+        return False
+
+
+def claim_due(
+    kind: str,
+    limit: int | None = None,
+    keep: Callable[[dict], bool] | None = None,
+) -> list[dict]:
+    """Lease and return pending rows of kind that are due, oldest due first.
+
+    Rows for which keep(row) is False are left alone (not leased, not returned).
+    """
+    now = time.time()
+    try:
+        with _lock:
+            conn = _connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT * FROM outbox WHERE state = 'pending' AND kind = ? AND next_attempt_at <= ? "
+                    "ORDER BY next_attempt_at, id LIMIT ?",
+                    (kind, now, -1 if limit is None else limit),
+                ).fetchall()
+                rows = [r for r in rows if keep is None or keep(_row(r))]
+                conn.executemany(
+                    "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                    [(now + LEASE_SECONDS, r["id"]) for r in rows],
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return [_row(r) for r in rows]
+    except Exception:
+        return []
+
+
+def release(row_id: int, retry_after: float = 0.0) -> float:
+    """Give a leased row back without counting an attempt; due again after retry_after.
+
+    Returns the new next_attempt_at.
+    """
+    next_at = time.time() + max(0.0, retry_after)
+    try:
+        with _lock:
+            _connect().execute(
+                "UPDATE outbox SET next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (next_at, _utc_ts(), row_id),
+            )
+    except Exception:
+        pass
+    return next_at
+
+
+def mark_sent(row_id: int, result: dict | None = None) -> None:
+    try:
+        with _lock:
+            _connect().execute(
+                "UPDATE outbox SET state = 'sent', attempts = attempts + 1, result = ?, "
+                "last_error = NULL, updated_at = ? WHERE id = ?",
+                (json.dumps(result or {}), _utc_ts(), row_id),
+            )
+    except Exception:
+        pass
+
+
+def mark_failed(row: dict, error: str, retryable: bool = True, retry_after: float = 0.0) -> dict:
+    """Record a failed attempt: schedule the retry, or dead-letter the row.
+
+    Returns {"state": "pending" | "dead", "attempts": n, "next_attempt_at": epoch}.
+    """
+    attempts = int(row.get("attempts", 0)) + 1
+    dead = not retryable or attempts >= MAX_ATTEMPTS
+    next_at = time.time() + (0 if dead else backoff_delay(attempts, retry_after))
+    state = "dead" if dead else "pending"
+    try:
+        with _lock:
+            _connect().execute(
+                "UPDATE outbox SET state = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+                "updated_at = ? WHERE id = ?",
+                (state, attempts, next_at, error[:500], _utc_ts(), row["id"]),
+            )
+    except Exception:
+        pass
+    info = {"kind": row["kind"], "key": row["key"], "attempts": attempts, "error": error[:300]}
+    if dead:
+        _append_log(
+            f"{_utc_ts()} - Outbox: dead_letter | {row['kind']} | {row['key']}"
+            f" | attempts={attempts} | {'permanent' if not retryable else 'max_attempts'} | {error[:200]}\n"
+        )
+        _log_event("outbox_dead_letter", {**info, "permanent": not retryable})
+    else:
+        _log_event("outbox_retry_scheduled", {**info, "next_attempt_in": round(next_at - time.time(), 1)})
+    return {"state": state, "attempts": attempts, "next_attempt_at": next_at}
+
+
+def requeue(row_id: int) -> bool:
+    """Move a dead row back to pending, attempts reset, due now."""
+    try:
+        with _lock:
+            cur = _connect().execute(
+                "UPDATE outbox SET state = 'pending', attempts = 0, next_attempt_at = ?, updated_at = ? "
+                "WHERE id = ? AND state = 'dead'",
+                (time.time(), _utc_ts(), row_id),
+            )
+        if cur.rowcount:
+            _log_event("outbox_requeued", {"id": row_id})
+        return bool(cur.rowcount)
+    except Exception:
+        return False
+
+
+def counts() -> dict[str, dict[str, int]]:
+    """{kind: {state: n}}"""
+    out: dict[str, dict[str, int]] = {}
+    try:
+        with _lock:
+            for r in _connect().execute("SELECT kind, state, COUNT(*) AS n FROM outbox GROUP BY kind, state"):
+                out.setdefault(r["kind"], {})[r["state"]] = r["n"]
+    except Exception:
+        pass
+    return out
+
+
+def run_due(
+    kind: str,
+    send: Callable[[dict], dict],
+    concurrency: int = 1,
+    limit: int | None = None,
+    keep: Callable[[dict], bool] | None = None,
+) -> list[tuple[dict, dict]]:
+    """Send every due row of kind with send(payload) -> result dict; record outcomes.
+
+    send() results follow the mcp_*_ops convention: {"ok": True, ...} or
+    {"ok": False, "reason": ..., "retryable": bool, "retry_after": s}.
+    keep(row) -> False skips a due row this time without touching it.
+    Returns [(row, result)] in completion order, with result["outbox"] = the
+    row's new state.
+    """
+    rows = claim_due(kind, limit, keep)
+    if not rows:
+        return []
+
+    def attempt(row: dict) -> dict:
+        try:
+            return send(row["payload"]) or {"ok": False, "reason": "no_result"}
+        except Exception as exc:
+            return {"ok": False, "reason": repr(exc)}
+
+    done: list[tuple[dict, dict]] = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix=f"outbox-{kind}") as pool:
+        futures = {pool.submit(attempt, row): row for row in rows}
+        for future in as_completed(futures):
+            # Recorded as each send completes, so a crash mid-run cannot resend it
+            row, result = futures[future], future.result()
+            reason = str(result.get("reason", "unknown"))
+            if result.get("ok"):
+                mark_sent(row["id"], {k: v for k, v in result.items() if k != "ok"})
+                result["outbox"] = "sent"
+            elif reason in DEFERRED_REASONS:
+                result["next_attempt_at"] = release(row["id"], float(result.get("retry_after", 0) or 0))
+                result["outbox"] = "pending"
+                result["attempts"] = int(row.get("attempts", 0))
+            else:
+                outcome = mark_failed(row, reason, bool(result.get("retryable", True)),
+                                      float(result.get("retry_after", 0) or 0))
+                result["outbox"] = outcome["state"]
+                result["attempts"] = outcome["attempts"]
+                result["next_attempt_at"] = outcome["next_attempt_at"]
+            done.append((row, result))
+    return done
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _fmt_epoch(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    if args[:1] == ["--retry"] and len(args) > 1:
+        ok = requeue(int(args[1]))
+        print(f"Requeued {args[1]}." if ok else f"No dead row with id {args[1]}.")
+        return
+    if args[:1] == ["--list"]:
+        states = args[1:] or ["pending", "dead"]
+        with _lock:
+            marks = ",".join("?" * len(states))
+            rows = _connect().execute(
+                f"SELECT * FROM outbox WHERE state IN ({marks}) ORDER BY state, next_attempt_at", states
+            ).fetchall()
+        for r in rows:
+            print(f"  [{r['id']}] {r['state']:<7} {r['kind']:<14} attempts={r['attempts']} "
+                  f"next={_fmt_epoch(r['next_attempt_at'])} {r['key']}"
+                  + (f"\n        last_error: {r['last_error']}" if r["last_error"] else ""))
+        if not rows:
+            print("  (none)")
+        return
+    summary = counts()
+    if not summary:
+        print("Outbox is empty.")
+    for kind, by_state in sorted(summary.items()):
+        print(f"  {kind:<16} " + "  ".join(f"{s}={n}" for s, n in sorted(by_state.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+"""MCP State Store – optional SQLite index of task workflow state.
+
+The vault folders (Inbox/, Needs_Action/, Pending_Approval/, Approved/, Done/)
+remain the human-readable record of where every task is. When enabled, this
+store mirrors them in Logs/state.db so listing and status queries become
+indexed lookups instead of directory scans and full file reads.
+
+Each row is one file, keyed on (state, task_id):
+  task_id       filename of the task (stable across folders)
+  content_hash  short hash of the original task text
+  state         folder name the task currently lives in
+  channel       ingestion channel (gmail / whatsapp / linkedin / manual / inbox / linkedin_draft)
+  path          vault-relative path of the current file
+  artefacts     JSON map of related files (plan, source, drafts, ...)
+  created_at / updated_at   UTC timestamps
+
+Behaviour:
+  - Disabled unless STATE_STORE_ENABLED=true — callers fall back to folder scans.
+  - SQLite in WAL mode so readers (approve.py) never block the writer (agent.py).
+  - Reads are indexed lookups only. The index is kept current by the writers:
+    transition_task()/transition_many(), move_many() and write_many() in
+    mcp_file_ops record every file they put into or take out of a state folder.
+  - Files written or moved by hand are picked up by reconcile(), a repair
+    step that re-lists the folders (date shards included): run on the first
+    open in a process when the last one is older than
+    STATE_STORE_RECONCILE_SECONDS (default 3600, 0 = only on demand), and by
+    `--reconcile` / `--rebuild`.
+  - The same filename may live in two folders (Approved/demo.md and
+    Done/demo.md); each is its own row.
+  - NEVER crashes: every public call returns an empty result on error.
+
+Usage:
+  python mcp_state_store.py            # print task counts per state
+  python mcp_state_store.py --reconcile  # repair the index against the folders
+  python mcp_state_store.py --rebuild    # drop the index and re-scan every folder
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator
+
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+LOGS_DIR = BASE_DIR / "Logs"
+STATE_DB = LOGS_DIR / "state.db"
+
+STATES = ["Inbox", "Needs_Action", "Pending_Approval", "Approved", "Done"]
+RECONCILE_SECONDS = float(os.getenv("STATE_STORE_RECONCILE_SECONDS", "3600"))
+
+CHANNEL_PREFIXES = [
+    ("linkedin_draft_", "linkedin_draft"),
+    ("_source_", "source"),
+    ("email_", "gmail"),
+    ("wa_", "whatsapp"),
+    ("li_", "linkedin"),
+    ("manual_", "manual"),
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id      TEXT NOT NULL,
+    content_hash TEXT,
+    state        TEXT NOT NULL,
+    channel      TEXT,
+    path         TEXT,
+    artefacts    TEXT NOT NULL DEFAULT '{}',
+    created_at   TEXT NOT NULL,
+    updated_at   TEXT NOT NULL,
+    PRIMARY KEY (state, task_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_id ON tasks(task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_hash ON tasks(content_hash);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ARCHIVE_DIRNAME = "_archive"  # mcp_file_ops archives; not live tasks
+
+_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def enabled() -> bool:
+    return os.getenv("STATE_STORE_ENABLED", "false").strip().lower() in ("true", "1", "yes")
+
+
+def channel_for(task_id: str) -> str:
+    """Infer the ingestion channel from the filename prefix."""
+    for prefix, channel in CHANNEL_PREFIXES:
+        if task_id.startswith(prefix):
+            return channel
+    return "inbox"
+
+
+def _connect() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            str(STATE_DB), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        _migrate(conn)
+        conn.executescript(_SCHEMA)
+        _conn = conn
+        row = conn.execute("SELECT value FROM meta WHERE key = 'reconciled'").fetchone()
+        last = float(row["value"]) if row else 0.0
+        if row is None or (RECONCILE_SECONDS > 0 and time.time() - last > RECONCILE_SECONDS):
+            _reconcile(conn)
+    return _conn
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Re-key an index created before rows were keyed on (state, task_id)."""
+    cols = conn.execute("PRAGMA table_info(tasks)").fetchall()
+    if not cols or sum(1 for c in cols if c["pk"]) != 1:
+        return
+    conn.executescript(
+        "BEGIN IMMEDIATE;"
+        "DROP INDEX IF EXISTS idx_tasks_state; DROP INDEX IF EXISTS idx_tasks_hash;"
+        "ALTER TABLE tasks RENAME TO tasks_v1;"
+        + _SCHEMA +
+        "INSERT INTO tasks SELECT task_id, content_hash, state, channel, path, artefacts, "
+        "created_at, updated_at FROM tasks_v1;"
+        "DROP TABLE tasks_v1;"
+        "DELETE FROM meta WHERE key = 'backfilled';"
+        "COMMIT;"
+    )
+
+
+def _state_dirs(state: str) -> Iterator[Path]:
+    """The state folder and every shard directory under it (archive excluded)."""
+    stack = [str(BASE_DIR / state)]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False) and e.name != ARCHIVE_DIRNAME \
+                            and not e.name.startswith("."):
+                        stack.append(e.path)
+        except OSError:
+            continue
+        yield Path(d)
+
+
+def _reconcile(conn: sqlite3.Connection, states: list[str] | None = None) -> int:
+    """Bring the rows of each state in line with its folder. Returns rows changed."""
+    changed = 0
+    now = _utc_ts()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for state in states or STATES:
+            files: dict[str, str] = {}
+            for d in _state_dirs(state):
+                for f in d.glob("*.md"):
+                    if f.name != ".gitkeep" and f.is_file():
+                        files.setdefault(f.name, f.relative_to(BASE_DIR).as_posix())
+            indexed = {
+                r["task_id"]: r["path"]
+                for r in conn.execute("SELECT task_id, path FROM tasks WHERE state = ?", (state,))
+            }
+            for name in indexed.keys() - files.keys():
+                conn.execute("DELETE FROM tasks WHERE state = ? AND task_id = ?", (state, name))
+                changed += 1
+            for name, rel in files.items():
+                if name not in indexed:
+                    # Moved here by hand: keep what is known about it
+                    prev = conn.execute(
+                        "SELECT * FROM tasks WHERE task_id = ? ORDER BY updated_at DESC LIMIT 1",
+                        (name,),
+                    ).fetchone()
+                    conn.execute(
+                        "INSERT INTO tasks (task_id, content_hash, state, channel, path, artefacts, "
+                        "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (name, prev["content_hash"] if prev else None, state,
+                         prev["channel"] if prev else channel_for(name), rel,
+                         prev["artefacts"] if prev else "{}",
+                         prev["created_at"] if prev else now, now),
+                    )
+                    changed += 1
+                elif indexed[name] != rel:
+                    conn.execute(
+                        "UPDATE tasks SET path = ?, updated_at = ? WHERE state = ? AND task_id = ?",
+                        (rel, now, state, name),
+                    )
+                    changed += 1
+        conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('reconciled', ?)", (str(time.time()),)
+        )
+        conn.execute("DELETE FROM meta WHERE key LIKE 'folder:%'")  # per-read signatures, retired
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return changed
+
+
+def state_of(path: str | Path | None) -> str | None:
+    """State folder a vault path lives in (Needs_Action/2026/03/01/x.md -> Needs_Action)."""
+    rel = _rel(path)
+    head = rel.split("/", 1)[0] if rel else ""
+    return head if head in STATES else None
+
+
+def _rel(path: str | Path | None) -> str | None:
+    if path is None:
+        return None
+    p = Path(path)
+    try:
+        return p.resolve().relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return p.as_posix()
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """Yield a connection inside BEGIN IMMEDIATE; commit on success, roll back on error.
+
+    Lets callers pair a folder move with its state update: if the move raises,
+    the row is left untouched.
+    """
+    with _lock:
+        conn = _connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+
+def record(
+    task_id: str,
+    state: str,
+    *,
+    path: str | Path | None = None,
+    content_hash: str | None = None,
+    channel: str | None = None,
+    artefacts: dict | None = None,
+    moved_from: str | Path | None = None,
+    conn: sqlite3.Connection | None = None,
+) -> bool:
+    """Insert or update the (state, task_id) row. Artefacts are merged into the existing map.
+
+    moved_from is the file's previous path: its row is carried over (hash,
+    artefacts, created_at) and removed. Pass conn (from transaction()) to
+    make the update part of a larger unit.
+    """
+    if not enabled():
+        return False
+    try:
+        with _lock:
+            c = conn or _connect()
+            now = _utc_ts()
+            src_state = state_of(moved_from)
+            src = (src_state, Path(moved_from).name) if src_state else None
+            row = c.execute(
+                "SELECT * FROM tasks WHERE state = ? AND task_id = ?", (state, task_id)
+            ).fetchone()
+            if row is None and src is not None:
+                row = c.execute(
+                    "SELECT * FROM tasks WHERE state = ? AND task_id = ?", src
+                ).fetchone()
+            merged = json.loads(row["artefacts"]) if row else {}
+            merged.update(artefacts or {})
+            c.execute(
+                "INSERT INTO tasks (task_id, content_hash, state, channel, path, artefacts, "
+                "created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(state, task_id) DO UPDATE SET "
+                "content_hash = COALESCE(excluded.content_hash, tasks.content_hash), "
+                "channel = COALESCE(excluded.channel, tasks.channel), "
+                "path = COALESCE(excluded.path, tasks.path), "
+                "artefacts = excluded.artefacts, "
+                "updated_at = excluded.updated_at",
+                (
+                    task_id,
+                    content_hash or (row["content_hash"] if row else None),
+                    state,
+                    channel or (row["channel"] if row else None) or channel_for(task_id),
+                    _rel(path),
+                    json.dumps(merged, sort_keys=True),
+                    row["created_at"] if row else now,
+                    now,
+                ),
+            )
+            if src is not None and src != (state, task_id):
+                c.execute("DELETE FROM tasks WHERE state = ? AND task_id = ?", src)
+        return True
+    except Exception:
+        if conn is not None:
+            raise  # let the surrounding transaction roll back
+        return False
+
+
+def forget(task_id: str, state: str, *, conn: sqlite3.Connection | None = None) -> bool:
+    """Remove the (state, task_id) row, e.g. once its file left the state folders."""
+    if not enabled():
+        return False
+    try:
+        with _lock:
+            (conn or _connect()).execute(
+                "DELETE FROM tasks WHERE state = ? AND task_id = ?", (state, task_id)
+            )
+        return True
+    except Exception:
+        if conn is not None:
+            raise
+        return False
+
+
+def reconcile(states: list[str] | None = None) -> int:
+    """Repair the index against the folders (all states by default). Returns rows changed."""
+    if not enabled():
+        return 0
+    try:
+        with _lock:
+            return _reconcile(_connect(), states)
+    except Exception:
+        return 0
+
+
+def get(task_id: str, state: str | None = None) -> dict:
+    """Return the row for task_id as a dict, or {} if unknown / disabled.
+
+    Without state, a name present in several folders returns the most
+    recently updated row.
+    """
+    if not enabled():
+        return {}
+    try:
+        with _lock:
+            row = _connect().execute(
+                "SELECT * FROM tasks WHERE task_id = ? AND state = COALESCE(?, state) "
+                "ORDER BY updated_at DESC LIMIT 1",
+                (task_id, state),
+            ).fetchone()
+        if row is None:
+            return {}
+        out = dict(row)
+        out["artefacts"] = json.loads(out["artefacts"] or "{}")
+        return out
+    except Exception:
+        return {}
+
+
+def list_state(state: str, prefix: str = "") -> list[str]:
+    """Return sorted task ids currently in state (optionally filtered by prefix)."""
+    if not enabled():
+        return []
+    try:
+        with _lock:
+            rows = _connect().execute(
+                "SELECT task_id FROM tasks WHERE state = ? AND task_id >= ? AND task_id < ? "
+                "ORDER BY task_id",
+                (state, prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+        return [r["task_id"] for r in rows]
+    except Exception:
+        return []
+
+
+def counts() -> dict:
+    """Return {state: count} for every state with at least one task."""
+    if not enabled():
+        return {}
+    try:
+        with _lock:
+            rows = _connect().execute(
+                "SELECT state, COUNT(*) AS n FROM tasks GROUP BY state"
+            ).fetchall()
+        return {r["state"]: r["n"] for r in rows}
+    except Exception:
+        return {}
+
+
+def rebuild() -> int:
+    """Drop the index and re-scan the folders. Returns rows indexed."""
+    with _lock:
+        conn = _connect()
+        conn.execute("DELETE FROM tasks")
+        _reconcile(conn)
+        return conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    os.environ.setdefault("STATE_STORE_ENABLED", "true")
+    if "--rebuild" in sys.argv[1:]:
+        print(f"Indexed {rebuild()} files into {STATE_DB}")
+    elif "--reconcile" in sys.argv[1:]:
+        print(f"Reconciled {STATE_DB}: {reconcile()} row(s) changed")
+    for state in STATES:
+        print(f"  {state:<17} {counts().get(state, 0)}")
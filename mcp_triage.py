@@ -0,0 +1,367 @@
+"""MCP Triage – declarative pre-triage rules applied at ingestion, before any LLM call.
+
+Every task that reaches Needs_Action/ costs at least two LLM calls (plan +
+summary). Rules in triage_rules.yaml (or triage_rules.json) let noise be
+dropped, archived or routed as it is ingested:
+
+  rules:
+    - name: drop_newsletters
+      channel: [gmail]                 # str or list; omit = any channel
+      sender: "(?i)newsletter|no-?reply"   # regex on the From:/sender line
+      subject: "(?i)unsubscribe"       # regex on the Subject: line
+      text: "(?i)weekly digest"        # regex on the whole body
+      min_bytes: 0                     # size bounds on the body
+      max_bytes: 20000
+      action: drop                     # drop | archive | tag | priority
+    - name: urgent
+      text: "(?i)\\burgent\\b|asap"
+      action: priority
+      priority: high                   # high | normal | low
+      tags: [urgent]
+
+Actions:
+  drop      not written; one line per drop in Logs/triage_dropped.jsonl
+  archive   written straight to Done/ (date-sharded) — never reaches the agent
+  tag       tags added to the task's front matter; evaluation continues
+  priority  priority (and tags) added to the front matter; agent.py
+            processes high before normal before low; evaluation continues
+
+The first drop/archive rule that matches wins; every matching tag/priority
+rule before it is applied. All conditions of a rule must match.
+
+Behaviour:
+  - Rules are compiled once per process (regexes precompiled, rules indexed
+    by channel) and reloaded only when the rules file changes.
+  - PyYAML is listed in requirements.txt for the shipped triage_rules.yaml.
+    Without it only triage_rules.json (or a .yaml file written in JSON
+    syntax) can be read, and a YAML file is reported as needing PyYAML.
+  - Per-rule hit counts and totals, including an estimate of LLM calls
+    saved (LLM_CALLS_PER_TASK, default 2, per dropped/archived task), are
+    merged into Logs/triage_stats.json by flush_stats().
+  - No rules file = no-op: every task is kept. Nothing is active by default;
+    triage_rules.example.yaml is a starting point to copy to
+    triage_rules.yaml (install or vault) and review, since its drop/archive
+    rules would also catch receipts, invoices and bounces.
+  - A broken rules file is reported once and ignored.
+
+Usage:
+  python mcp_triage.py                  # show rules and hit counts
+  python mcp_triage.py <file.md> [channel]   # dry-run one file
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+
+from mcp_file_ops import (
+    log_event,
+    parse_front_matter,
+    render_front_matter,
+    sharded_dest,
+    strip_front_matter,
+    write_file,
+    write_many,
+)
+from mcp_vault import INSTALL_DIR, VAULT_ROOT
+
+try:
+    import yaml  # optional
+except ImportError:  # pragma: no cover
+    yaml = None
+
+BASE_DIR = VAULT_ROOT
+DONE = BASE_DIR / "Done"
+LOGS_DIR = BASE_DIR / "Logs"
+# The vault's own rules win; otherwise the install's rules apply
+RULES_FILES = [
+    folder / name
+    for folder in dict.fromkeys((BASE_DIR, INSTALL_DIR))
+    for name in ("triage_rules.yaml", "triage_rules.yml", "triage_rules.json")
+]
+STATS_FILE = LOGS_DIR / "triage_stats.json"
+DROPPED_LOG = LOGS_DIR / "triage_dropped.jsonl"
+
+ACTIONS = ("drop", "archive", "tag", "priority")
+PRIORITIES = ("high", "normal", "low")
+LLM_CALLS_PER_TASK = int(os.getenv("LLM_CALLS_PER_TASK", "2"))
+HEADER_SCAN_CHARS = 2048
+
+_FROM_RE = re.compile(r"^(?:\*\*)?From:(?:\*\*)?\s*(.+)$", re.MULTILINE)
+_SUBJECT_RE = re.compile(r"^(?:\*\*)?Subject:(?:\*\*)?\s*(.+)$", re.MULTILINE)
+
+_lock = threading.Lock()
+_compiled: tuple[tuple, "Ruleset"] | None = None
+_pending: dict[str, int] = {}
+
+
+# ---------------------------------------------------------------------------
+# Rules
+# ---------------------------------------------------------------------------
+
+class Rule:
+    __slots__ = ("name", "channels", "sender", "subject", "text",
+                 "min_bytes", "max_bytes", "action", "tags", "priority")
+
+    def __init__(self, spec: dict, index: int):
+        self.name = str(spec.get("name") or f"rule_{index}")
+        action = str(spec.get("action", "tag")).lower()
+        if action not in ACTIONS:
+            raise ValueError(f"{self.name}: unknown action {action!r}")
+        self.action = action
+        channels = spec.get("channel") or []
+        self.channels = {channels} if isinstance(channels, str) else set(channels)
+        self.sender = re.compile(spec["sender"]) if spec.get("sender") else None
+        self.subject = re.compile(spec["subject"]) if spec.get("subject") else None
+        self.text = re.compile(spec["text"]) if spec.get("text") else None
+        self.min_bytes = int(spec.get("min_bytes", 0))
+        self.max_bytes = int(spec["max_bytes"]) if spec.get("max_bytes") is not None else None
+        tags = spec.get("tags") or []
+        self.tags = [tags] if isinstance(tags, str) else list(tags)
+        self.priority = str(spec.get("priority", "high" if action == "priority" else "")).lower()
+        if self.priority and self.priority not in PRIORITIES:
+            raise ValueError(f"{self.name}: unknown priority {self.priority!r}")
+
+    def matches(self, size: int, sender: str, subject: str, text: str) -> bool:
+        # Cheapest checks first; the body regex last
+        if size < self.min_bytes or (self.max_bytes is not None and size > self.max_bytes):
+            return False
+        if self.sender is not None and not self.sender.search(sender):
+            return False
+        if self.subject is not None and not self.subject.search(subject):
+            return False
+        return self.text is None or self.text.search(text) is not None
+
+
+class Ruleset:
+    """Rules indexed by channel, keeping file order within each channel."""
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        self._by_channel: dict[str, list[Rule]] = {}
+
+    def for_channel(self, channel: str) -> list[Rule]:
+        if channel not in self._by_channel:
+            self._by_channel[channel] = [
+                r for r in self.rules if not r.channels or channel in r.channels
+            ]
+        return self._by_channel[channel]
+
+
+def _rules_file() -> Path | None:
+    for p in RULES_FILES:
+        if p.exists():
+            return p
+    return None
+
+
+def _parse(path: Path) -> list[dict]:
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        data = json.loads(text)
+    elif yaml is None:
+        try:
+            data = json.loads(text)
+        except ValueError:
+            raise ValueError("PyYAML not installed (pip install pyyaml)") from None
+    else:
+        data = yaml.safe_load(text)
+    if isinstance(data, dict):
+        data = data.get("rules", [])
+    return list(data or [])
+
+
+def ruleset() -> Ruleset:
+    """Compiled rules, rebuilt only when the rules file changes."""
+    global _compiled
+    path = _rules_file()
+    try:
+        st = path.stat() if path else None
+    except OSError:
+        st = None
+    key = (str(path), st.st_mtime_ns, st.st_size) if st else ("", 0, 0)
+    with _lock:
+        if _compiled is not None and _compiled[0] == key:
+            return _compiled[1]
+        rules: list[Rule] = []
+        if path is not None:
+            try:
+                rules = [Rule(spec, i) for i, spec in enumerate(_parse(path), 1)]
+            except Exception as exc:
+                print(f"Triage rules ignored ({path.name}): {exc}")
+                log_event(LOGS_DIR, "triage_rules_invalid", {"file": path.name, "error": str(exc)})
+        _compiled = (key, Ruleset(rules))
+        return _compiled[1]
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def _header(regex: re.Pattern, text: str) -> str:
+    m = regex.search(text[:HEADER_SCAN_CHARS])
+    return m.group(1).strip() if m else ""
+
+
+def evaluate(channel: str, content: str, sender: str = "", subject: str = "") -> dict:
+    """Return {"action": keep|drop|archive, "tags", "priority", "rules"} for content."""
+    decision = {"action": "keep", "tags": [], "priority": "", "rules": []}
+    rules = ruleset().for_channel(channel)
+    if not rules:
+        return decision
+    sender = sender or _header(_FROM_RE, content)
+    subject = subject or _header(_SUBJECT_RE, content)
+    size = len(content.encode("utf-8"))
+    for rule in rules:
+        if not rule.matches(size, sender, subject, content):
+            continue
+        decision["rules"].append(rule.name)
+        for tag in rule.tags:
+            if tag not in decision["tags"]:
+                decision["tags"].append(tag)
+        if rule.priority and not decision["priority"]:
+            decision["priority"] = rule.priority
+        if rule.action in ("drop", "archive"):
+            decision["action"] = rule.action
+            break
+    return decision
+
+
+def _count(decision: dict) -> None:
+    with _lock:
+        _pending["_evaluated"] = _pending.get("_evaluated", 0) + 1
+        for name in decision["rules"]:
+            _pending[name] = _pending.get(name, 0) + 1
+        if decision["action"] != "keep":
+            key = f"_{decision['action']}"
+            _pending[key] = _pending.get(key, 0) + 1
+
+
+def apply_batch(channel: str, items: list[tuple[str, str]]) -> list[tuple[str, str] | None]:
+    """Triage (filename, content) items for channel.
+
+    Returns a list the same length as items: the (possibly front-matter
+    tagged) item to write to Needs_Action/, or None if the rule engine
+    dropped or archived it (already handled here).
+    """
+    if not ruleset().rules:
+        return list(items)
+    out: list[tuple[str, str] | None] = []
+    archive: list[tuple[str, str]] = []
+    for name, content in items:
+        d = evaluate(channel, content)
+        _count(d)
+        if d["action"] == "drop":
+            _record_drop(channel, name, content, d)
+            out.append(None)
+        elif d["action"] == "archive":
+            archive.append((name, _tagged(content, d)))
+            out.append(None)
+        else:
+            out.append((name, _tagged(content, d)) if d["rules"] else (name, content))
+    for name, content in archive:
+        # Archived tasks go straight to their Done/ shard
+        write_many(sharded_dest(DONE, name).parent, [(name, content)])
+    return out
+
+
+def apply_file(path: str | Path, channel: str) -> str:
+    """Triage an existing task file in place; return keep, drop or archive.
+
+    Matched files get their triage front matter written into the file; the
+    caller decides where drop/archive files go (they are never deleted here).
+    """
+    if not ruleset().rules:
+        return "keep"
+    path = Path(path)
+    try:
+        content = path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return "keep"
+    d = evaluate(channel, content)
+    _count(d)
+    if d["action"] == "drop":
+        _record_drop(channel, path.name, content, d)
+    elif d["rules"]:
+        write_file(path, _tagged(content, d))
+    return d["action"]
+
+
+def _tagged(content: str, d: dict) -> str:
+    # Merge into an existing front-matter block rather than stacking a second one
+    meta = parse_front_matter(content)
+    content = strip_front_matter(content) if meta else content
+    meta["triage"] = d["rules"]
+    if d["tags"]:
+        meta["tags"] = list(dict.fromkeys(list(meta.get("tags") or []) + d["tags"]))
+    if d["priority"]:
+        meta["priority"] = d["priority"]
+    if d["action"] == "archive":
+        meta["status"] = "archived_by_triage"
+    return render_front_matter(meta) + content
+
+
+def _record_drop(channel: str, name: str, content: str, d: dict) -> None:
+    try:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        with open(DROPPED_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "file": name, "channel": channel, "rules": d["rules"],
+                "bytes": len(content.encode("utf-8")), "preview": content[:200],
+            }) + "\n")
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Stats
+# ---------------------------------------------------------------------------
+
+def load_stats() -> dict:
+    try:
+        return json.loads(STATS_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {"rules": {}, "totals": {}}
+
+
+def flush_stats() -> dict:
+    """Merge hit counts gathered since the last flush into Logs/triage_stats.json."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    if not pending:
+        return {}
+    stats = load_stats()
+    rules, totals = stats.setdefault("rules", {}), stats.setdefault("totals", {})
+    for key, n in pending.items():
+        if key.startswith("_"):
+            totals[key[1:]] = totals.get(key[1:], 0) + n
+        else:
+            rules[key] = rules.get(key, 0) + n
+    totals["llm_calls_saved"] = (totals.get("drop", 0) + totals.get("archive", 0)) * LLM_CALLS_PER_TASK
+    try:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = STATS_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(stats, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, STATS_FILE)
+    except Exception:
+        pass
+    log_event(LOGS_DIR, "triage_stats", {k.lstrip("_"): v for k, v in pending.items()})
+    return pending
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        p = Path(sys.argv[1])
+        ch = sys.argv[2] if len(sys.argv) > 2 else "inbox"
+        print(json.dumps(evaluate(ch, p.read_text(encoding="utf-8", errors="ignore")), indent=2))
+    else:
+        path = _rules_file()
+        print(f"Rules file: {path.name if path else '(none)'} | PyYAML: {'yes' if yaml else 'no'}")
+        for r in ruleset().rules:
+            print(f"  {r.name:<24} {r.action:<9} channels={sorted(r.channels) or 'any'}")
+        print(json.dumps(load_stats(), indent=2))
@@ -0,0 +1,88 @@
+"""MCP Vault – which vault directory this process works on.
+
+Every module used to place its folders next to its own source file, so one
+checkout could serve exactly one vault. Modules now take their folders from
+VAULT_ROOT, resolved once per process:
+
+  1. --vault <dir> (or --vault=<dir>) on the command line — removed from
+     sys.argv so the script's own argument parsing never sees it;
+  2. the VAULT_ROOT environment variable;
+  3. the install directory (the previous behaviour).
+
+The resolved root is exported back to VAULT_ROOT so child processes
+(agent passes started by the ingest server, supervisor workers) inherit it.
+
+Code and configuration that ships with the install (skills/, prompts,
+README.md) stays under INSTALL_DIR. Per-vault files — folders, Logs/,
+run_log.md, the state store, Blobs/, credentials — live under VAULT_ROOT.
+
+Usage:
+  python agent.py --vault /srv/vaults/acme
+  VAULT_ROOT=/srv/vaults/acme python silver_daemon.py --once
+  python mcp_vault.py [--vault <dir>]     # print the resolved root
+  python mcp_vault.py --init <dir> ...    # create the folder layout
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from pathlib import Path
+
+INSTALL_DIR = Path(__file__).resolve().parent
+
+# Folders every vault has (created by init_vault)
+VAULT_FOLDERS = (
+    "Inbox",
+    "Needs_Action",
+    "Plans",
+    "Pending_Approval",
+    "Approved",
+    "Done",
+    "Logs",
+)
+
+
+def _vault_from_argv() -> str:
+    """Consume --vault <dir> / --vault=<dir> from sys.argv; return it or ""."""
+    args = sys.argv
+    for i, arg in enumerate(args[1:], 1):
+        if arg == "--vault" and i + 1 < len(args):
+            value = args[i + 1]
+            del args[i:i + 2]
+            return value
+        if arg.startswith("--vault="):
+            del args[i]
+            return arg.split("=", 1)[1]
+    return ""
+
+
+def vault_root() -> Path:
+    """Resolve the vault root for this process (see module docstring)."""
+    raw = _vault_from_argv() or os.getenv("VAULT_ROOT", "").strip()
+    root = Path(raw).expanduser().resolve() if raw else INSTALL_DIR
+    os.environ["VAULT_ROOT"] = str(root)
+    return root
+
+
+def init_vault(root: str | Path) -> Path:
+    """Create the standard folder layout under root. Never raises."""
+    root = Path(root).expanduser().resolve()
+    for name in VAULT_FOLDERS:
+        try:
+            (root / name).mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+    return root
+
+
+VAULT_ROOT = vault_root()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "--init":
+        for arg in sys.argv[2:]:
+            print(f"Initialised: {init_vault(arg)}")
+    else:
+        print(f"VAULT_ROOT={VAULT_ROOT}")
+        print(f"INSTALL_DIR={INSTALL_DIR}")
@@ -7,6 +7,10 @@ HITL Hard Block:
   - Before processing, scans Pending_Approval/ for any linkedin_draft_* files.
   - Each unapproved draft is logged as "blocked_without_approval" — clear evidence
     that the system enforces human approval before any LinkedIn action.
+    Logged once, when the draft is first seen pending; later state changes
+    are logged once too ("hitl_approved" when it reaches Approved/,
+    "hitl_withdrawn" when it leaves Pending_Approval/ otherwise). The last
+    seen sets live in Logs/hitl_state.json.
   - ONLY files physically inside Approved/ are ever posted.
   - Files in Pending_Approval/ are NEVER touched or posted by this script.
 
@@ -16,13 +20,36 @@ Idempotency:
 
 Behaviour:
   - NEVER auto-approves — only processes files already in Approved/.
+  - Drafts are posted LINKEDIN_POST_CONCURRENCY (default 4) at a time over
+    one pooled session; pacing against the account quota, 429 Retry-After
+    and retries live in mcp_linkedin_ops. Results are handled on the main
+    thread, so posted_ids.json and the logs are written by one thread.
+  - Every draft is queued once in the durable outbox (mcp_outbox.py) with its
+    extracted text; later runs neither re-read nor re-parse it. Only drafts
+    whose next attempt is due are posted.
+  - Transient failures (429, 5xx, timeouts after retries) keep the file in
+    Approved/ as "retry_later", with exponential backoff between runs. The
+    local rate limiter ("rate_limited", nothing sent) also defers the draft
+    until its retry_after but does not count as an attempt. Permanent
+    errors, or OUTBOX_MAX_ATTEMPTS failures, dead-letter the draft (kept in
+    Approved/, never retried until `python mcp_outbox.py --retry <id>`).
+  - A draft whose earlier attempt went live although it looked failed (read
+    timeout) gets LinkedIn's 422 duplicate answer on the next attempt; that
+    counts as posted ("already_posted") and the file moves to Done/. Drafts
+    that older runs dead-lettered on such a 422 are requeued once.
+  - Due emails queued in the outbox (mcp_email_ops.queue_email) are sent at
+    the end of every run.
   - If LinkedIn not configured / LINKEDIN_SIMULATED=true:
       keeps file in Approved/ (NOT moved to Done)
       logs "linkedin_not_configured" or "linkedin_simulated"
-      writes evidence JSON to Logs/
+      writes evidence JSON to Logs/ — once per draft content: the outcome
+      is recorded by content hash in Logs/hitl_state.json and unchanged
+      drafts are skipped on later runs until the mode changes or the draft
+      is edited (detected by mtime/size, re-read only then)
   - If posting succeeds:
-      moves file to Done/
       records hash in Logs/posted_ids.json
+      moves file to Done/ — all posted files in one journaled batch at the
+      end of the run (mcp_file_ops.transition_many), logged once
 
 Usage:
   python post_approved.py
@@ -32,21 +59,38 @@ Logs all events to run_log.md (UTC) and Logs/events_<date>.jsonl.
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
-from mcp_file_ops import list_files, move_file, append_file, log_event
-from mcp_linkedin_ops import create_post
-
-BASE_DIR = Path(__file__).resolve().parent
+import mcp_outbox as outbox
+from mcp_file_ops import (
+    list_tasks_in_state,
+    transition_many,
+    append_file,
+    log_event,
+    folder_metadata,
+    strip_front_matter,
+    sharded_dest,
+)
+from mcp_email_ops import send_due_emails
+from mcp_linkedin_ops import create_post, posting_mode
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 PENDING_APPROVAL = BASE_DIR / "Pending_Approval"
 APPROVED = BASE_DIR / "Approved"
 DONE = BASE_DIR / "Done"
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
 POSTED_IDS_FILE = LOGS_DIR / "posted_ids.json"
+HITL_STATE_FILE = LOGS_DIR / "hitl_state.json"
+POST_CONCURRENCY = max(1, int(os.getenv("LINKEDIN_POST_CONCURRENCY", "4")))
+OUTBOX_KIND = "linkedin_post"
 
 
 # ---------------------------------------------------------------------------
@@ -89,7 +133,11 @@ def _save_posted_ids(hashes: set) -> None:
 
 
 def _extract_hash_from_file(content: str) -> str:
-    """Extract task hash from a linkedin_draft file."""
+    """Extract task hash from a linkedin_draft file body.
+
+    Legacy path for drafts written before front matter existed; new drafts
+    carry the hash in front matter and never need a full read for it.
+    """
     match = re.search(r"\*\*Task Hash:\*\*\s*([a-f0-9]{12})", content)
     if match:
         return match.group(1)
@@ -101,7 +149,7 @@ def _extract_post_text(content: str) -> str:
     marker = "## Generated Post Text"
     idx = content.find(marker)
     if idx == -1:
-        return content.strip()
+        return strip_front_matter(content).strip()
     after = content[idx + len(marker):].strip()
     # Cut at the next --- separator
     sep_idx = after.find("\n---")
@@ -112,22 +160,106 @@ def _extract_post_text(content: str) -> str:
     return "\n".join(lines).strip()
 
 
+def _outbox_key(fname: str) -> str:
+    return f"{OUTBOX_KIND}:{fname}"
+
+
+def _post_payload(payload: dict) -> dict:
+    """Outbox sender: post a queued draft if it is still approved."""
+    if not (APPROVED / payload["file"]).exists():
+        return {"ok": False, "reason": "draft_missing", "retryable": False}
+    return create_post(payload["text"])
+
+
+def _refresh_payload(fname: str, fpath: Path, payload: dict) -> None:
+    """Re-read an edited draft and update its queued payload in place."""
+    try:
+        content = fpath.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        return
+    post_text = _extract_post_text(content)
+    if not post_text:
+        return
+    payload.update({
+        "hash": _extract_hash_from_file(content) or payload.get("hash", ""),
+        "text": post_text,
+        "content_hash": _content_hash(post_text),
+        "sig": _file_sig(fpath),
+    })
+    outbox.update_payload(_outbox_key(fname), payload)
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def _file_sig(path: Path) -> list[int]:
+    """[mtime_ns, size] — changes whenever the draft is edited."""
+    try:
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_size]
+    except OSError:
+        return []
+
+
+def _load_hitl_state() -> dict:
+    """{"pending": {file: first_seen}, "approved": {file: first_seen}, "simulated": {content_hash: {...}}}"""
+    try:
+        state = json.loads(HITL_STATE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        state = {}
+    for key in ("pending", "approved", "simulated"):
+        if not isinstance(state.get(key), dict):
+            state[key] = {}
+    return state
+
+
+def _save_hitl_state(state: dict) -> None:
+    try:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = HITL_STATE_FILE.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, HITL_STATE_FILE)
+    except Exception:
+        pass
+
+
 # ---------------------------------------------------------------------------
 # HITL Hard Block — scan Pending_Approval and log unapproved drafts
 # ---------------------------------------------------------------------------
 
-def _check_and_log_pending_blocks() -> int:
+def _check_and_log_pending_blocks(hitl: dict, approved_now: list[str]) -> tuple[int, int]:
     """Scan Pending_Approval/ for unapproved linkedin_draft_* files.
 
-    Each one is logged as 'blocked_without_approval' — hard evidence of HITL
-    enforcement. Returns the count of blocked files found.
+    Each newly pending one is logged as 'blocked_without_approval' — hard
+    evidence of HITL enforcement. Drafts still pending since an earlier run
+    are not logged again; drafts that reached Approved/ ('hitl_approved') or
+    left Pending_Approval/ otherwise ('hitl_withdrawn') are logged once.
+    Updates hitl in place. Returns (blocked, newly_blocked).
     """
     PENDING_APPROVAL.mkdir(parents=True, exist_ok=True)
-    pending_li = list_files(PENDING_APPROVAL, "linkedin_draft_*.md")
+    pending_li = list_tasks_in_state(PENDING_APPROVAL, "linkedin_draft_")
+    previous, previous_approved = hitl["pending"], hitl["approved"]
+    now = utc_ts()
+
+    approved_set = set(approved_now)
+    for fname in approved_now:
+        if fname not in previous_approved:
+            _append_log(f"{now} - PostApproved: hitl_approved | {fname}\n")
+            _log_ev("hitl_approved", {"file": fname, "was_pending": fname in previous})
+    pending_set = set(pending_li)
+    for fname in previous:
+        if fname not in pending_set and fname not in approved_set:
+            _append_log(f"{now} - PostApproved: hitl_withdrawn | {fname}\n")
+            _log_ev("hitl_withdrawn", {"file": fname})
+    hitl["approved"] = {f: previous_approved.get(f, now) for f in approved_now}
+    hitl["pending"] = {f: previous.get(f, now) for f in pending_li}
+
+    new = [f for f in pending_li if f not in previous]
     if not pending_li:
-        return 0
+        return 0, 0
 
-    for fname in pending_li:
+    for fname in new:
         msg = (
             f"HITL_BLOCK: '{fname}' is in Pending_Approval/ and has NOT been approved. "
             "Move to Approved/ via `python approve.py` before this script can post it."
@@ -140,11 +272,12 @@ def _check_and_log_pending_blocks() -> int:
         )
 
     print(
-        f"\n  {len(pending_li)} draft(s) are waiting for approval in Pending_Approval/.\n"
+        f"\n  {len(pending_li)} draft(s) are waiting for approval in Pending_Approval/"
+        f" ({len(new)} new).\n"
         "  Run: python approve.py --all   (or approve individually)\n"
         "  Then re-run post_approved.py to post them.\n"
     )
-    return len(pending_li)
+    return len(pending_li), len(new)
 
 
 # ---------------------------------------------------------------------------
@@ -163,15 +296,34 @@ def main() -> None:
 
     # ---- HITL Hard Block check -----------------------------------------
     print("\n[HITL CHECK] Scanning Pending_Approval/ for unapproved drafts...")
-    blocked_count = _check_and_log_pending_blocks()
+    hitl = _load_hitl_state()
+    had_pending = len(hitl["pending"])
+    li_files = list_tasks_in_state(APPROVED, "linkedin_draft_")
+    blocked_count, newly_blocked = _check_and_log_pending_blocks(hitl, li_files)
     if blocked_count == 0:
         print("  No unapproved drafts found in Pending_Approval/. Good.")
-        _append_log(f"{utc_ts()} - PostApproved: hitl_check_clear | no_pending_drafts\n")
-    _log_ev("hitl_check_done", {"blocked_count": blocked_count})
+        if had_pending:
+            _append_log(f"{utc_ts()} - PostApproved: hitl_check_clear | no_pending_drafts\n")
+    if newly_blocked or blocked_count != had_pending:
+        _log_ev("hitl_check_done", {"blocked_count": blocked_count, "newly_blocked": newly_blocked})
+    # Forget simulation outcomes of drafts no longer in Approved/
+    hitl["simulated"] = {h: v for h, v in hitl["simulated"].items() if v.get("file") in hitl["approved"]}
+    _save_hitl_state(hitl)
+
+    # ---- Outbound emails due for (re)sending ------------------------------
+    sent_emails = send_due_emails()
+    if sent_emails:
+        states = [result["outbox"] for _row, result in sent_emails]
+        _append_log(
+            f"{utc_ts()} - PostApproved: emails | due={len(states)} | sent={states.count('sent')}"
+            f" | retry={states.count('pending')} | dead={states.count('dead')}\n"
+        )
+        _log_ev("outbox_emails_sent", {"due": len(states), "sent": states.count("sent"),
+                                       "retry": states.count("pending"), "dead": states.count("dead")})
+        print(f"\n[OUTBOX] {len(states)} due email(s): {states.count('sent')} sent.")
 
     # ---- Only process files inside Approved/ ----------------------------
     print("\n[APPROVED] Scanning Approved/ for approved LinkedIn drafts...")
-    li_files = list_files(APPROVED, "linkedin_draft_*.md")
 
     if not li_files:
         print("No approved LinkedIn drafts found in Approved/.")
@@ -181,95 +333,225 @@ def main() -> None:
         return
 
     posted_hashes = _load_posted_ids()
+    approved_meta = folder_metadata(APPROVED, "linkedin_draft_*.md")
 
     stats = {
         "found": len(li_files),
         "posted": 0,
+        "already_posted": 0,
         "skipped_duplicate": 0,
+        "skipped_queued": 0,
         "skipped_not_configured": 0,
+        "simulated_unchanged": 0,
+        "retry_later": 0,
+        "scheduled": 0,
+        "dead_letter": 0,
         "errors": 0,
     }
 
+    done_moves: list[tuple[Path, Path, dict]] = []
+    queued_hashes: set[str] = set()
+    known = outbox.get_many([_outbox_key(f) for f in li_files])
+
     for fname in li_files:
         fpath = APPROVED / fname
-        print(f"\n--- Attempting: {fname} ---")
 
-        try:
-            content = fpath.read_text(encoding="utf-8", errors="ignore")
-        except Exception as exc:
-            print(f"  Error reading {fname}: {exc}")
-            stats["errors"] += 1
+        # ---- Already in the outbox: no re-read, the scheduler decides ----
+        row = known.get(_outbox_key(fname))
+        if row is not None:
+            if row["state"] == "sent":
+                # Posted by an earlier run that stopped before the move
+                post_id = (row["result"] or {}).get("post_id", "unknown")
+                done_moves.append(
+                    (fpath, sharded_dest(DONE, fname), {"task_id": fname, "artefacts": {"post_id": post_id}})
+                )
+                print(f"  {fname}: already posted (post_id={post_id}), moving to Done/")
+            elif row["state"] == "dead" and row["last_error"] == "api_error_422" and row["attempts"] > 1:
+                # A 422 after an earlier failed attempt is most likely LinkedIn's
+                # duplicate answer to a post that did go live; older runs
+                # dead-lettered it. Requeue once: a duplicate now counts as posted.
+                outbox.requeue(row["id"])
+                print(f"  {fname}: dead-lettered on 422 after a failed attempt — re-checking")
+            elif row["state"] == "dead":
+                print(f"  {fname}: dead-lettered after {row['attempts']} attempt(s) — {row['last_error']}")
+                stats["dead_letter"] += 1
+            elif row["next_attempt_at"] > time.time():
+                stats["scheduled"] += 1
+            payload = row.get("payload") or {}
+            if row["state"] == "pending" and payload.get("sig") != _file_sig(fpath):
+                # Edited since it was queued (or queued before sigs) — refresh
+                _refresh_payload(fname, fpath, payload)
+            if payload.get("hash"):
+                # Sent rows are published; pending/dead ones are only queued
+                (posted_hashes if row["state"] == "sent" else queued_hashes).add(payload["hash"])
             continue
 
-        # ---- Idempotency check -----------------------------------------
-        task_hash = _extract_hash_from_file(content)
+        # ---- Idempotency check (front matter first, body only if needed) -
+        content = None
+        task_hash = approved_meta.get(fname, {}).get("hash", "")
+        if not task_hash:
+            try:
+                content = fpath.read_text(encoding="utf-8", errors="ignore")
+            except Exception as exc:
+                print(f"  Error reading {fname}: {exc}")
+                stats["errors"] += 1
+                continue
+            task_hash = _extract_hash_from_file(content)
+
         if task_hash and task_hash in posted_hashes:
-            print(f"  Skipping (already posted): hash={task_hash}")
+            print(f"  Skipping {fname} (already posted): hash={task_hash}")
             _append_log(
                 f"{utc_ts()} - PostApproved: skipped_duplicate | {fname} | hash={task_hash}\n"
             )
             _log_ev("linkedin_post_duplicate_skip", {"file": fname, "hash": task_hash})
             stats["skipped_duplicate"] += 1
             continue
+        if task_hash and task_hash in queued_hashes:
+            # Same content as a draft already in the outbox, not yet posted
+            print(f"  Skipping {fname} (already queued): hash={task_hash}")
+            _append_log(
+                f"{utc_ts()} - PostApproved: skipped_queued | {fname} | hash={task_hash}\n"
+            )
+            _log_ev("linkedin_post_queued_skip", {"file": fname, "hash": task_hash})
+            stats["skipped_queued"] += 1
+            continue
 
         # ---- Extract post text -----------------------------------------
+        if content is None:
+            try:
+                content = fpath.read_text(encoding="utf-8", errors="ignore")
+            except Exception as exc:
+                print(f"  Error reading {fname}: {exc}")
+                stats["errors"] += 1
+                continue
         post_text = _extract_post_text(content)
         if not post_text:
             print(f"  Could not extract post text from {fname}. Skipping.")
             stats["errors"] += 1
             continue
+        if task_hash:
+            queued_hashes.add(task_hash)
+        outbox.enqueue(
+            OUTBOX_KIND, _outbox_key(fname),
+            {"file": fname, "hash": task_hash, "text": post_text,
+             "content_hash": _content_hash(post_text), "sig": _file_sig(fpath)},
+            ref=f"Approved/{fname}",
+        )
 
-        # ---- Attempt to post (Approved/ only — HITL enforced) ----------
-        result = create_post(post_text)
+    # ---- Post due drafts (Approved/ only — HITL enforced) ---------------
+    # POST_CONCURRENCY at once; results are handled here, on the main thread.
+    # Content already simulated in the current mode is left alone (not leased).
+    mode = posting_mode()
+    simulated = hitl["simulated"]
+
+    def _not_yet_simulated(row: dict) -> bool:
+        if mode == "live":
+            return True
+        seen = simulated.get(row["payload"].get("content_hash", ""), {})
+        if seen.get("reason") == mode:
+            stats["simulated_unchanged"] += 1
+            return False
+        return True
+
+    for row, result in outbox.run_due(
+        OUTBOX_KIND, _post_payload, concurrency=POST_CONCURRENCY, keep=_not_yet_simulated
+    ):
+        fname = row["payload"]["file"]
+        task_hash = row["payload"].get("hash", "")
+        fpath = APPROVED / fname
+        print(f"\n--- {fname} ---")
 
         if result.get("ok"):
-            # Success — move to Done
+            # Success — queue the move to Done (one batch after the loop;
+            # the outbox row and posted hash are saved now, so a crash cannot re-post)
             post_id = result.get("post_id", "unknown")
-            done_path = DONE / fname
-            move_file(fpath, done_path)
+            done_path = sharded_dest(DONE, fname)
+            done_moves.append(
+                (fpath, done_path, {"task_id": fname, "artefacts": {"post_id": post_id}})
+            )
             if task_hash:
                 posted_hashes.add(task_hash)
                 _save_posted_ids(posted_hashes)
+            already = bool(result.get("already_posted"))
             _append_log(
-                f"{utc_ts()} - PostApproved: posted | {fname} | post_id={post_id}\n"
+                f"{utc_ts()} - PostApproved: {'already_posted' if already else 'posted'} | {fname}"
+                f" | post_id={post_id}\n"
             )
             _log_ev(
                 "linkedin_posted_and_done",
-                {"file": fname, "post_id": post_id, "hash": task_hash},
+                {"file": fname, "post_id": post_id, "hash": task_hash, "already_posted": already},
             )
-            print(f"  Posted! post_id={post_id} -> Done/{fname}")
-            stats["posted"] += 1
+            if already:
+                # An earlier attempt went live although it looked failed (e.g. timed out)
+                print(f"  Already on LinkedIn: post_id={post_id} (moving to Done/)")
+                stats["already_posted"] += 1
+            else:
+                print(f"  Posted! post_id={post_id} (moving to Done/)")
+                stats["posted"] += 1
+            continue
 
-        else:
-            reason = result.get("reason", "unknown")
-            evidence = result.get("evidence_path", "")
+        reason = result.get("reason", "unknown")
+        evidence = result.get("evidence_path", "")
 
-            if reason in ("not_configured", "simulated_mode"):
-                # Keep in Approved — log but don't move
-                _append_log(
-                    f"{utc_ts()} - PostApproved: {reason} | {fname} | kept in Approved/\n"
-                )
-                _log_ev(
-                    "linkedin_not_posted_kept",
-                    {"file": fname, "reason": reason, "evidence": evidence},
-                )
-                print(f"  Not posted ({reason}). File kept in Approved/.")
-                if evidence:
-                    print(f"  Evidence: {evidence}")
-                stats["skipped_not_configured"] += 1
-            else:
-                # API error — keep in Approved, log error
-                _append_log(
-                    f"{utc_ts()} - PostApproved: api_error | {fname} | reason={reason}\n"
-                )
-                _log_ev(
-                    "linkedin_post_api_error",
-                    {"file": fname, "reason": reason},
-                )
-                print(f"  API error ({reason}). File kept in Approved/.")
-                stats["errors"] += 1
+        if reason in ("not_configured", "simulated_mode"):
+            # Keep in Approved — log but don't move
+            _append_log(
+                f"{utc_ts()} - PostApproved: {reason} | {fname} | kept in Approved/\n"
+            )
+            _log_ev(
+                "linkedin_not_posted_kept",
+                {"file": fname, "reason": reason, "evidence": evidence},
+            )
+            print(f"  Not posted ({reason}). File kept in Approved/.")
+            if evidence:
+                print(f"  Evidence: {evidence}")
+            stats["skipped_not_configured"] += 1
+            if row["payload"].get("content_hash"):
+                simulated[row["payload"]["content_hash"]] = {
+                    "file": fname, "reason": reason, "evidence": evidence, "ts": utc_ts(),
+                }
+        elif result["outbox"] == "pending":
+            # Retry scheduled with backoff — kept in Approved
+            retry_at = datetime.fromtimestamp(result["next_attempt_at"], timezone.utc)
+            _append_log(
+                f"{utc_ts()} - PostApproved: retry_later | {fname} | reason={reason}"
+                f" | attempt={result['attempts']} | next={retry_at:%Y-%m-%d %H:%M:%SZ}\n"
+            )
+            _log_ev(
+                "linkedin_post_retry_later",
+                {"file": fname, "reason": reason, "attempts": result["attempts"],
+                 "next_attempt_at": f"{retry_at:%Y-%m-%d %H:%M:%SZ}"},
+            )
+            print(f"  Not posted ({reason}). Retry {result['attempts'] + 1} at {retry_at:%H:%M:%SZ}.")
+            stats["retry_later"] += 1
+        else:
+            # Permanent error or out of attempts — dead-lettered, kept in Approved
+            _append_log(
+                f"{utc_ts()} - PostApproved: api_error | {fname} | reason={reason} | dead_letter\n"
+            )
+            _log_ev(
+                "linkedin_post_api_error",
+                {"file": fname, "reason": reason, "dead_letter": True},
+            )
+            print(f"  API error ({reason}). Dead-lettered; file kept in Approved/.")
+            stats["errors"] += 1
+            stats["dead_letter"] += 1
 
     _save_posted_ids(posted_hashes)
+    _save_hitl_state(hitl)
+
+    if done_moves:
+        moved = transition_many(done_moves, "Done")
+        done_names = [dst.name for _src, dst in moved["moved"]]
+        failed = [src.name for src, _error in moved["failed"]]
+        _append_log(
+            f"{utc_ts()} - PostApproved: moved {len(done_names)} file(s) -> Done/"
+            f" | failed={len(failed)} | {', '.join(done_names)}\n"
+        )
+        _log_ev("posted_moved_to_done", {"files": done_names, "failed": failed})
+        print(f"\n  Moved to Done/: {len(done_names)}" + (f" (failed: {', '.join(failed)})" if failed else ""))
+        stats["errors"] += len(failed)
+
     _append_log(f"{utc_ts()} - PostApproved: done | {stats}\n")
     _log_ev("post_approved_done", stats)
 
@@ -277,8 +559,14 @@ def main() -> None:
     print(f"  HITL blocked  : {blocked_count}")
     print(f"  Found         : {stats['found']}")
     print(f"  Posted        : {stats['posted']}")
+    print(f"  Already posted: {stats['already_posted']}")
     print(f"  Duplicate     : {stats['skipped_duplicate']}")
+    print(f"  Already queued: {stats['skipped_queued']}")
     print(f"  Not configured: {stats['skipped_not_configured']}")
+    print(f"  Sim unchanged : {stats['simulated_unchanged']}")
+    print(f"  Retry later   : {stats['retry_later']}")
+    print(f"  Not yet due   : {stats['scheduled']}")
+    print(f"  Dead letter   : {stats['dead_letter']}")
     print(f"  Errors        : {stats['errors']}")
 
 
@@ -1,26 +1,23 @@
 import os
 import shutil
 from datetime import datetime
-from pathlib import Path
+
+from mcp_vault import INSTALL_DIR, VAULT_ROOT
 
 # ✅ Cross-platform vault root:
 # - Cloud (GitHub Actions) me: repo root
 # - Local me: current folder (same repo)
-BASE_DIR = Path(__file__).resolve().parent
+# - Other vaults: --vault <dir> / VAULT_ROOT (mcp_vault.py)
+BASE_DIR = VAULT_ROOT
 
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
 DONE = BASE_DIR / "Done"
-SKILL_FILE = BASE_DIR / "skills" / "process_task.SKILL.md"
+SKILL_FILE = INSTALL_DIR / "skills" / "process_task.SKILL.md"
 LOG_FILE = BASE_DIR / "run_log.md"
 
-print("===================================")
-print(" AI Employee Processor (Skill Mode)")
-print("===================================\n")
-
 def ensure_dirs():
     NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
     DONE.mkdir(parents=True, exist_ok=True)
-    (BASE_DIR / "skills").mkdir(parents=True, exist_ok=True)
 
 def load_skill():
     if SKILL_FILE.exists():
@@ -31,14 +28,21 @@ def log_run(filename: str):
     with open(LOG_FILE, "a", encoding="utf-8") as log:
         log.write(f"\n[{datetime.utcnow().strftime('%Y-%m-%d %H:%M:%SZ')}] Skill executed on: {filename}\n")
 
-ensure_dirs()
+def process_tasks() -> int:
+    """Process every *.md in Needs_Action and move it to Done. Returns count.
+
+    Importable so watcher.py can run it in-process instead of spawning a
+    new interpreter per batch.
+    """
+    ensure_dirs()
+
+    files = os.listdir(NEEDS_ACTION)
+    processed = 0
 
-skill_definition = load_skill()  # (Silver: keep for future use)
-files = os.listdir(NEEDS_ACTION)
+    if not files:
+        print("No tasks found in Needs_Action.")
+        return 0
 
-if not files:
-    print("No tasks found in Needs_Action.")
-else:
     for file in files:
         if file.endswith(".md"):
             file_path = NEEDS_ACTION / file
@@ -63,7 +67,20 @@ Status: Completed
 
             shutil.move(str(file_path), str(DONE / file))
             log_run(file)
+            processed += 1
 
             print(f"Skill processed and moved: {file}")
 
-print("\nProcessing Complete.")
+    return processed
+
+def main():
+    print("===================================")
+    print(" AI Employee Processor (Skill Mode)")
+    print("===================================\n")
+
+    process_tasks()
+
+    print("\nProcessing Complete.")
+
+if __name__ == "__main__":
+    main()
@@ -27,11 +27,11 @@ import json
 import os
 import sys
 from datetime import datetime, timezone
-from pathlib import Path
 
 from mcp_email_ops import send_email
+from mcp_vault import VAULT_ROOT
 
-BASE_DIR = Path(__file__).resolve().parent
+BASE_DIR = VAULT_ROOT
 LOGS_DIR = BASE_DIR / "Logs"
 RUN_LOG = BASE_DIR / "run_log.md"
 
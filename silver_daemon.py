@@ -0,0 +1,297 @@
+"""Silver Daemon – hosts every pipeline stage in one long-running process.
+
+The cron workflow used to start a fresh interpreter for each watcher, the
+agent and the poster every 10 minutes. The daemon imports them once and runs
+each stage on its own thread with its own schedule, so module imports,
+directory setup and the OpenAI client (skills/llm_client.py) stay warm.
+
+Stages and default intervals (seconds):
+
+  inbox      watcher_inbox.py      5     Inbox/ -> Needs_Action/
+  manual     watcher_manual.py     30    manual_input.txt -> Needs_Action/
+  whatsapp   whatsapp_watcher.py   30    whatsapp_input.txt -> Needs_Action/
+  linkedin   linkedin_watcher.py   30    linkedin_input.txt -> Needs_Action/
+  gmail      gmail_watcher.py      120   Gmail -> Inbox/   (only if GMAIL_OAUTH_ENABLED=true)
+  agent      agent.py              60    Needs_Action/ -> Plans/ + Pending_Approval/
+  post       post_approved.py      600   Approved/ -> LinkedIn -> Done/
+
+Stages are linked by internal queues: when a stage grows its output folder it
+pushes a wake-up onto the downstream stage's queue, so a new Inbox file reaches
+the agent within seconds instead of at the next cron tick. Stages whose input
+folder is empty are skipped without running.
+
+Override intervals with DAEMON_INTERVALS, e.g. "inbox=2,agent=15,post=300".
+
+SIGTERM / Ctrl+C: stop scheduling, let running stages finish, then drain —
+every stage with queued wake-ups runs once more before exit.
+
+Errors: a stage that raises or calls sys.exit() with a nonzero code is logged
+as stage_error. The long-running daemon carries on; --once exits 1 when any
+stage failed (or an ingestion source timed out), so a cron/CI job that runs
+it fails as the per-script workflow steps did (e.g. agent.py's exit on a
+missing OPENAI_API_KEY with OPENAI_REQUIRED=true).
+
+Usage:
+  python silver_daemon.py           # run forever
+  python silver_daemon.py --once    # one pass: ingestion concurrently (ingest_runner.py),
+                                    # then agent and poster, then exit
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import ingest_runner
+import mcp_backpressure as backpressure
+from mcp_file_ops import append_file, log_event
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+INBOX = BASE_DIR / "Inbox"
+NEEDS_ACTION = BASE_DIR / "Needs_Action"
+APPROVED = BASE_DIR / "Approved"
+LOGS_DIR = BASE_DIR / "Logs"
+RUN_LOG = BASE_DIR / "run_log.md"
+
+GMAIL_ENABLED = os.getenv("GMAIL_OAUTH_ENABLED", "false").strip().lower() == "true"
+
+
+def utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def _append_log(text: str) -> None:
+    append_file(RUN_LOG, text)
+
+
+def _log_ev(event_type: str, data: dict) -> None:
+    log_event(LOGS_DIR, event_type, data)
+
+
+def _md_count(folder: Path) -> int:
+    try:
+        with os.scandir(folder) as it:
+            return sum(1 for e in it if e.name.endswith(".md") and e.is_file())
+    except OSError:
+        return 0
+
+
+# ---------------------------------------------------------------------------
+# Stages
+# ---------------------------------------------------------------------------
+
+class Stage:
+    """One pipeline step: a module whose main() is run on a schedule."""
+
+    def __init__(
+        self,
+        name: str,
+        module: str,
+        interval: float,
+        *,
+        input_dir: Path | None = None,
+        input_file: Path | None = None,
+        output_dir: Path | None = None,
+        downstream: str | None = None,
+    ):
+        self.name = name
+        self.module = module
+        self.interval = interval
+        self.input_dir = input_dir      # skip the run when this folder has no *.md
+        self.input_file = input_file    # ... or when this file is missing / empty
+        self.output_dir = output_dir    # growth here wakes the downstream stage
+        self.downstream = downstream
+        self.wakeups: "queue.Queue[str]" = queue.Queue()
+        self.runs = 0
+        self.errors = 0
+        self.last_error = ""
+
+    def has_input(self) -> bool:
+        if self.input_file is not None:
+            try:
+                return self.input_file.stat().st_size > 0
+            except OSError:
+                return False
+        return self.input_dir is None or _md_count(self.input_dir) > 0
+
+    def run_once(self) -> int:
+        """Run the stage's main(). Returns growth of output_dir (0 if none)."""
+        before = _md_count(self.output_dir) if self.output_dir else 0
+        started = time.monotonic()
+        try:
+            importlib.import_module(self.module).main()
+        except (Exception, SystemExit) as exc:
+            # Stage scripts may sys.exit() on config errors; never take the daemon down.
+            if ingest_runner.is_failure(exc):
+                self.errors += 1
+                self.last_error = repr(exc)
+                _append_log(f"{utc_ts()} - Daemon: stage_error | {self.name} | {exc!r}\n")
+                _log_ev("daemon_stage_error", {"stage": self.name, "error": repr(exc)})
+        self.runs += 1
+        if self.output_dir == NEEDS_ACTION or self.input_dir == NEEDS_ACTION:
+            backpressure.emit_gauges()  # backlog moved: record the new depth
+        grown = (_md_count(self.output_dir) - before) if self.output_dir else 0
+        _log_ev(
+            "daemon_stage_run",
+            {
+                "stage": self.name,
+                "duration_ms": int((time.monotonic() - started) * 1000),
+                "output_delta": grown,
+            },
+        )
+        return max(grown, 0)
+
+
+def build_stages() -> dict[str, Stage]:
+    stages = [
+        Stage("inbox", "watcher_inbox", 5, input_dir=INBOX, output_dir=NEEDS_ACTION, downstream="agent"),
+        Stage("manual", "watcher_manual", 30, input_file=BASE_DIR / "manual_input.txt",
+              output_dir=NEEDS_ACTION, downstream="agent"),
+        Stage("whatsapp", "whatsapp_watcher", 30, input_file=BASE_DIR / "whatsapp_input.txt",
+              output_dir=NEEDS_ACTION, downstream="agent"),
+        Stage("linkedin", "linkedin_watcher", 30, input_file=BASE_DIR / "linkedin_input.txt",
+              output_dir=NEEDS_ACTION, downstream="agent"),
+        Stage("gmail", "gmail_watcher", 120, output_dir=INBOX, downstream="inbox"),
+        Stage("agent", "agent", 60, input_dir=NEEDS_ACTION),
+        Stage("post", "post_approved", 600, input_dir=APPROVED),
+    ]
+    if not GMAIL_ENABLED:
+        stages = [s for s in stages if s.name != "gmail"]
+
+    by_name = {s.name: s for s in stages}
+    for item in os.getenv("DAEMON_INTERVALS", "").split(","):
+        key, sep, val = item.partition("=")
+        if sep and key.strip() in by_name:
+            by_name[key.strip()].interval = float(val)
+    return by_name
+
+
+# ---------------------------------------------------------------------------
+# Scheduler
+# ---------------------------------------------------------------------------
+
+def _wake_downstream(stages: dict[str, Stage], stage: Stage, grown: int) -> None:
+    if grown and stage.downstream in stages:
+        stages[stage.downstream].wakeups.put(stage.name)
+
+
+def _stage_loop(stages: dict[str, Stage], stage: Stage, stop: threading.Event) -> None:
+    next_due = time.monotonic()
+    while not stop.is_set():
+        # Wait for the next due time or a wake-up, re-checking stop twice a second.
+        timeout = min(max(0.0, next_due - time.monotonic()), 0.5)
+        try:
+            stage.wakeups.get(timeout=timeout)
+            while not stage.wakeups.empty():  # coalesce a burst of wake-ups
+                stage.wakeups.get_nowait()
+        except queue.Empty:
+            if time.monotonic() < next_due:
+                continue
+        else:
+            if stop.is_set():
+                stage.wakeups.put("drain")  # hand the wake-up to drain()
+                break
+        if stop.is_set():
+            break
+        next_due = time.monotonic() + stage.interval
+        if stage.has_input():
+            _wake_downstream(stages, stage, stage.run_once())
+
+
+PIPELINE_ORDER = ["gmail", "inbox", "manual", "whatsapp", "linkedin", "agent", "post"]
+
+
+def run_once(stages: dict[str, Stage]) -> list[str]:
+    """One pass over every stage, upstream first — what a cron tick used to do.
+
+    The ingestion stages run concurrently through ingest_runner.run_all();
+    the agent and poster then run in order. Stages run unconditionally (no
+    input check) so the logs match the old per-script workflow steps,
+    including the HITL block scan. Returns the names of the stages that
+    failed (raised, exited nonzero or timed out).
+    """
+    failed = []
+    sources = [name for name in PIPELINE_ORDER if name in ingest_runner.SOURCES and name in stages]
+    for name, metrics in ingest_runner.run_all(sources).items():
+        stages[name].runs += 1
+        stages[name].errors += metrics["errors"]
+        if metrics["failed"]:
+            failed.append(name)
+    for name in PIPELINE_ORDER:
+        if name in stages and name not in ingest_runner.SOURCES:
+            errors = stages[name].errors
+            stages[name].run_once()
+            if stages[name].errors > errors:
+                failed.append(name)
+    return failed
+
+
+def drain(stages: dict[str, Stage]) -> None:
+    """Run every stage that still has queued wake-ups, upstream first."""
+    for name in PIPELINE_ORDER:
+        stage = stages.get(name)
+        if stage and not stage.wakeups.empty():
+            while not stage.wakeups.empty():
+                stage.wakeups.get_nowait()
+            if stage.has_input():
+                _wake_downstream(stages, stage, stage.run_once())
+
+
+def main() -> None:
+    stages = build_stages()
+    once = "--once" in sys.argv[1:]
+
+    for d in [INBOX, NEEDS_ACTION, APPROVED, LOGS_DIR]:
+        d.mkdir(parents=True, exist_ok=True)
+
+    schedule = {name: s.interval for name, s in stages.items()}
+    print(f"=== Silver Daemon {'(once)' if once else 'Running'} ===")
+    print(f"  Stages: {schedule}")
+    _append_log(f"{utc_ts()} - Daemon: started | once={once} | stages={list(stages)}\n")
+    _log_ev("daemon_started", {"once": once, "schedule": schedule})
+
+    failed: list[str] = []
+    if once:
+        failed = run_once(stages)
+    else:
+        stop = threading.Event()
+
+        def _request_stop(signum, _frame):
+            print(f"\nSignal {signum} received — draining and stopping...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+
+        threads = [
+            threading.Thread(target=_stage_loop, args=(stages, s, stop), name=s.name, daemon=True)
+            for s in stages.values()
+        ]
+        for t in threads:
+            t.start()
+        while not stop.is_set():
+            stop.wait(1.0)
+        for t in threads:
+            t.join()
+        drain(stages)
+
+    totals = {name: {"runs": s.runs, "errors": s.errors} for name, s in stages.items()}
+    _append_log(f"{utc_ts()} - Daemon: stopped | {totals}\n")
+    _log_ev("daemon_stopped", {"stages": totals})
+    print(f"=== Silver Daemon Done === {totals}")
+    if failed:
+        _append_log(f"{utc_ts()} - Daemon: once_failed | stages={failed}\n")
+        print(f"Failed stages: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Shared LLM client – one warm OpenAI client per process, shared call limits.
+
+Skills used to build a new OpenAI client (and HTTP connection pool) for every
+call. In a single agent.py run that is a handful of TLS handshakes; in the
+long-running silver_daemon.py it is one per task per skill. get_client()
+caches the client per API key so every skill reuses the same pool.
+
+Every call runs inside llm_slot(), which enforces two limits:
+
+  LLM_CONCURRENCY      calls in flight at once (default 4)
+  LLM_RATE_PER_MINUTE  token-bucket rate, bursts up to LLM_RATE_BURST
+                       (default 0 = unlimited; burst default 5)
+
+By default the limits are per process. When LLM_SHARED_DIR is set (the
+multi-vault supervisor sets it for its workers), they are shared by every
+process pointing at that directory: concurrency through flock'd slot files
+llm_slot_<n>.lock, the rate through llm_bucket.json under llm_bucket.lock.
+So N vaults running in parallel still respect one API budget.
+
+Never blocks forever: after LLM_SLOT_TIMEOUT seconds (default 120) waiting
+for a slot, the call proceeds anyway.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    from openai import OpenAI as _OpenAI
+except Exception:
+    _OpenAI = None  # type: ignore
+
+try:
+    import fcntl
+except ImportError:  # Windows: limits stay per process
+    fcntl = None  # type: ignore
+
+CONCURRENCY = max(1, int(os.getenv("LLM_CONCURRENCY", "4")))
+RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", "0"))
+RATE_BURST = max(1.0, float(os.getenv("LLM_RATE_BURST", "5")))
+SLOT_TIMEOUT = float(os.getenv("LLM_SLOT_TIMEOUT", "120"))
+POLL_SECONDS = 0.05
+
+_lock = threading.Lock()
+_clients: dict[str, object] = {}
+_local_slots = threading.BoundedSemaphore(CONCURRENCY)
+_bucket = {"tokens": RATE_BURST, "ts": time.time()}
+
+
+def get_client(api_key: str):
+    """Return the cached OpenAI client for api_key, creating it on first use."""
+    if _OpenAI is None:
+        raise RuntimeError("openai package not installed")
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _OpenAI(api_key=api_key)
+            _clients[api_key] = client
+        return client
+
+
+def _shared_dir() -> Path | None:
+    raw = os.getenv("LLM_SHARED_DIR", "").strip()
+    if not raw or fcntl is None:
+        return None
+    path = Path(raw)
+    try:
+        path.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        return None
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Rate limit (token bucket)
+# ---------------------------------------------------------------------------
+
+def _refill(state: dict, now: float) -> None:
+    elapsed = max(0.0, now - state.get("ts", now))
+    state["tokens"] = min(RATE_BURST, state.get("tokens", RATE_BURST) + elapsed * RATE_PER_MINUTE / 60)
+    state["ts"] = now
+
+
+def _try_take(shared: Path | None) -> float:
+    """Take one token if available. Returns 0, or seconds to wait before retrying."""
+    now = time.time()
+    if shared is None:
+        with _lock:
+            _refill(_bucket, now)
+            if _bucket["tokens"] >= 1:
+                _bucket["tokens"] -= 1
+                return 0.0
+            return (1 - _bucket["tokens"]) * 60 / RATE_PER_MINUTE
+    state_file = shared / "llm_bucket.json"
+    with open(shared / "llm_bucket.lock", "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            try:
+                state = json.loads(state_file.read_text(encoding="utf-8"))
+            except Exception:
+                state = {"tokens": RATE_BURST, "ts": now}
+            _refill(state, now)
+            wait = 0.0
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+            else:
+                wait = (1 - state["tokens"]) * 60 / RATE_PER_MINUTE
+            tmp = state_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(state), encoding="utf-8")
+            os.replace(tmp, state_file)
+            return wait
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _wait_for_token(shared: Path | None, deadline: float) -> None:
+    if RATE_PER_MINUTE <= 0:
+        return
+    while True:
+        try:
+            wait = _try_take(shared)
+        except Exception:
+            return  # fail open
+        if wait <= 0 or time.monotonic() + wait > deadline:
+            return
+        time.sleep(min(wait, 1.0))
+
+
+# ---------------------------------------------------------------------------
+# Concurrency slots
+# ---------------------------------------------------------------------------
+
+def _acquire_shared_slot(shared: Path, deadline: float):
+    """Hold one of CONCURRENCY slot files under shared. Returns the open file, or None."""
+    while True:
+        for n in range(CONCURRENCY):
+            f = open(shared / f"llm_slot_{n}.lock", "a")
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return f
+            except OSError:
+                f.close()
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(POLL_SECONDS)
+
+
+@contextmanager
+def llm_slot(timeout: float = SLOT_TIMEOUT) -> Iterator[None]:
+    """Wait for a rate token and a concurrency slot; hold the slot while inside."""
+    deadline = time.monotonic() + timeout
+    shared = _shared_dir()
+    _wait_for_token(shared, deadline)
+    local = _local_slots.acquire(timeout=max(0.0, deadline - time.monotonic()))
+    slot = None
+    try:
+        if shared is not None:
+            try:
+                slot = _acquire_shared_slot(shared, deadline)
+            except Exception:
+                slot = None  # fail open
+        yield
+    finally:
+        if slot is not None:
+            fcntl.flock(slot.fileno(), fcntl.LOCK_UN)
+            slot.close()
+        if local:
+            _local_slots.release()
@@ -18,6 +18,8 @@ try:
 except Exception:
     _OpenAI = None  # type: ignore
 
+from .llm_client import get_client, llm_slot
+
 MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 MAX_CHARS = int(os.getenv("MAX_TASK_CHARS", "6000"))
 
@@ -41,12 +43,13 @@ def _call_openai(prompt: str) -> tuple[str, str]:
     if not api_key or _OpenAI is None:
         return ("", "no_api_key")
     try:
-        client = _OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(
-            model=MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=800,
-        )
+        client = get_client(api_key)
+        with llm_slot():
+            resp = client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=800,
+            )
         text = resp.choices[0].message.content.strip()
         if not text:
             return ("", "openai_empty")
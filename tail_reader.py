@@ -0,0 +1,340 @@
+"""Tail Reader – streams '---'-separated task blocks from an append-only input file.
+
+Shared by watcher_manual.py, whatsapp_watcher.py and linkedin_watcher.py.
+The old read-all / split / write_text("") sequence lost anything appended
+between the read and the truncate, and held the whole file in memory.
+TailReader instead:
+
+  - reads line by line from a persisted byte offset (Logs/tail_offsets.json),
+    so memory is bounded by one block regardless of file size;
+  - remembers the file's (device, inode) plus a fingerprint of the bytes just
+    before the offset, and restarts from 0 when the file was replaced,
+    rotated, truncated or rewritten in place behind its back;
+  - yields a block at each '---' separator line, or at EOF once the last
+    line is newline-terminated (a half-written final line is left for the
+    next run);
+  - only compacts (truncates) after the offset is checkpointed, and only if
+    nothing was appended since — otherwise the new bytes stay and are read
+    next time from the saved offset.
+
+Usage:
+    reader = TailReader(MANUAL_INPUT)
+    result = ingest_blocks(reader, NEEDS_ACTION, lambda block, n: (f"x_{n}.md", block))
+
+or, for custom handling:
+    for block, end in reader.blocks():
+        ...write the task file...
+        reader.advance(end)
+    reader.checkpoint()
+    reader.compact()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import mcp_backpressure as backpressure
+import mcp_triage as triage
+from mcp_file_ops import write_many
+from mcp_vault import VAULT_ROOT
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+
+BASE_DIR = VAULT_ROOT
+OFFSETS_FILE = BASE_DIR / "Logs" / "tail_offsets.json"
+
+SEPARATOR = b"---"
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+FINGERPRINT_BYTES = 64
+MAX_BLOCK_BYTES = int(os.getenv("TAIL_MAX_BLOCK_BYTES", str(1024 * 1024)))
+
+
+def _load_offsets(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _save_offsets(path: Path, offsets: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(offsets, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+_offsets_lock = threading.Lock()
+
+
+@contextmanager
+def _locked_offsets(path: Path):
+    """Serialise read-modify-write of the shared offsets file.
+
+    Several readers (one per channel) checkpoint into the same file, possibly
+    from concurrent threads (ingest_runner.py) or processes.
+    """
+    with _offsets_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".lock"), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+class TailReader:
+    """Incremental block reader with a durable, inode-aware byte offset."""
+
+    def __init__(self, path: str | Path, offsets_file: str | Path = OFFSETS_FILE):
+        self.path = Path(path)
+        self.offsets_file = Path(offsets_file)
+        self.key = self.path.name
+        saved = _load_offsets(self.offsets_file).get(self.key, {})
+        self.inode = saved.get("inode")
+        self.dev = saved.get("dev")
+        self.offset = int(saved.get("offset", 0))
+        self.fingerprint = saved.get("fingerprint", "")
+        self.bytes_read = 0
+
+    def _fingerprint(self, f, offset: int) -> str:
+        """Hash of the FINGERPRINT_BYTES ending at offset (restores f's position)."""
+        here = f.tell()
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        digest = hashlib.sha1(f.read(offset - start)).hexdigest()
+        f.seek(here)
+        return digest
+
+    # -- reading -----------------------------------------------------------
+
+    def blocks(self) -> Iterator[tuple[str, int]]:
+        """Yield (block_text, end_offset) for each complete block after the offset.
+
+        Call advance(end_offset) once a block has been durably handled.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if (
+                (st.st_ino, st.st_dev) != (self.inode, self.dev)
+                or st.st_size < self.offset
+                or (self.offset and self._fingerprint(f, self.offset) != self.fingerprint)
+            ):
+                # New, replaced, truncated or rewritten file: start from the beginning.
+                self.inode, self.dev, self.offset = st.st_ino, st.st_dev, 0
+            f.seek(self.offset)
+
+            buf: list[bytes] = []
+            size = 0
+            pos = last_end = self.offset
+            while True:
+                line = f.readline()
+                if not line:
+                    break
+                if not line.endswith(b"\n"):
+                    break  # writer is mid-line; leave it for the next run
+                pos += len(line)
+                self.bytes_read += len(line)
+                if line.strip() != SEPARATOR:
+                    if size < MAX_BLOCK_BYTES:
+                        buf.append(line)
+                        size += len(line)
+                    continue
+                text = b"".join(buf).decode("utf-8", errors="ignore").strip()
+                buf, size = [], 0
+                if text:
+                    yield text, pos
+                elif self.offset == last_end:
+                    # Empty block and the caller has acknowledged everything
+                    # before it: step over it so compact() can reach EOF.
+                    self.advance(pos)
+                last_end = pos
+
+            text = b"".join(buf).decode("utf-8", errors="ignore").strip()
+            if text:
+                yield text, pos
+            elif self.offset == last_end:
+                self.advance(pos)
+
+    def advance(self, end_offset: int) -> None:
+        """Mark everything up to end_offset as consumed (in memory)."""
+        self.offset = max(self.offset, end_offset)
+
+    # -- durability --------------------------------------------------------
+
+    def checkpoint(self) -> None:
+        """Persist the current offset and file identity."""
+        try:
+            with open(self.path, "rb") as f:
+                self.fingerprint = self._fingerprint(f, self.offset)
+        except OSError:
+            self.fingerprint = ""
+        with _locked_offsets(self.offsets_file):
+            offsets = _load_offsets(self.offsets_file)
+            offsets[self.key] = {
+                "inode": self.inode,
+                "dev": self.dev,
+                "offset": self.offset,
+                "fingerprint": self.fingerprint,
+            }
+            _save_offsets(self.offsets_file, offsets)
+
+    def compact(self) -> bool:
+        """Truncate the input file if every byte has been consumed and checkpointed.
+
+        Holds an exclusive flock while re-checking the size, so cooperating
+        writers that also flock never interleave with the truncate. Returns
+        True if the file was truncated.
+        """
+        try:
+            with open(self.path, "r+b") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    st = os.fstat(f.fileno())
+                    if (st.st_ino, st.st_dev) != (self.inode, self.dev):
+                        return False
+                    if st.st_size != self.offset or self.offset == 0:
+                        return False  # appended since we read (or nothing to do)
+                    f.truncate(0)
+                    f.flush()
+                    os.fsync(f.fileno())
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            return False
+        self.offset = 0
+        self.checkpoint()
+        return True
+
+
+def ingest_blocks(
+    reader: TailReader,
+    folder: str | Path,
+    render: Callable[[str, int], tuple[str, str]],
+    batch_size: int = BATCH_SIZE,
+    channel: str | None = None,
+) -> dict:
+    """Write every new block from reader into folder, batch by batch.
+
+    render(block, n) returns (filename, content) for the n-th block (1-based).
+    After each batch is written the offset is advanced and checkpointed; a
+    failed write stops ingestion with the offset before the failed block.
+    Finally the input is compacted if fully consumed.
+
+    With a channel, admission goes through mcp_backpressure: spilled items are
+    re-admitted first, and blocks over the watermark either stay in the input
+    file (pause mode — the offset stops before them) or are spilled to the
+    overflow queue (spill mode — the offset moves past them).
+
+    With a channel, blocks also pass the pre-triage rules first (mcp_triage):
+    dropped or archived blocks are consumed without being written here.
+
+    Returns {"written": [names], "bytes": n, "errors": n, "compacted": bool,
+             "spilled": n, "paused": bool, "triaged": n}.
+    """
+    result = {"written": [], "bytes": 0, "errors": 0, "compacted": False,
+              "spilled": 0, "paused": False, "triaged": 0}
+    batch: list[tuple[str, str]] = []
+    ends: list[int] = []
+
+    gate = backpressure.Gate(channel) if channel else None
+    spill_mode = gate is not None and backpressure.mode() == "spill"
+    if gate is not None:
+        readmitted, nbytes = backpressure.readmit(channel, folder, gate)
+        result["written"].extend(readmitted)
+        result["bytes"] += nbytes
+
+    def flush() -> bool:
+        room = len(batch)
+        if gate is not None:
+            # Keep FIFO order: while older items wait in the overflow queue,
+            # new ones queue behind them.
+            backlog = spill_mode and backpressure.overflow_depth(channel) > 0
+            room = 0 if backlog else min(room, gate.allowance())
+        # Pre-triage rules (mcp_triage.py): dropped/archived blocks come back
+        # as None and are consumed without reaching Needs_Action/. In pause
+        # mode only blocks up to the last admitted one are triaged; the rest
+        # stay in the input untouched, so they are not triaged (archived,
+        # counted) a second time when the next run reads them again.
+        if gate is None:
+            items = list(batch)
+        elif spill_mode:
+            items = triage.apply_batch(channel, batch)
+        else:
+            items, kept = [], 0
+            while len(items) < len(batch) and kept < room:
+                chunk = triage.apply_batch(channel, batch[len(items):len(items) + room - kept])
+                items.extend(chunk)
+                kept += sum(1 for item in chunk if item is not None)
+        keep = [i for i, item in enumerate(items) if item is not None]
+        result["triaged"] += len(items) - len(keep)
+        pending = [items[i] for i in keep]
+        room = min(room, len(pending))
+        names = write_many(folder, pending[:room])
+        result["written"].extend(names)
+        result["bytes"] += sum(len(c.encode("utf-8")) for _, c in pending[:len(names)])
+        if gate is not None:
+            gate.admitted(len(names))
+        done = len(names)
+        ok = True
+        if done < room:
+            result["errors"] += 1
+            ok = False
+        elif room < len(pending):
+            if spill_mode and backpressure.spill(channel, pending[room:]):
+                result["spilled"] += len(pending) - room
+                done = len(pending)
+            else:
+                result["paused"] = True
+                ok = False
+        elif len(items) < len(batch):
+            result["paused"] = True  # untriaged blocks wait in the input
+            ok = False
+        # Every block before the first one left behind is consumed
+        consumed = keep[done] if done < len(keep) else len(items)
+        if consumed:
+            reader.advance(ends[consumed - 1])
+            reader.checkpoint()
+        batch.clear()
+        ends.clear()
+        return ok
+
+    if gate is not None and not spill_mode and gate.allowance() <= 0:
+        result["paused"] = True  # over the watermark: leave the input untouched
+        return result
+
+    n = 0
+    for block, end in reader.blocks():
+        n += 1
+        batch.append(render(block, n))
+        ends.append(end)
+        if len(batch) >= batch_size and not flush():
+            break
+    else:
+        if batch:
+            flush()
+
+    reader.checkpoint()
+    result["compacted"] = reader.compact()
+    triage.flush_stats()
+    return result
@@ -0,0 +1,182 @@
+"""Vault Supervisor – runs the pipeline for many vaults in parallel.
+
+One install can serve any number of vaults (mcp_vault.py). The supervisor
+starts one `silver_daemon.py --once` worker process per vault, at most
+VAULT_CONCURRENCY (default 4) at a time, each with VAULT_ROOT pointing at its
+vault. Processes keep vaults isolated: every module's folders, Logs/,
+run_log.md, state store and blob store resolve inside the worker's vault.
+
+Shared across vaults:
+  - LLM limits: workers get LLM_SHARED_DIR (default Logs/llm_shared/ of the
+    install), so LLM_CONCURRENCY and LLM_RATE_PER_MINUTE
+    (skills/llm_client.py) bound all vaults together, not each one.
+  - Code and configuration: skills/, prompts, triage_rules.yaml if present
+    (a vault's own triage_rules.yaml takes precedence).
+
+Vaults come from, in order: command-line directories, VAULT_ROOTS
+(separated by "," or the OS path separator), or vaults.txt next to this
+file (one directory per line, # comments allowed). Missing folders are
+created.
+
+Behaviour:
+  - Each worker's stdout/stderr goes to <vault>/Logs/supervisor_<date>.log.
+  - VAULT_TIMEOUT_SECONDS (default 600) bounds each worker; an overrunning
+    worker is killed and reported as timed_out.
+  - A vault fails when its worker exits nonzero: `silver_daemon.py --once`
+    exits 1 when any stage failed and prints which ("Failed stages: ..."),
+    which the supervisor reads back from the worker log as failed_stages.
+  - One "vault_run" event per vault and one summary line per pass in the
+    install's run_log.md and Logs/.
+  - --interval N repeats passes every N seconds until SIGTERM / Ctrl+C;
+    the pass in progress is finished first.
+
+Usage:
+  python vault_supervisor.py /srv/vaults/acme /srv/vaults/globex
+  VAULT_ROOTS=/srv/vaults/acme,/srv/vaults/globex python vault_supervisor.py
+  python vault_supervisor.py --interval 300
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from mcp_file_ops import append_file, log_event
+from mcp_vault import INSTALL_DIR, init_vault
+
+LOGS_DIR = INSTALL_DIR / "Logs"
+RUN_LOG = INSTALL_DIR / "run_log.md"
+VAULTS_FILE = INSTALL_DIR / "vaults.txt"
+
+CONCURRENCY = max(1, int(os.getenv("VAULT_CONCURRENCY", "4")))
+TIMEOUT_SECONDS = float(os.getenv("VAULT_TIMEOUT_SECONDS", "600"))
+LLM_SHARED_DIR = os.getenv("LLM_SHARED_DIR", "").strip() or str(LOGS_DIR / "llm_shared")
+WORKER = [sys.executable, str(INSTALL_DIR / "silver_daemon.py"), "--once"]
+
+_stop = threading.Event()
+
+
+def utc_ts() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")
+
+
+def configured_vaults(args: list[str]) -> list[Path]:
+    """Vault directories from args, VAULT_ROOTS or vaults.txt (de-duplicated, in order)."""
+    raw = list(args)
+    if not raw:
+        env = os.getenv("VAULT_ROOTS", "").replace(os.pathsep, ",")
+        raw = [v for v in env.split(",") if v.strip()]
+    if not raw and VAULTS_FILE.exists():
+        for line in VAULTS_FILE.read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                raw.append(line)
+    vaults = [Path(v.strip()).expanduser().resolve() for v in raw]
+    return list(dict.fromkeys(vaults))
+
+
+def run_vault(vault: Path) -> dict:
+    """Run one pipeline pass for vault in a worker process. Never raises."""
+    started = time.monotonic()
+    result = {"vault": str(vault), "exit_code": None, "timed_out": False, "duration_ms": 0,
+              "failed_stages": []}
+    init_vault(vault)
+    env = {**os.environ, "VAULT_ROOT": str(vault), "LLM_SHARED_DIR": LLM_SHARED_DIR}
+    log_path = vault / "Logs" / f"supervisor_{datetime.now(timezone.utc):%Y-%m-%d}.log"
+    try:
+        with open(log_path, "a", encoding="utf-8") as out:
+            out.write(f"\n=== {utc_ts()} pass ===\n")
+            out.flush()
+            offset = out.tell()
+            proc = subprocess.Popen(WORKER, cwd=vault, env=env, stdout=out, stderr=subprocess.STDOUT)
+            try:
+                result["exit_code"] = proc.wait(timeout=TIMEOUT_SECONDS)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                result["timed_out"] = True
+        if result["exit_code"]:
+            result["failed_stages"] = _failed_stages(log_path, offset)
+    except Exception as exc:
+        result["error"] = repr(exc)
+    result["duration_ms"] = int((time.monotonic() - started) * 1000)
+    return result
+
+
+def _failed_stages(log_path: Path, offset: int) -> list[str]:
+    """Stages named on the worker's "Failed stages: ..." line for this pass."""
+    try:
+        with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+            f.seek(offset)
+            lines = [line for line in f if line.startswith("Failed stages: ")]
+    except OSError:
+        return []
+    if not lines:
+        return []
+    return [s.strip() for s in lines[-1].split(":", 1)[1].split(",") if s.strip()]
+
+
+def run_pass(vaults: list[Path]) -> list[dict]:
+    """Run every vault once, VAULT_CONCURRENCY at a time; log and return the results."""
+    Path(LLM_SHARED_DIR).mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=CONCURRENCY, thread_name_prefix="vault") as pool:
+        results = list(pool.map(run_vault, vaults))
+    for r in results:
+        log_event(LOGS_DIR, "vault_run", r)
+    failed = [r for r in results if r["exit_code"] != 0]
+    summary = " | ".join(
+        f"{Path(r['vault']).name}={r['duration_ms']}ms"
+        + ("/TIMEOUT" if r["timed_out"] else f"/exit={r['exit_code']}" if r["exit_code"] else "")
+        + (f"({','.join(r['failed_stages'])})" if r["failed_stages"] else "")
+        for r in results
+    )
+    append_file(RUN_LOG, f"{utc_ts()} - Vault_Supervisor: pass | vaults={len(results)} "
+                         f"| failed={len(failed)} | {summary}\n")
+    return results
+
+
+def print_results(results: list[dict]) -> None:
+    for r in results:
+        status = "timed out" if r["timed_out"] else r.get("error") or f"exit {r['exit_code']}"
+        if r["failed_stages"]:
+            status += f" (failed: {', '.join(r['failed_stages'])})"
+        print(f"  {r['vault']:<50} {r['duration_ms']:>8} ms  {status}")
+
+
+def main() -> None:
+    args = sys.argv[1:]
+    interval = 0.0
+    if "--interval" in args:
+        idx = args.index("--interval")
+        interval = float(args[idx + 1])
+        del args[idx:idx + 2]
+
+    vaults = configured_vaults(args)
+    if not vaults:
+        print("No vaults configured (pass directories, set VAULT_ROOTS or create vaults.txt).")
+        return
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            signal.signal(sig, lambda *_: _stop.set())
+        except (ValueError, OSError):
+            pass
+
+    print(f"=== Vault Supervisor Running ({len(vaults)} vault(s), concurrency={CONCURRENCY}) ===")
+    append_file(RUN_LOG, f"{utc_ts()} - Vault_Supervisor: started | vaults={len(vaults)}\n")
+    while True:
+        print_results(run_pass(vaults))
+        if interval <= 0 or _stop.wait(interval):
+            break
+    print("=== Vault Supervisor Done ===")
+
+
+if __name__ == "__main__":
+    main()
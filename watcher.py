@@ -1,26 +1,61 @@
+"""Local Inbox watcher – event-driven, batches work into an in-process queue.
+
+Watches Inbox/ for *.md files, moves each to Needs_Action/ and runs the
+processor pipeline (processor.process_tasks) in-process on a worker thread.
+
+Event sources, best first:
+  1. Linux inotify through a thin ctypes binding (no extra dependency).
+     Only IN_CLOSE_WRITE and IN_MOVED_TO are watched, so a file is picked up
+     once the writer has closed it — never half-written.
+  2. Polling fallback (other platforms, or WATCHER_MODE=poll). A file is
+     treated as complete once its size and mtime are unchanged across two
+     polls.
+
+Bursts are coalesced: events are collected until WATCHER_DEBOUNCE_MS passes
+with no new event (or WATCHER_MAX_BATCH files are pending), then handed to the
+worker as one batch — one processor pass per batch, not per file.
+
+Usage:
+  python watcher.py                 # Ctrl + C to stop
+  WATCHER_MODE=poll python watcher.py
+"""
+
+import ctypes
+import ctypes.util
 import os
-import time
+import queue
+import select
 import shutil
-import subprocess
+import struct
+import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
+import processor
+from mcp_vault import VAULT_ROOT
+
 # ✅ Cross-platform vault root (local + cloud)
-BASE_DIR = Path(__file__).resolve().parent
+BASE_DIR = VAULT_ROOT
 
 INBOX = BASE_DIR / "Inbox"
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
 LOG_FILE = BASE_DIR / "run_log.md"
 
-print("===================================")
-print(" AI Employee Watcher Started ")
-print("===================================")
-print(f"Monitoring Folder: {INBOX}")
-print("Press Ctrl + C to stop\n")
+WATCHER_MODE = os.getenv("WATCHER_MODE", "auto").strip().lower()  # auto | inotify | poll
+POLL_INTERVAL = float(os.getenv("WATCHER_POLL_SECONDS", "3"))
+DEBOUNCE_SECONDS = int(os.getenv("WATCHER_DEBOUNCE_MS", "250")) / 1000
+MAX_BATCH = int(os.getenv("WATCHER_MAX_BATCH", "100"))
+
+# inotify constants (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
 
-# Ensure folders exist
-INBOX.mkdir(parents=True, exist_ok=True)
-NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
 
 def log_action(filename: str):
     timestamp = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ")
@@ -29,36 +64,171 @@ def log_action(filename: str):
         log.write(f"Time: {timestamp}\n")
         log.write(f"File: {filename}\n")
         log.write("Action: Moved to Needs_Action\n")
-        log.write("Action: Triggered processor.py\n")
+        log.write("Action: Ran processor in-process\n")
 
-def run_processor():
-    print("Triggering Silver processor automatically...")
-    # ✅ use same python running watcher (better for venv)
-    subprocess.run([os.sys.executable, "processor.py"], check=False)
 
-while True:
-    try:
-        files = os.listdir(INBOX)
+def inbox_files() -> list[str]:
+    return sorted(f for f in os.listdir(INBOX) if f.endswith(".md"))
+
+
+# ---------------------------------------------------------------------------
+# Event sources
+# ---------------------------------------------------------------------------
+
+class InotifySource:
+    """Minimal ctypes inotify binding yielding names of fully written files."""
+
+    def __init__(self, folder: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(
+            self.fd, os.fsencode(str(folder)), IN_CLOSE_WRITE | IN_MOVED_TO
+        )
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+
+    def wait(self, timeout: float | None) -> list[str]:
+        """Block up to timeout seconds; return names that became ready."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names, offset = [], 0
+        while offset + _EVENT_HEADER.size <= len(buf):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+            offset += _EVENT_HEADER.size
+            raw = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                names.extend(inbox_files())  # kernel dropped events: rescan
+            elif raw:
+                names.append(os.fsdecode(raw))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
 
-        moved_any = False
 
-        if files:
-            for file in files:
-                if file.endswith(".md"):
-                    source = INBOX / file
-                    destination = NEEDS_ACTION / file
+class PollSource:
+    """Fallback: reports a file once its size and mtime are stable across polls."""
 
-                    shutil.move(str(source), str(destination))
-                    print(f"Moved: {file} → Needs_Action")
-                    log_action(file)
-                    moved_any = True
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.last: dict[str, tuple[int, int]] = {}
+        self.reported: set[str] = set()
 
-        # ✅ Silver autonomy: if something moved, run processor automatically
-        if moved_any:
-            run_processor()
+    def wait(self, timeout: float | None) -> list[str]:
+        time.sleep(POLL_INTERVAL if timeout is None else min(timeout, POLL_INTERVAL))
+        seen, stable = {}, []
+        for name in inbox_files():
+            try:
+                st = os.stat(self.folder / name)
+            except OSError:
+                continue
+            sig = (st.st_size, st.st_mtime_ns)
+            seen[name] = sig
+            if self.last.get(name) == sig and name not in self.reported:
+                stable.append(name)
+        self.last = seen
+        # Report each file once; forget names that have left the folder.
+        self.reported = (self.reported & seen.keys()) | set(stable)
+        return stable
+
+    def close(self) -> None:
+        pass
+
+
+def open_source():
+    if WATCHER_MODE in ("auto", "inotify") and sys.platform.startswith("linux"):
+        try:
+            return InotifySource(INBOX), "inotify"
+        except OSError as exc:
+            if WATCHER_MODE == "inotify":
+                raise
+            print(f"inotify unavailable ({exc}); falling back to polling.")
+    return PollSource(INBOX), "poll"
+
+
+# ---------------------------------------------------------------------------
+# Worker: move batch + run processor in-process
+# ---------------------------------------------------------------------------
+
+def handle_batch(names: list[str]) -> int:
+    moved = 0
+    for file in names:
+        source = INBOX / file
+        if not file.endswith(".md") or not source.exists():
+            continue
+        shutil.move(str(source), str(NEEDS_ACTION / file))
+        print(f"Moved: {file} → Needs_Action")
+        log_action(file)
+        moved += 1
+
+    # ✅ Silver autonomy: if something moved, run processor automatically
+    if moved:
+        print("Running Silver processor in-process...")
+        processor.process_tasks()
+    return moved
+
+
+def worker(work: "queue.Queue[list[str] | None]") -> None:
+    while True:
+        batch = work.get()
+        if batch is None:
+            return
+        try:
+            handle_batch(batch)
+        except Exception as e:
+            print("Error:", e)
+
+
+def main() -> None:
+    print("===================================")
+    print(" AI Employee Watcher Started ")
+    print("===================================")
+    print(f"Monitoring Folder: {INBOX}")
+
+    # Ensure folders exist
+    INBOX.mkdir(parents=True, exist_ok=True)
+    NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
+
+    source, mode = open_source()
+    print(f"Mode: {mode} (debounce {int(DEBOUNCE_SECONDS * 1000)} ms, max batch {MAX_BATCH})")
+    print("Press Ctrl + C to stop\n")
+
+    work: "queue.Queue[list[str] | None]" = queue.Queue()
+    thread = threading.Thread(target=worker, args=(work,), daemon=True)
+    thread.start()
+
+    # Files dropped while the watcher was down
+    pending: dict[str, None] = dict.fromkeys(inbox_files())
+    try:
+        while True:
+            # Block indefinitely when idle; once something is pending, wait only
+            # for the debounce window so bursts coalesce into one batch.
+            timeout = DEBOUNCE_SECONDS if pending else None
+            names = source.wait(timeout)
+            for name in names:
+                if name.endswith(".md"):
+                    pending[name] = None
+            if pending and (not names or len(pending) >= MAX_BATCH):
+                work.put(list(pending))
+                pending.clear()
+    except KeyboardInterrupt:
+        print("\nStopping watcher — finishing queued batches...")
+    finally:
+        if pending:
+            work.put(list(pending))
+        work.put(None)
+        thread.join()
+        source.close()
 
-        time.sleep(3)
 
-    except Exception as e:
-        print("Error:", e)
-        time.sleep(3)
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
 """Watcher 1 – Inbox to Needs_Action.
 
-Moves any *.md files from Inbox/ to Needs_Action/.
-Logs each move to run_log.md with UTC timestamp.
+Moves any *.md files from Inbox/ to Needs_Action/ in one journaled batch
+(mcp_file_ops.move_many — a rename per file, no byte copies).
+Logs the batch to run_log.md as one line with UTC timestamp.
+Respects Needs_Action/ watermarks (mcp_backpressure.py): files over the
+limit stay in Inbox/ for a later run.
+Pre-triage rules (mcp_triage.py) run on admitted files only, so a file
+held back by backpressure is not re-triaged every run: dropped and archived
+files go straight to Done/ (they are never deleted, and do not count
+against the watermark), tagged files carry their triage front matter into
+Needs_Action/.
 Safe: creates folders if missing, never crashes.
 """
 
@@ -10,9 +18,16 @@ from __future__ import annotations
 from pathlib import Path
 from datetime import datetime, timezone
 
-BASE_DIR = Path(__file__).resolve().parent
+import mcp_backpressure as backpressure
+import mcp_triage as triage
+from mcp_file_ops import move_many, sharded_dest
+from mcp_state_store import channel_for
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 INBOX = BASE_DIR / "Inbox"
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
+DONE = BASE_DIR / "Done"
 RUN_LOG = BASE_DIR / "run_log.md"
 
 
@@ -25,9 +40,9 @@ def append_log(text: str) -> None:
         f.write(text)
 
 
-def main() -> None:
-    print("=== Watcher Inbox Running ===")
-
+def ingest() -> dict:
+    """Move Inbox/*.md to Needs_Action/. Returns {"ingested", "bytes", "errors"}."""
+    stats = {"ingested": 0, "bytes": 0, "errors": 0}
     INBOX.mkdir(parents=True, exist_ok=True)
     NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
 
@@ -36,19 +51,61 @@ def main() -> None:
 
     if not files:
         print("No files in Inbox/.")
-        return
+        return stats
 
+    gates: dict[str, backpressure.Gate] = {}
+    batch: list[tuple[Path, Path]] = []
+    triaged: list[tuple[Path, Path]] = []
     for f in files:
-        dest = NEEDS_ACTION / f.name
-        try:
-            dest.write_bytes(f.read_bytes())
-            f.unlink()
-            append_log(f"{utc_ts()} - Watcher_Inbox: moved {f.name} -> Needs_Action/\n")
-            print(f"Moved: {f.name} -> Needs_Action/")
-        except Exception as e:
-            print(f"Error moving {f.name}: {e}")
-
-    print("=== Watcher Inbox Done ===")
+        channel = channel_for(f.name)
+        if channel not in gates:
+            gates[channel] = backpressure.Gate(channel)
+        gate = gates[channel]
+        if gate.allowance() <= 0:
+            # Over the watermark: leave it in Inbox/ until the agent catches up
+            stats["paused"] = stats.get("paused", 0) + 1
+            continue
+        if triage.apply_file(f, channel) != "keep":
+            triaged.append((f, sharded_dest(DONE, f.name)))
+            continue
+        batch.append((f, NEEDS_ACTION / f.name))
+        gate.admitted(1)
+
+    if triaged:
+        done = move_many(triaged)
+        stats["triaged"] = len(done["moved"])
+        stats["errors"] += len(done["failed"])
+        names = ", ".join(src.name for src, _dst in done["moved"])
+        print(f"Triage: {stats['triaged']} file(s) dropped/archived -> Done/")
+        append_log(f"{utc_ts()} - Watcher_Inbox: triaged {stats['triaged']} file(s) -> Done/ | {names}\n")
+    triage.flush_stats()
+
+    # One journaled bulk move (a rename per file on the same filesystem)
+    result = move_many(batch)
+    for src, _dst in result["moved"]:
+        print(f"Moved: {src.name} -> Needs_Action/")
+    for src, error in result["failed"]:
+        print(f"Error moving {src.name}: {error}")
+    stats["ingested"] = len(result["moved"])
+    stats["bytes"] = result["bytes"]
+    stats["errors"] += len(result["failed"])
+    if batch:
+        names = ", ".join(src.name for src, _dst in result["moved"])
+        append_log(
+            f"{utc_ts()} - Watcher_Inbox: moved {stats['ingested']} file(s) -> Needs_Action/"
+            f" | failed={stats['errors']} | {names}\n"
+        )
+    if stats.get("paused"):
+        print(f"Backpressure: {stats['paused']} file(s) left in Inbox/ (Needs_Action/ over watermark).")
+        append_log(f"{utc_ts()} - Watcher_Inbox: paused | backpressure | left={stats['paused']}\n")
+    return stats
+
+
+def main() -> None:
+    print("=== Watcher Inbox Running ===")
+    stats = ingest()
+    if stats["ingested"] or stats["errors"]:
+        print("=== Watcher Inbox Done ===")
 
 
 if __name__ == "__main__":
@@ -1,17 +1,20 @@
 """Watcher 2 – Manual input ingestion.
 
-Reads manual_input.txt, splits on '---' separator lines,
+Streams manual_input.txt, splits on '---' separator lines,
 creates a unique *.md file in Needs_Action/ for each task block,
-then clears the file. Logs each ingested task in run_log.md.
+then clears the file once every block is checkpointed (tail_reader.py).
+Logs each ingested task in run_log.md.
 Safe: never crashes on missing file or empty content.
 """
 
 from __future__ import annotations
 
-from pathlib import Path
 from datetime import datetime, timezone
 
-BASE_DIR = Path(__file__).resolve().parent
+from tail_reader import TailReader, ingest_blocks
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 MANUAL_INPUT = BASE_DIR / "manual_input.txt"
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
 RUN_LOG = BASE_DIR / "run_log.md"
@@ -30,38 +33,53 @@ def append_log(text: str) -> None:
         f.write(text)
 
 
-def main() -> None:
-    print("=== Watcher Manual Running ===")
-
+def ingest() -> dict:
+    """Ingest new manual_input.txt blocks. Returns {"ingested", "bytes", "errors"}."""
     NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
 
     if not MANUAL_INPUT.exists():
         print("No manual_input.txt found.")
-        return
-
-    raw = MANUAL_INPUT.read_text(encoding="utf-8", errors="ignore").strip()
-    if not raw:
-        print("manual_input.txt is empty.")
-        return
-
-    blocks = [b.strip() for b in raw.split("---") if b.strip()]
-
-    if not blocks:
+        return {"ingested": 0, "bytes": 0, "errors": 0}
+
+    # Stream blocks from the last checkpointed offset; anything appended while
+    # we read is picked up next run instead of being lost to a truncate.
+    # Files are written in batches, one checkpoint per batch.
+    slug = ts_slug()
+    result = ingest_blocks(
+        TailReader(MANUAL_INPUT),
+        NEEDS_ACTION,
+        lambda block, n: (f"manual_{slug}_{n}.md", block + "\n"),
+        channel="manual",
+    )
+    written = result["written"]
+    if written:
+        append_log("".join(
+            f"{utc_ts()} - Watcher_Manual: ingested task -> {fname}\n" for fname in written
+        ))
+        for fname in written:
+            print(f"Ingested: {fname}")
+    if result["errors"]:
+        print("Error writing a batch; remaining blocks are retried next run.")
+    if result["triaged"]:
+        print(f"Triage: {result['triaged']} block(s) dropped/archived by rules.")
+    if result["spilled"]:
+        print(f"Backpressure: spilled {result['spilled']} block(s) to Logs/overflow_manual.jsonl.")
+    if result["paused"]:
+        print("Backpressure: Needs_Action/ over watermark; remaining blocks stay in manual_input.txt.")
+
+    # Compaction happens only once everything is checkpointed and nothing new arrived
+    if result["compacted"]:
+        print("Cleared manual_input.txt.")
+
+    if not written and not (result["paused"] or result["spilled"]):
         print("No task blocks found in manual_input.txt.")
-        return
-
-    for i, block in enumerate(blocks, start=1):
-        fname = f"manual_{ts_slug()}_{i}.md"
-        dest = NEEDS_ACTION / fname
-        dest.write_text(block + "\n", encoding="utf-8")
-        append_log(f"{utc_ts()} - Watcher_Manual: ingested task -> {fname}\n")
-        print(f"Ingested: {fname}")
+    return {"ingested": len(written), "bytes": result["bytes"], "errors": result["errors"]}
 
-    # Clear the file after ingestion
-    MANUAL_INPUT.write_text("", encoding="utf-8")
-    print("Cleared manual_input.txt.")
 
-    print("=== Watcher Manual Done ===")
+def main() -> None:
+    print("=== Watcher Manual Running ===")
+    if ingest()["ingested"]:
+        print("=== Watcher Manual Done ===")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,337 @@
+"""WhatsApp Export – streams full chat exports into one task per conversation window.
+
+Drop "Export chat" .txt files into WhatsApp_Exports/. Both export formats
+are recognised:
+
+  iOS       [20/02/2026, 10:15:32] Alice: message
+  Android   20/02/2026, 10:15 - Alice: message
+            (12-hour times with AM/PM work in both)
+
+Lines without a header continue the previous message; header lines without
+"Sender:" (encryption notices, "X added Y") are skipped.
+
+Messages are grouped by sender into conversation windows: a sender's window
+closes when their next message is more than WA_WINDOW_GAP_MINUTES (default 30)
+later, when it reaches WA_WINDOW_MAX_CHARS (default 8000), or at the end of
+the file. Each closed window becomes one Needs_Action/wa_*.md task, so a
+chat burst costs one set of LLM calls instead of one per message.
+
+Behaviour:
+  - Constant memory: the file is read line by line; only windows active
+    within the gap are held, each capped at WA_WINDOW_MAX_CHARS.
+  - Persisted high-water mark per export (Logs/whatsapp_export_state.json):
+    timestamp of the last consumed message plus how many messages at that
+    exact timestamp were consumed, and the same position per sender for
+    windows written past it. Re-exports of a growing chat only emit the new
+    messages. Marks only move forward, are saved after every batch and never
+    pass a message whose window is unwritten, so a crash re-delivers a window
+    rather than losing one.
+  - Day/month order is decided per file before any message is read, by a
+    pass over the headers: the first date with a part > 12 settles it,
+    otherwise day-first (WA_DATE_ORDER=dmy or mdy forces one).
+  - Respects backpressure: each batch is capped at the whatsapp gate's
+    allowance; windows over it wait in the export for the next run.
+  - Windows pass the pre-triage rules (mcp_triage.py, channel "whatsapp")
+    before they are written.
+
+Usage:
+  python whatsapp_export.py                   # every WhatsApp_Exports/*.txt
+  python whatsapp_export.py chat.txt ...      # specific files
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+import mcp_backpressure as backpressure
+import mcp_triage as triage
+from mcp_file_ops import write_many
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
+EXPORTS_DIR = BASE_DIR / "WhatsApp_Exports"
+NEEDS_ACTION = BASE_DIR / "Needs_Action"
+STATE_FILE = BASE_DIR / "Logs" / "whatsapp_export_state.json"
+
+GAP = timedelta(minutes=int(os.getenv("WA_WINDOW_GAP_MINUTES", "30")))
+MAX_CHARS = int(os.getenv("WA_WINDOW_MAX_CHARS", "8000"))
+DATE_ORDER = os.getenv("WA_DATE_ORDER", "auto").strip().lower()  # auto | dmy | mdy
+BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+
+_STAMP = (
+    r"(\d{1,2})[./-](\d{1,2})[./-](\d{2,4}),?\s+"
+    r"(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([AaPp]\.?[Mm]\.?))?"
+)
+IOS_RE = re.compile(r"^[\u200e\ufeff]?\[" + _STAMP + r"\]\s(.*)$")
+ANDROID_RE = re.compile(r"^[\u200e\ufeff]?" + _STAMP + r"\s[-–]\s(.*)$")
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+def _stamp(groups: tuple, order: str) -> datetime | None:
+    a, b, year, hour, minute, second, ampm = groups
+    day, month = (int(b), int(a)) if order == "mdy" else (int(a), int(b))
+    year = int(year)
+    if year < 100:
+        year += 2000
+    hour = int(hour)
+    if ampm:
+        pm = ampm.lower().startswith("p")
+        hour = hour % 12 + (12 if pm else 0)
+    try:
+        return datetime(year, month, day, hour, int(minute), int(second or 0))
+    except ValueError:
+        return None
+
+
+def detect_order(path: Path) -> str:
+    """Return "dmy" or "mdy" for a file: the first date with a part > 12 decides.
+
+    A cheap pass over the header lines only, run before any message is
+    yielded, so early ambiguous dates (1/5/26) are read in the file's order.
+    Files with no unambiguous date are read day-first.
+    """
+    if DATE_ORDER in ("dmy", "mdy"):
+        return DATE_ORDER
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            m = IOS_RE.match(line) or ANDROID_RE.match(line)
+            if m is None:
+                continue
+            a, b = int(m.group(1)), int(m.group(2))
+            if a > 12:
+                return "dmy"
+            if b > 12:
+                return "mdy"
+    return "dmy"
+
+
+def parse_messages(path: Path) -> Iterator[tuple[datetime, str, str]]:
+    """Yield (timestamp, sender, text) for every message, streaming the file."""
+    current: list | None = None
+    order = detect_order(path)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for raw in f:
+            line = raw.rstrip("\r\n")
+            m = IOS_RE.match(line) or ANDROID_RE.match(line)
+            if m is None:
+                if current is not None and len(current[2]) < MAX_CHARS:
+                    current[2] += "\n" + line  # continuation of a multi-line message
+                continue
+            if current is not None:
+                yield current[0], current[1], current[2]
+                current = None
+            when = _stamp(m.groups()[:7], order)
+            sender, sep, text = m.group(8).partition(": ")
+            if when is None or not sep or "end-to-end encrypted" in text:
+                continue  # system line ("Messages and calls are end-to-end encrypted", ...)
+            current = [when, sender.strip().lstrip("\u200e"), text]
+    if current is not None:
+        yield current[0], current[1], current[2]
+
+
+def _advance(pos: tuple[str, int] | None, ts: str) -> tuple[str, int]:
+    """Position after a message at ts: (timestamp, nth message at it). Never moves back."""
+    if pos is None or ts > pos[0]:
+        return ts, 1
+    if ts == pos[0]:
+        return ts, pos[1] + 1
+    return pos  # out-of-order line: keep the mark monotonic
+
+
+# ---------------------------------------------------------------------------
+# Windows
+# ---------------------------------------------------------------------------
+
+class Window:
+    __slots__ = ("sender", "first", "last", "lines", "chars", "start_mark", "end")
+
+    def __init__(self, sender: str, when: datetime, start_mark: tuple[str, int]):
+        self.sender = sender
+        self.first = self.last = when
+        self.lines: list[str] = []
+        self.chars = 0
+        self.start_mark = start_mark  # file position just before its first message
+        self.end: tuple[str, int] | None = None  # sender position of its last message
+
+    def add(self, when: datetime, text: str, end: tuple[str, int]) -> None:
+        line = f"[{when:%H:%M}] {text}"
+        self.lines.append(line)
+        self.chars += len(line) + 1
+        self.last = when
+        self.end = end
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")[:24] or "unknown"
+
+
+def render_window(source: str, w: Window) -> tuple[str, str]:
+    name = f"wa_{_slug(Path(source).stem)}_{w.first:%Y%m%d_%H%M}_{_slug(w.sender)}.md"
+    content = (
+        "# WhatsApp Conversation (Export)\n\n"
+        f"Source: WhatsApp_Exports/{source}\n"
+        f"From: {w.sender}\n"
+        f"Window: {w.first:%Y-%m-%d %H:%M} - {w.last:%H:%M} ({len(w.lines)} messages)\n\n"
+        + "\n".join(w.lines)
+        + "\n"
+    )
+    return name, content
+
+
+# ---------------------------------------------------------------------------
+# High-water mark
+# ---------------------------------------------------------------------------
+
+def _load_state() -> dict:
+    try:
+        return json.loads(STATE_FILE.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+
+def _save_mark(key: str, mark: tuple[str, int], senders: dict[str, tuple[str, int]]) -> None:
+    state = _load_state()
+    state[key] = {"ts": mark[0], "n": mark[1],
+                  # per-sender marks only matter past the file mark
+                  "senders": {s: list(p) for s, p in sorted(senders.items()) if p[0] >= mark[0]},
+                  "updated": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%SZ")}
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, STATE_FILE)
+
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def ingest_export(path: Path, gate: backpressure.Gate | None = None) -> dict:
+    """Emit new conversation windows from one export. Returns stats."""
+    stats = {"written": [], "messages": 0, "bytes": 0, "errors": 0, "triaged": 0, "paused": False}
+    key = path.name
+    gate = gate or backpressure.Gate("whatsapp")
+    saved = _load_state().get(key, {})
+    hwm_ts, hwm_n = saved.get("ts", ""), int(saved.get("n", 0))
+    # Per sender: position of the last message already written (or triaged)
+    done = {s: (p[0], int(p[1])) for s, p in saved.get("senders", {}).items()}
+
+    open_windows: dict[str, Window] = {}
+    closed: list[Window] = []
+    mark = (hwm_ts, hwm_n)  # file position of the last consumed message
+    seen: dict[str, tuple[str, int]] = {}  # per sender: position of their last message
+
+    def flush() -> bool:
+        """Write closed windows, oldest first, up to the gate's allowance."""
+        closed.sort(key=lambda w: w.start_mark)
+        room = gate.allowance()
+        batch = closed[:room]
+        items = [render_window(key, w) for w in batch]
+        # Pre-triage rules: dropped/archived windows never reach Needs_Action/
+        triaged = triage.apply_batch("whatsapp", items)
+        keep = [i for i, item in enumerate(triaged) if item is not None]
+        stats["triaged"] += len(triaged) - len(keep)
+        items = [triaged[i] for i in keep]
+        written = write_many(NEEDS_ACTION, items)
+        gate.admitted(len(written))
+        stats["written"].extend(written)
+        stats["bytes"] += sum(len(c.encode("utf-8")) for _, c in items[:len(written)])
+        # Everything before the first window left unwritten is consumed
+        consumed = keep[len(written)] if len(written) < len(keep) else len(batch)
+        for w in batch[:consumed]:
+            done[w.sender] = max(done.get(w.sender, w.end), w.end)
+        del closed[:consumed]
+        # The file mark never passes the first message of an unwritten window;
+        # the per-sender marks skip what was written past it.
+        safe = min([w.start_mark for w in closed] + [w.start_mark for w in open_windows.values()],
+                   default=mark)
+        _save_mark(key, safe, done)
+        if len(written) < len(items):
+            stats["errors"] += 1
+            return False
+        if closed:
+            stats["paused"] = True  # over the watermark: the rest waits for the next run
+            return False
+        return True
+
+    for when, sender, text in parse_messages(path):
+        ts = when.isoformat()
+        pos = seen[sender] = _advance(seen.get(sender), ts)
+        if ts < hwm_ts:
+            continue
+        if ts == hwm_ts:
+            if hwm_n > 0:
+                hwm_n -= 1
+                continue
+        before = mark
+        mark = _advance(mark, ts)
+        if sender in done and pos <= done[sender]:
+            continue  # already in a window written by an earlier run
+        stats["messages"] += 1
+
+        # Close windows that went quiet (input is chronological)
+        for s, w in list(open_windows.items()):
+            if when - w.last > GAP:
+                closed.append(open_windows.pop(s))
+        w = open_windows.get(sender)
+        if w is not None and w.chars >= MAX_CHARS:
+            closed.append(open_windows.pop(sender))
+            w = None
+        if w is None:
+            w = open_windows[sender] = Window(sender, when, before)
+        w.add(when, text, pos)
+
+        if len(closed) >= BATCH_SIZE and not flush():
+            return stats
+
+    closed.extend(open_windows.values())
+    open_windows.clear()
+    if stats["messages"]:
+        flush()
+    return stats
+
+
+def ingest_exports(paths: list[Path] | None = None) -> dict:
+    """Ingest every export (default: WhatsApp_Exports/*.txt). Returns merged stats."""
+    total = {"written": [], "messages": 0, "bytes": 0, "errors": 0, "triaged": 0, "paused": False}
+    if paths is None:
+        paths = sorted(EXPORTS_DIR.glob("*.txt")) if EXPORTS_DIR.is_dir() else []
+    if not paths:
+        return total
+    gate = backpressure.Gate("whatsapp")
+    for path in paths:
+        if gate.allowance() <= 0:
+            total["paused"] = True
+            break
+        try:
+            stats = ingest_export(Path(path), gate)
+        except Exception as exc:
+            print(f"Error parsing {Path(path).name}: {exc}")
+            total["errors"] += 1
+            continue
+        for k in ("messages", "bytes", "errors", "triaged"):
+            total[k] += stats[k]
+        total["written"].extend(stats["written"])
+        total["paused"] = total["paused"] or stats["paused"]
+    triage.flush_stats()
+    return total
+
+
+if __name__ == "__main__":
+    args = [Path(a) for a in sys.argv[1:]] or None
+    result = ingest_exports(args)
+    for name in result["written"]:
+        print(f"Ingested: {name}")
+    print(
+        f"=== WhatsApp Export Done: {result['messages']} new messages -> "
+        f"{len(result['written'])} conversation task(s), {result['triaged']} triaged"
+        f"{', paused (backpressure)' if result['paused'] else ''} ==="
+    )
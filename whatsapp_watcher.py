@@ -1,8 +1,11 @@
 """Watcher 3 – WhatsApp simulated ingestion.
 
-Reads whatsapp_input.txt, splits tasks on '---' separator lines,
+Streams whatsapp_input.txt, splits tasks on '---' separator lines,
 creates Needs_Action/wa_<timestamp>_<n>.md for each block,
-then clears the file. Logs each ingested task to run_log.md (UTC).
+then clears the file once every block is checkpointed (tail_reader.py).
+Full chat exports dropped in WhatsApp_Exports/ are parsed into one task per
+conversation window (whatsapp_export.py).
+Logs each ingested task to run_log.md (UTC).
 
 This is a SIMULATED watcher (no real WhatsApp API). It demonstrates
 multi-channel ingestion by reading a local text file as a stand-in for
@@ -15,9 +18,12 @@ from __future__ import annotations
 
 import json
 from datetime import datetime, timezone
-from pathlib import Path
 
-BASE_DIR = Path(__file__).resolve().parent
+from tail_reader import TailReader, ingest_blocks
+from whatsapp_export import ingest_exports
+from mcp_vault import VAULT_ROOT
+
+BASE_DIR = VAULT_ROOT
 WHATSAPP_INPUT = BASE_DIR / "whatsapp_input.txt"
 NEEDS_ACTION = BASE_DIR / "Needs_Action"
 LOGS_DIR = BASE_DIR / "Logs"
@@ -53,58 +59,92 @@ def log_event(event_type: str, data: dict) -> None:
         pass
 
 
-def main() -> None:
-    print("=== WhatsApp Watcher (Simulated) Running ===")
-
+def ingest() -> dict:
+    """Ingest chat exports and new whatsapp_input.txt blocks. Returns {"ingested", "bytes", "errors"}."""
+    stats = {"ingested": 0, "bytes": 0, "errors": 0}
     NEEDS_ACTION.mkdir(parents=True, exist_ok=True)
     LOGS_DIR.mkdir(parents=True, exist_ok=True)
 
+    # Full chat exports (WhatsApp_Exports/*.txt): one task per conversation window
+    exports = ingest_exports()
+    if exports["written"]:
+        append_log("".join(
+            f"{utc_ts()} - WhatsApp_Watcher: export window -> {fname}\n" for fname in exports["written"]
+        ))
+        for fname in exports["written"]:
+            log_event("whatsapp_task_ingested", {"file": fname, "source": "export"})
+            print(f"Ingested: {fname}")
+        log_event(
+            "whatsapp_export_done",
+            {"messages": exports["messages"], "windows": len(exports["written"]),
+             "paused": exports["paused"]},
+        )
+    stats.update(
+        ingested=len(exports["written"]), bytes=exports["bytes"], errors=exports["errors"]
+    )
+
     if not WHATSAPP_INPUT.exists():
         print("No whatsapp_input.txt found. Skipping.")
         append_log(f"{utc_ts()} - WhatsApp_Watcher: no_input_file\n")
         log_event("whatsapp_watcher_skip", {"reason": "no_input_file"})
-        return
+        return stats
 
-    raw = WHATSAPP_INPUT.read_text(encoding="utf-8", errors="ignore").strip()
-    if not raw:
-        print("whatsapp_input.txt is empty. Skipping.")
-        append_log(f"{utc_ts()} - WhatsApp_Watcher: empty_file\n")
-        log_event("whatsapp_watcher_skip", {"reason": "empty_file"})
-        return
-
-    blocks = [b.strip() for b in raw.split("---") if b.strip()]
-
-    if not blocks:
-        print("No task blocks found in whatsapp_input.txt.")
-        return
-
-    ingested = 0
+    # Stream blocks from the last checkpointed offset; anything appended while
+    # we read is picked up next run instead of being lost to a truncate.
+    # Files are written in batches, one checkpoint per batch.
     slug = ts_slug()
-    for i, block in enumerate(blocks, start=1):
-        fname = f"wa_{slug}_{i}.md"
-        dest = NEEDS_ACTION / fname
-        try:
-            dest.write_text(
-                f"# WhatsApp Task (Simulated)\n\nSource: whatsapp_input.txt\n\n{block}\n",
-                encoding="utf-8",
-            )
-            append_log(f"{utc_ts()} - WhatsApp_Watcher: ingested -> {fname}\n")
+    result = ingest_blocks(
+        TailReader(WHATSAPP_INPUT),
+        NEEDS_ACTION,
+        lambda block, n: (
+            f"wa_{slug}_{n}.md",
+            f"# WhatsApp Task (Simulated)\n\nSource: whatsapp_input.txt\n\n{block}\n",
+        ),
+        channel="whatsapp",
+    )
+    written = result["written"]
+    stats["ingested"] += len(written)
+    stats["bytes"] += result["bytes"]
+    stats["errors"] += result["errors"]
+    if written:
+        append_log("".join(f"{utc_ts()} - WhatsApp_Watcher: ingested -> {fname}\n" for fname in written))
+        for fname in written:
             log_event("whatsapp_task_ingested", {"file": fname})
             print(f"Ingested: {fname}")
-            ingested += 1
-        except Exception as exc:
-            print(f"Error writing {fname}: {exc}")
-
-    # Clear input file after processing
-    try:
-        WHATSAPP_INPUT.write_text("", encoding="utf-8")
+    if result["errors"]:
+        print("Error writing a batch; remaining blocks are retried next run.")
+    if result["triaged"]:
+        print(f"Triage: {result['triaged']} block(s) dropped/archived by rules.")
+    if result["spilled"]:
+        print(f"Backpressure: spilled {result['spilled']} block(s) to Logs/overflow_whatsapp.jsonl.")
+    if result["paused"]:
+        print("Backpressure: Needs_Action/ over watermark; remaining blocks stay in whatsapp_input.txt.")
+
+    # Compaction happens only once everything is checkpointed and nothing new arrived
+    if result["compacted"]:
         print("Cleared whatsapp_input.txt.")
-    except Exception:
-        pass
 
-    append_log(f"{utc_ts()} - WhatsApp_Watcher: done | ingested={ingested}\n")
-    log_event("whatsapp_watcher_done", {"ingested": ingested})
-    print(f"=== WhatsApp Watcher Done ({ingested} tasks ingested) ===")
+    if not written and (result["paused"] or result["spilled"]):
+        append_log(f"{utc_ts()} - WhatsApp_Watcher: paused | backpressure\n")
+        log_event("whatsapp_watcher_skip", {"reason": "backpressure"})
+        return stats
+
+    if not written:
+        print("No new task blocks in whatsapp_input.txt. Skipping.")
+        append_log(f"{utc_ts()} - WhatsApp_Watcher: empty_file\n")
+        log_event("whatsapp_watcher_skip", {"reason": "empty_file"})
+        return stats
+
+    append_log(f"{utc_ts()} - WhatsApp_Watcher: done | ingested={stats['ingested']}\n")
+    log_event("whatsapp_watcher_done", {"ingested": stats["ingested"]})
+    return stats
+
+
+def main() -> None:
+    print("=== WhatsApp Watcher (Simulated) Running ===")
+    ingested = ingest()["ingested"]
+    if ingested:
+        print(f"=== WhatsApp Watcher Done ({ingested} tasks ingested) ===")
 
 
 if __name__ == "__main__":